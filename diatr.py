@@ -1,24 +1,55 @@
+import time
+START_TIME = time.perf_counter()
 import json
 import os
-import tkinter as tk
-from tkinter import messagebox, ttk, font
-from tkinter import filedialog
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
-import matplotlib.pyplot as plt
 import csv
-import random
-import seaborn as sns
+import datetime
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import sys
-try:
-    from PIL import Image, ImageTk, ImageDraw, ImageFont
-except ImportError as e:
-    print(f"Error importing PIL: {e}")
-    raise
+from diet_engine import (
+    NUTRIENTS, CATEGORIES_PER_DAY, DAYS, MAX_COST_PER_DAY, InfeasibleError, FoodTable, SolveCache,
+    q_vector, solve_optimal_diet, plan_weekly_menu, replan_weekly_menu, sensitivity_analysis, catalogue_analytics
+)
+from food_store import (
+    FoodJournal, SqliteFoodStore, stream_foods_into, load_food_table, load_cached_table, write_cache,
+    merge_foods_from, PriceHistory
+)
+
+# Το tkinter φορτώνεται στο main(): οι διεργασίες του process pool (spawn) ξαναφορτώνουν αυτό το αρχείο
+# και πρέπει να βρίσκουν μόνο τον κώδικα χωρίς γραφικά
+tk = ttk = font = messagebox = filedialog = None
+# Τα διαγράμματα (matplotlib) και το PIL φορτώνονται στην πρώτη χρήση τους, ώστε να μην καθυστερούν την εκκίνηση
+diet_charts = None
+Image = ImageTk = None
+
+def import_tkinter():
+    global tk, ttk, font, messagebox, filedialog
+    if tk is not None:
+        return
+    import tkinter as tk
+    from tkinter import messagebox, ttk, font
+    from tkinter import filedialog
+
+def import_plotting():
+    global diet_charts
+    if diet_charts is not None:
+        return
+    start = time.perf_counter()
+    import diet_charts
+    print(f"Plotting libraries imported in {time.perf_counter() - start:.2f} s")
 
-# Ensure matplotlib uses the TkAgg backend
-import matplotlib
-matplotlib.use('TkAgg')
+def import_pil():
+    global Image, ImageTk
+    if Image is not None:
+        return
+    try:
+        from PIL import Image, ImageTk
+    except ImportError as e:
+        print(f"Error importing PIL: {e}")
+        raise
 
 # Function to get the correct path for bundled resources
 def resource_path(relative_path):
@@ -33,214 +64,440 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 # Define global directories
+# Οι φάκελοι δημιουργούνται στο main(), όχι κατά την εισαγωγή του αρχείου
 APPDATA_DIR = os.path.join(os.getenv('APPDATA', os.path.dirname(os.path.abspath(__file__))), 'DietAssistant')
-os.makedirs(APPDATA_DIR, exist_ok=True)
 
 # Define directory for saving PNG charts in My Documents
 DOCUMENTS_DIR = os.path.join(os.path.expanduser("~"), "Documents", "Diatrofi")
-os.makedirs(DOCUMENTS_DIR, exist_ok=True)
 
 FOOD_FILE = os.path.join(APPDATA_DIR, "foods_expanded.json")
 MEAT_FISH_FILE = os.path.join(APPDATA_DIR, "meat_fish.json")
+FOOD_CACHE_DIR = os.path.join(APPDATA_DIR, "foods_cache")
+FOOD_JOURNAL_FILE = os.path.join(APPDATA_DIR, "foods_journal.jsonl")
+JOURNAL_COMPACT_EVERY = 200   # Συμπύκνωση στο αρχείο τροφών μετά από τόσες αλλαγές
+FOOD_DB_FILE = os.path.join(APPDATA_DIR, "foods.sqlite3")
+PRICE_HISTORY_FILE = os.path.join(APPDATA_DIR, "price_history.npz")
+# Αποθήκευση τροφών: "json" (αρχεία JSON με ημερολόγιο αλλαγών) ή "sqlite"
+FOOD_STORE_BACKEND = os.getenv("DIET_ASSISTANT_STORE", "json").lower()
 Q_FILE = os.path.join(APPDATA_DIR, "q_values.json")
+# Γρήγορη εκκίνηση: το κύριο παράθυρο εμφανίζεται μόλις φορτωθούν τα δεδομένα,
+# αλλιώς η οθόνη εκκίνησης μένει τουλάχιστον SPLASH_MIN_MS
+FAST_START = os.getenv("DIET_ASSISTANT_FAST_START", "1") != "0"
+SPLASH_MIN_MS = 0 if FAST_START else 3000
 ICON_DIR = resource_path("icons")
-os.makedirs(ICON_DIR, exist_ok=True)
+# Τα εικονίδια κουμπιών αποθηκεύονται ήδη σμικρυμένα σε ένα κοινό atlas, που ξαναφτιάχνεται όταν αλλάξουν τα PNG
+ICON_SIZE = (200, 100)
+ICON_ATLAS_FILE = os.path.join(APPDATA_DIR, "icon_atlas.png")
+ICON_ATLAS_INDEX = os.path.join(APPDATA_DIR, "icon_atlas.json")
 
 # Global variables
 T = None
 last_selected_foods = None
 weekly_menu_data = None
+# Τελευταίες λύσεις, για επανυπολογισμό με θερμή εκκίνηση όταν αλλάζει μία τροφή ή το ΣΗΠ
+last_diet_state = None
+last_weekly_state = None
+# Γραμμές που άλλαξαν ενώ έτρεχε επανυπολογισμός· επιλύονται μαζί μόλις εκείνος τελειώσει
+pending_refresh_rows = set()
+pending_refresh_all = False
+refresh_running_rows = None
+refresh_jobs_running = 0
+BACKGROUND_POLL_MS = 100
+background_executor = ThreadPoolExecutor(max_workers=1)
+# Αυξάνεται σε κάθε αλλαγή τροφών ή ΣΗΠ, ώστε να απορρίπτονται αποτελέσματα που υπολογίστηκαν πριν από αυτήν
+catalogue_version = 0
+# Τα παράθυρα διαγραμμάτων μένουν ανοιχτά και ενημερώνονται επιτόπου σε κάθε νέο υπολογισμό
+cost_bar_chart = None
+cost_heatmap = None
+sensitivity_chart = None
+# Η λίστα τροφών γεμίζει σε σελίδες καθώς ο χρήστης κυλά προς το τέλος της
+FOOD_LIST_PAGE = 200
+food_list_loaded = 0
 Q_VALUES = None
-foods = []
-
-# Define the specific nutrients
-NUTRIENTS = [
-    "Υδατάνθρακες",
-    "Πρωτεΐνες",
-    "Λίπη",
-    "Εδώδιμες ίνες",
-    "Ασβέστιο",
-    "Σίδηρος"
-]
-
-# Categories and number of foods per category for each day
-CATEGORIES_PER_DAY = {
-    "Φρούτα": 1,
-    "Λαχανικά": 2,
-    "Όσπρια": 1,
-    "Κρέας": 1,
-    "Αλεύρι/Ψωμί": 1,
-    "Ψάρια": 0,
-    "Ξηροί Καρποί": 1
+# Ο πίνακας τροφών είναι και η λίστα τροφών: κάθε στοιχείο του είναι ένα dict τροφής
+foods = food_table = FoodTable()
+# Αποθήκευση των αλλαγών τροφών, ανοίγει στο main() (βλ. open_food_backend)
+food_backend = None
+# Ιστορικό τιμών και ημερομηνία τιμών των υπολογισμών (None: τρέχουσες τιμές καταλόγου)
+price_history = PriceHistory()
+PRICE_DATE = None
+# Κρυφή μνήμη λύσεων· αδειάζει όταν αλλάζουν οι τροφές ή το ΣΗΠ
+solve_cache = SolveCache()
+
+# Μέθοδοι σχεδιασμού εβδομαδιαίου μενού (ετικέτα -> μέθοδος της μηχανής επίλυσης)
+WEEKLY_MENU_METHODS = {
+    "Γραμμικός προγραμματισμός": "lp",
+    "Βέλτιστη επιλογή τροφών": "greedy",
+    "Ενιαία βελτιστοποίηση εβδομάδας": "week",
+    "Τυχαία επιλογή": "random",
 }
 
+# Κοινή κρυφή μνήμη γραφικών της εφαρμογής: γραμματοσειρά, διαβαθμίσεις και εικονίδια φτιάχνονται μία φορά
+resolved_fonts = {}
+gradient_cache = {}
+icon_images = {}
+icon_atlas = None
+icon_atlas_rows = {}
+
 # Font selection
 def get_available_font(preferred_fonts=["Roboto", "Segoe UI", "Arial"]):
+    key = tuple(preferred_fonts)
+    if key in resolved_fonts:
+        return resolved_fonts[key]
     print("Getting available font")
     try:
         available_fonts = font.families()
-        for preferred in preferred_fonts:
-            if preferred in available_fonts:
-                print(f"Font found: {preferred}")
-                return preferred
-        print("Defaulting to Arial")
-        return "Arial"
+        selected = next((preferred for preferred in preferred_fonts if preferred in available_fonts), None)
+        if selected is not None:
+            print(f"Font found: {selected}")
+        else:
+            print("Defaulting to Arial")
+            selected = "Arial"
     except Exception as e:
         print(f"Error in get_available_font: {e}")
-        return "Arial"
+        selected = "Arial"
+    resolved_fonts[key] = selected
+    return selected
 
 # Gradient background creation (used in popups)
 def create_gradient(width, height, start_color, end_color):
+    key = (width, height, start_color, end_color)
+    if key in gradient_cache:
+        return gradient_cache[key]
     print(f"Creating gradient: {width}x{height}")
     try:
-        image = Image.new("RGB", (width, height))
-        draw = ImageDraw.Draw(image)
-        r1, g1, b1 = int(start_color[1:3], 16), int(start_color[3:5], 16), int(start_color[5:7], 16)
-        r2, g2, b2 = int(end_color[1:3], 16), int(end_color[3:5], 16), int(end_color[5:7], 16)
-        for y in range(height):
-            r = int(r1 + (r2 - r1) * y / height)
-            g = int(g1 + (g2 - g1) * y / height)
-            b = int(b1 + (b2 - b1) * y / height)
-            draw.line((0, y, width, y), fill=(r, g, b))
-        return ImageTk.PhotoImage(image)
+        import_pil()
+        start = np.array([int(start_color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float64)
+        end = np.array([int(end_color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float64)
+        # Ένα χρώμα ανά γραμμή, απλωμένο σε όλο το πλάτος
+        rows = (start + (end - start) * np.arange(height)[:, None] / height).astype(np.uint8)
+        pixels = np.ascontiguousarray(np.broadcast_to(rows[:, None, :], (height, width, 3)))
+        gradient_cache[key] = ImageTk.PhotoImage(Image.fromarray(pixels, "RGB"))
+        return gradient_cache[key]
     except Exception as e:
         print(f"Error in create_gradient: {e}")
         raise
 
-# Custom button class with image-only support (χωρίς hover effect)
-class CustomButton(tk.Button):
-    def __init__(self, parent, image_path, command, **kwargs):
-        super().__init__(parent, **kwargs)
-        self.configure(
-            command=command,
-            bg="#FFFFFF",
-            activebackground="#FFFFFF",
-            relief="flat",
-            borderwidth=0
-        )
-        print(f"Creating CustomButton with image: {image_path}")
+def icon_sources():
+    return [[name, os.path.getsize(os.path.join(ICON_DIR, name)), os.stat(os.path.join(ICON_DIR, name)).st_mtime_ns]
+            for name in sorted(os.listdir(ICON_DIR)) if name.lower().endswith(".png")]
+
+def build_icon_atlas(sources):
+    """Resize every PNG of ICON_DIR to ICON_SIZE once and stack them in ICON_ATLAS_FILE."""
+    import_pil()
+    width, height = ICON_SIZE
+    atlas = Image.new("RGBA", (width, height * max(len(sources), 1)), (255, 255, 255, 0))
+    rows = {}
+    for row, (name, size, mtime) in enumerate(sources):
+        with Image.open(os.path.join(ICON_DIR, name)) as img:
+            atlas.paste(img.convert("RGBA").resize(ICON_SIZE, Image.LANCZOS), (0, row * height))
+        rows[name] = row
+    tmp_path = ICON_ATLAS_FILE + ".tmp"
+    atlas.save(tmp_path, "PNG")
+    os.replace(tmp_path, ICON_ATLAS_FILE)
+    with open(ICON_ATLAS_INDEX, "w", encoding="utf-8") as f:
+        json.dump({"size": list(ICON_SIZE), "sources": sources, "rows": rows}, f)
+    print(f"Built icon atlas with {len(rows)} icons")
+    return rows
+
+def load_icon_atlas():
+    global icon_atlas, icon_atlas_rows
+    sources = icon_sources()
+    try:
+        with open(ICON_ATLAS_INDEX, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index["size"] != list(ICON_SIZE) or index["sources"] != sources or not os.path.exists(ICON_ATLAS_FILE):
+            raise ValueError("stale icon atlas")
+        rows = index["rows"]
+    except (OSError, ValueError, KeyError):
+        rows = build_icon_atlas(sources)
+    # Το Tk διαβάζει το PNG απευθείας, χωρίς PIL
+    icon_atlas = tk.PhotoImage(file=ICON_ATLAS_FILE)
+    icon_atlas_rows = rows
+
+def get_icon(image_path):
+    """PhotoImage of a button icon at ICON_SIZE, cut from the icon atlas (or resized once if it is not in ICON_DIR)."""
+    if image_path in icon_images:
+        return icon_images[image_path]
+    if icon_atlas is None:
         try:
-            # Use resource_path to locate the image
-            image_path = resource_path(image_path)
-            if os.path.exists(image_path):
-                img = Image.open(image_path).resize((200, 100), Image.LANCZOS)
-                self.icon = ImageTk.PhotoImage(img)
-                self.config(image=self.icon)
-                print(f"Icon loaded successfully: {image_path}")
-            else:
-                print(f"Icon file does not exist: {image_path}")
-                self.config(text="Button", fg="#000000", font=(get_available_font(), 10, "bold"))
+            load_icon_atlas()
         except Exception as e:
-            print(f"Error loading icon {image_path}: {e}")
-            self.config(text="Button", fg="#000000", font=(get_available_font(), 10, "bold"))
+            print(f"Error loading icon atlas: {e}")
+    name = os.path.basename(image_path)
+    width, height = ICON_SIZE
+    if name in icon_atlas_rows and os.path.dirname(image_path) == ICON_DIR:
+        icon = tk.PhotoImage(width=width, height=height)
+        y = icon_atlas_rows[name] * height
+        icon.tk.call(icon, "copy", icon_atlas, "-from", 0, y, width, y + height)
+    else:
+        import_pil()
+        icon = ImageTk.PhotoImage(Image.open(image_path).resize(ICON_SIZE, Image.LANCZOS))
+    icon_images[image_path] = icon
+    return icon
+
+# Custom button with image-only support (χωρίς hover effect); συνάρτηση και όχι υποκλάση του tk.Button,
+# αφού το tkinter φορτώνεται μόνο στο main()
+def custom_button(parent, image_path, command, **kwargs):
+    button = tk.Button(parent, **kwargs)
+    button.configure(
+        command=command,
+        bg="#FFFFFF",
+        activebackground="#FFFFFF",
+        relief="flat",
+        borderwidth=0
+    )
+    print(f"Creating custom button with image: {image_path}")
+    try:
+        # Use resource_path to locate the image
+        image_path = resource_path(image_path)
+        if os.path.exists(image_path):
+            button.icon = get_icon(image_path)
+            button.config(image=button.icon)
+            print(f"Icon loaded successfully: {image_path}")
+        else:
+            print(f"Icon file does not exist: {image_path}")
+            button.config(text="Button", fg="#000000", font=(get_available_font(), 10, "bold"))
+    except Exception as e:
+        print(f"Error loading icon {image_path}: {e}")
+        button.config(text="Button", fg="#000000", font=(get_available_font(), 10, "bold"))
+    return button
 
-# Splash screen function with support for animated GIF
+# Splash screen with support for animated GIF, shown over the hidden root while the data loads
 def show_splash_screen():
-    splash = tk.Tk()
+    splash = tk.Toplevel(root)
     splash.overrideredirect(True)  # Remove window borders
     splash.geometry("300x300+810+390")  # 300x300, centered on 1920x1080 screen
+    splash.configure(bg="#2E2E2E")
 
     # Load and display the logo (GIF or static image)
     try:
         logo_path = resource_path("logo.gif")
         if os.path.exists(logo_path):
-            # Open the GIF and extract frames
+            import_pil()
             img = Image.open(logo_path)
-            frames = []
-            try:
-                # Extract all frames from the GIF
-                while True:
-                    frame = img.copy()
-                    frame = frame.resize((300, 300), Image.LANCZOS)  # 300x300
-                    frames.append(ImageTk.PhotoImage(frame))
-                    img.seek(len(frames))  # Move to the next frame
-            except EOFError:
-                pass  # End of frames
-
-            # Display the GIF with animation
+            frame_count = getattr(img, "n_frames", 1)
+            frames = {}
             logo_label = tk.Label(splash, bg="#2E2E2E")
             logo_label.pack()
 
-            # Animation function
-            def animate(frame_idx=0, total_duration=0):
-                if total_duration >= 3000:  # Stop after 3 seconds
-                    splash.destroy()
+            # Animation function: each frame is decoded and resized only when first shown
+            def animate(frame_idx=0):
+                if not splash.winfo_exists():
                     return
+                if frame_idx not in frames:
+                    img.seek(frame_idx)
+                    frames[frame_idx] = ImageTk.PhotoImage(img.copy().resize((300, 300), Image.LANCZOS))
                 logo_label.config(image=frames[frame_idx])
-                frame_idx = (frame_idx + 1) % len(frames)
                 # Get frame duration (default to 100ms if not specified)
-                try:
-                    frame_duration = img.info.get('duration', 100)
-                except:
-                    frame_duration = 100
-                splash.after(frame_duration, animate, frame_idx, total_duration + frame_duration)
+                frame_duration = img.info.get('duration', 100) or 100
+                splash.after(frame_duration, animate, (frame_idx + 1) % frame_count)
 
             # Start animation
             animate()
         else:
             # Fallback if logo.gif is not found
             tk.Label(splash, text="Diet Assistant", font=(get_available_font(), 24, "bold"), fg="#FFFFFF", bg="#2E2E2E").pack(expand=True)
-            splash.after(3000, splash.destroy)
     except Exception as e:
         print(f"Error loading logo: {e}")
         tk.Label(splash, text="Diet Assistant", font=(get_available_font(), 24, "bold"), fg="#FFFFFF", bg="#2E2E2E").pack(expand=True)
-        splash.after(3000, splash.destroy)
 
-    splash.mainloop()
+    splash.update()
+    return splash
 
 # Data management
+# Όσο τα δεδομένα φορτώνονται στο παρασκήνιο, οι προειδοποιήσεις κρατούνται εδώ
+# και εμφανίζονται μαζί με το κύριο παράθυρο (το Tk δεν καλείται από άλλο νήμα)
+startup_warnings = None
+
+def show_load_warning(message):
+    if startup_warnings is not None:
+        startup_warnings.append(message)
+    else:
+        messagebox.showwarning("Προσοχή", message)
+
+def report_load_progress(count, bytes_read, total_bytes):
+    percent = 100 * bytes_read / total_bytes if total_bytes else 100
+    print(f"Loading foods: {count} records ({percent:.0f}%)")
+
+def open_food_backend():
+    # Οι αλλαγές τροφών γράφονται στο ημερολόγιο και συμπυκνώνονται περιοδικά στο FOOD_FILE,
+    # ή απευθείας στη βάση SQLite όταν έχει επιλεγεί αυτή
+    if FOOD_STORE_BACKEND == "sqlite":
+        return SqliteFoodStore(FOOD_DB_FILE)
+    return FoodJournal(FOOD_JOURNAL_FILE, FOOD_FILE, [FOOD_FILE, MEAT_FISH_FILE])
+
 def load_foods():
-    global foods
+    global foods, food_table
     print("Loading foods")
-    foods_list = []
+    if FOOD_STORE_BACKEND == "sqlite":
+        return load_foods_from_database()
+    table = load_base_foods()
+    try:
+        applied = food_backend.replay(table)
+        if applied:
+            print(f"Applied {applied} journaled food changes")
+    except Exception as e:
+        # Κρατά τις αλλαγές που εφαρμόστηκαν και ξεκινά καθαρό ημερολόγιο
+        print(f"Error replaying food journal: {e}")
+        show_load_warning(f"Σφάλμα εφαρμογής αλλαγών τροφών: {e}")
+        save_foods(table)
+    foods = food_table = table
+    print(f"Total foods loaded: {len(foods)} items")
+    return foods
+
+def load_foods_from_database():
+    global foods, food_table
+    # Την πρώτη φορά η βάση γεμίζει από τα αρχεία JSON
+    if not len(food_backend):
+        print(f"Importing JSON foods into {FOOD_DB_FILE}")
+        try:
+            food_backend.compact(load_base_foods())
+        except Exception as e:
+            print(f"Error importing foods into database: {e}")
+            show_load_warning(f"Σφάλμα εισαγωγής τροφών στη βάση: {e}")
+    foods = food_table = food_backend.load_table()
+    print(f"Total foods loaded from database: {len(foods)} items")
+    return foods
+
+def load_base_foods():
+    sources = [path for path in (FOOD_FILE, MEAT_FISH_FILE) if os.path.exists(path)]
+    table = load_cached_table(FOOD_CACHE_DIR, sources)
+    if table is not None:
+        print(f"Loaded {len(table)} foods from cache")
+        return table
+
+    # Οι εγγραφές διαβάζονται μία-μία και μπαίνουν απευθείας στον πίνακα τροφών
+    table = FoodTable()
+    complete = True
     
     if not os.path.exists(FOOD_FILE):
         print(f"No food file found at {FOOD_FILE}, skipping.")
     else:
         try:
-            with open(FOOD_FILE, "r", encoding="utf-8") as f:
-                foods_expanded = json.load(f)
-            foods_list.extend(foods_expanded)
-            print(f"Loaded {len(foods_expanded)} foods from foods_expanded.json")
+            count = stream_foods_into(table, FOOD_FILE, report_load_progress)
+            print(f"Loaded {count} foods from foods_expanded.json")
         except Exception as e:
+            complete = False
             print(f"Error loading foods_expanded.json: {e}")
-            messagebox.showwarning("Προσοχή", f"Σφάλμα φόρτωσης foods_expanded.json: {e}")
+            show_load_warning(f"Σφάλμα φόρτωσης foods_expanded.json: {e}")
     
     if not os.path.exists(MEAT_FISH_FILE):
         print(f"No meat_fish file found at {MEAT_FISH_FILE}, skipping.")
     else:
         try:
-            with open(MEAT_FISH_FILE, "r", encoding="utf-8") as f:
-                meat_fish = json.load(f)
-            foods_list.extend(meat_fish)
-            print(f"Loaded {len(meat_fish)} foods from meat_fish.json")
+            count = stream_foods_into(table, MEAT_FISH_FILE, report_load_progress)
+            print(f"Loaded {count} foods from meat_fish.json")
         except Exception as e:
+            complete = False
             print(f"Error loading meat_fish.json: {e}")
-            messagebox.showwarning("Προσοχή", f"Σφάλμα φόρτωσης meat_fish.json: {e}")
-    
-    for food in foods_list:
-        if set(food['nutrients'].keys()) != set(NUTRIENTS):
-            raise ValueError(f"Η τροφή '{food['name']}' δεν έχει τα σωστά θρεπτικά συστατικά: {NUTRIENTS}")
-        if food['cost'] <= 0:
-            raise ValueError(f"Το κόστος για την τροφή '{food['name']}' πρέπει να είναι θετικό.")
-        if 'category' not in food:
-            raise ValueError(f"Η τροφή '{food['name']}' δεν έχει πεδίο κατηγορίας.")
-        if food['category'] not in CATEGORIES_PER_DAY:
-            raise ValueError(f"Η κατηγορία '{food['category']}' της τροφής '{food['name']}' δεν είναι έγκυρη.")
+            show_load_warning(f"Σφάλμα φόρτωσης meat_fish.json: {e}")
     
-    foods = foods_list
-    print(f"Total foods loaded: {len(foods)} items")
-    return foods
+    if complete:
+        try:
+            write_cache(FOOD_CACHE_DIR, table, sources)
+        except OSError as e:
+            print(f"Error writing food cache: {e}")
+    return table
 
 def save_foods(foods):
     print("Saving foods")
     try:
-        with open(FOOD_FILE, "w", encoding="utf-8") as f:
-            json.dump(foods, f, indent=4, ensure_ascii=False)
+        food_backend.compact(foods)
         print("Foods saved successfully")
     except Exception as e:
         print(f"Error saving foods: {e}")
 
+def invalidate_solve_cache():
+    global catalogue_version
+    catalogue_version += 1
+    stats = solve_cache.stats
+    print(f"Clearing solve cache ({stats['size']} entries, {stats['hits']} hits, {stats['misses']} misses)")
+    solve_cache.clear()
+
+def record_food_change(op, row=None, food=None):
+    """Store a single food change in the journal (compacted every JOURNAL_COMPACT_EVERY changes) or the database."""
+    # Οι γραμμές τροφών των αποθηκευμένων λύσεων δεν αντιστοιχούν πια στα ίδια δεδομένα
+    invalidate_solve_cache()
+    try:
+        food_backend.record(op, row, food)
+    except Exception as e:
+        print(f"Error recording food change: {e}")
+        save_foods(foods)
+        return
+    if food_backend.pending >= JOURNAL_COMPACT_EVERY:
+        save_foods(foods)
+
+def load_price_history():
+    global price_history
+    if not os.path.exists(PRICE_HISTORY_FILE):
+        print("No price history found, starting empty.")
+        return price_history
+    try:
+        price_history = PriceHistory.load(PRICE_HISTORY_FILE)
+        print(f"Loaded {price_history.tick_count} price ticks for {len(price_history)} foods")
+    except Exception as e:
+        print(f"Error loading price history: {e}")
+    return price_history
+
+def save_price_history():
+    try:
+        price_history.save(PRICE_HISTORY_FILE)
+    except Exception as e:
+        print(f"Error saving price history: {e}")
+
+def current_costs():
+    """Cost vector C of the whole catalogue at PRICE_DATE (the catalogue costs when no date is set)."""
+    if PRICE_DATE is None:
+        return food_table.costs
+    return price_history.costs_as_of(food_table.names, PRICE_DATE, food_table.costs)
+
+def set_price_date():
+    global PRICE_DATE
+    popup = tk.Toplevel(root)
+    popup.title("Ιστορικό Τιμών")
+    popup.geometry("320x230")
+    popup.configure(bg="#FFFFFF")
+    try:
+        gradient = create_gradient(320, 230, "#4CAF50", "#81C784")
+        bg_label = tk.Label(popup, image=gradient)
+        bg_label.image = gradient
+        bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+    except Exception as e:
+        print(f"Error setting popup background: {e}")
+
+    selected_font = get_available_font()
+    ttk.Label(popup, text="Ημερομηνία τιμών (ΕΕΕΕ-ΜΜ-ΗΗ):", font=(selected_font, 10, "bold"), foreground="#000000").pack(pady=5)
+    ttk.Label(popup, text="(κενό για τις τρέχουσες τιμές)", foreground="#000000").pack()
+    date_entry = ttk.Entry(popup, width=20)
+    date_entry.insert(0, PRICE_DATE or "")
+    date_entry.pack(pady=5)
+
+    def save_and_close():
+        global PRICE_DATE
+        value = date_entry.get().strip()
+        try:
+            PRICE_DATE = datetime.date.fromisoformat(value).isoformat() if value else None
+        except ValueError:
+            messagebox.showerror("Σφάλμα", "Μη έγκυρη ημερομηνία. Χρησιμοποιήστε τη μορφή ΕΕΕΕ-ΜΜ-ΗΗ.")
+            return
+        popup.destroy()
+        update_status(f"Τιμές της {PRICE_DATE}." if PRICE_DATE else "Τρέχουσες τιμές καταλόγου.")
+
+    def import_prices():
+        file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
+        if not file_path:
+            return
+        try:
+            count = price_history.load_csv(file_path)
+            save_price_history()
+            messagebox.showinfo("Επιτυχία", f"Εισήχθησαν {count} τιμές για {len(price_history)} τροφές.")
+        except Exception as e:
+            messagebox.showerror("Σφάλμα", f"Αποτυχία εισαγωγής τιμών: {e}")
+
+    ttk.Button(popup, text="Εισαγωγή τιμών (CSV)", command=import_prices).pack(pady=5)
+    ttk.Button(popup, text="Αποθήκευση", command=save_and_close).pack(pady=5)
+
 def load_q_values():
     global Q_VALUES
     print(f"Attempting to load Q values from {Q_FILE}")
@@ -321,6 +578,8 @@ def set_q_values():
             Q_VALUES = new_Q
             print(f"New Q_VALUES before saving: {Q_VALUES}")
             save_q_values()
+            invalidate_solve_cache()
+            refresh_results_incrementally()
             popup.destroy()
             messagebox.showinfo("Επιτυχία", "Το ΣΗΠ αποθηκεύτηκε επιτυχώς.")
         except Exception as e:
@@ -330,45 +589,72 @@ def set_q_values():
     ttk.Button(style_frame, text="Αποθήκευση", command=save_and_close).pack(pady=10)
 
 def load_custom_json():
-    global foods
+    global foods, food_table
     file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
     if file_path:
+        # Ναι: συγχώνευση με τις υπάρχουσες τροφές ανά όνομα, Όχι: αντικατάσταση όλου του καταλόγου
+        merge = messagebox.askyesnocancel("Φόρτωση JSON", "Συγχώνευση με τις υπάρχουσες τροφές;\n(Όχι: αντικατάσταση όλων των τροφών)")
+        if merge is None:
+            return
+        if merge:
+            merge_custom_json(file_path)
+            return
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                new_foods = json.load(f)
-            for food in new_foods:
-                if set(food['nutrients'].keys()) != set(NUTRIENTS):
-                    raise ValueError(f"Η τροφή '{food['name']}' δεν έχει τα σωστά θρεπτικά συστατικά: {NUTRIENTS}")
-                if food['cost'] <= 0:
-                    raise ValueError(f"Το κόστος για την τροφή '{food['name']}' πρέπει να είναι θετικό.")
-                if 'category' not in food:
-                    raise ValueError(f"Η τροφή '{food['name']}' δεν έχει πεδίο κατηγορίας.")
-                if food['category'] not in CATEGORIES_PER_DAY:
-                    raise ValueError(f"Η κατηγορία '{food['category']}' της τροφής '{food['name']}' δεν είναι έγκυρη.")
-            foods = new_foods
+            foods = food_table = load_food_table([file_path], report_load_progress)
+            invalidate_solve_cache()
+            forget_catalogue()
             save_foods(foods)
             refresh_food_list()
             messagebox.showinfo("Επιτυχία", "Το JSON αρχείο φορτώθηκε με επιτυχία.")
         except Exception as e:
             messagebox.showerror("Σφάλμα", f"Αποτυχία φόρτωσης JSON: {e}")
 
+def merge_custom_json(file_path):
+    try:
+        report = merge_foods_from(food_table, file_path, report_load_progress)
+    except Exception as e:
+        # Ο πίνακας έχει επανέλθει στην προηγούμενη κατάστασή του, που ταυτίζεται με τον δίσκο
+        messagebox.showerror("Σφάλμα", f"Αποτυχία φόρτωσης JSON: {e}")
+        return
+    finally:
+        invalidate_solve_cache()
+        refresh_food_list()
+    save_foods(foods)
+    refresh_results_incrementally()
+    rejected = report["rejected"]
+    summary = (f"Νέες τροφές: {report['added']}\nΕνημερωμένες τροφές: {report['updated']}\n"
+               f"Διπλότυπες εγγραφές: {report['duplicates']}\nΑπορριφθείσες εγγραφές: {len(rejected)}")
+    if rejected:
+        summary += "\n" + "\n".join(f"- #{rejection['record']}: {rejection['error']}" for rejection in rejected[:10])
+        # Η πλήρης αναφορά απορρίψεων αποθηκεύεται δίπλα στα υπόλοιπα αποτελέσματα
+        report_path = os.path.join(DOCUMENTS_DIR, "import_rejected.csv")
+        try:
+            with open(report_path, "w", newline='', encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                writer.writerow(["Εγγραφή", "Σφάλμα"])
+                for rejection in rejected:
+                    writer.writerow([rejection["record"], rejection["error"]])
+            summary += f"\n\nΗ αναφορά απορρίψεων αποθηκεύτηκε στο {report_path}."
+        except Exception as e:
+            print(f"Error writing import report: {e}")
+        messagebox.showwarning("Συγχώνευση JSON", summary)
+    else:
+        messagebox.showinfo("Επιτυχία", summary)
+
 # Συνάρτηση για εύρεση τροφής με τη μέγιστη τιμή θρεπτικού συστατικού
 def find_max_nutrient_food():
     # Έλεγχος αν η λίστα τροφών είναι κενή
     if not foods:
         messagebox.showwarning("Προσοχή", "Δεν υπάρχουν τροφές.")
         return
-    # Λίστα για αποθήκευση των τροφών με μέγιστη τιμή ανά συστατικό
-    max_foods = []
-    # Επανάληψη για κάθε θρεπτικό συστατικό
-    for nutrient in NUTRIENTS:
-        # Εύρεση μέγιστης τιμής του συστατικού μεταξύ όλων των τροφών
-        max_val = max(food['nutrients'][nutrient] for food in foods)
-        # Επιλογή τροφών με τη μέγιστη τιμή και το κόστος τους
-        max_food_entries = [(food['name'], food['cost']) for food in foods if food['nutrients'][nutrient] == max_val]
-        # Προσθήκη των τροφών στη λίστα αποτελεσμάτων
-        for name, cost in max_food_entries:
-            max_foods.append((nutrient, name, cost))
+    # Όλες οι μέγιστες τιμές υπολογίζονται με μία διέλευση του πίνακα τροφών
+    costs = current_costs()
+    analytics = catalogue_analytics(food_table.matrix, costs, food_table.category_codes)
+    max_foods = [
+        (nutrient, food_table.names[row], costs[row])
+        for nutrient in NUTRIENTS
+        for row in analytics["max_value"][nutrient]["rows"]
+    ]
     # Δημιουργία συμβολοσειράς αποτελεσμάτων για εμφάνιση
     result = "Κόστος τροφών με μέγιστη αξία ανά συστατικό:\n" + "\n".join(
         [f"- {nutrient}: {cost:.2f} € (Τροφή: {name})" for nutrient, name, cost in max_foods]
@@ -382,22 +668,12 @@ def find_min_cost_per_nutrient():
     if not foods:
         messagebox.showwarning("Προσοχή", "Δεν υπάρχουν τροφές.")
         return
-    # Λίστα για αποθήκευση των τροφών με ελάχιστο κόστος ανά συστατικό
+    analytics = catalogue_analytics(food_table.matrix, current_costs(), food_table.category_codes)
     min_cost_foods = []
-    # Επανάληψη για κάθε θρεπτικό συστατικό
     for nutrient in NUTRIENTS:
-        # Λίστα για αποθήκευση κόστους ανά μονάδα συστατικού
-        cost_per_nutrient = []
-        for food in foods:
-            nutrient_value = food['nutrients'][nutrient]
-            # Αποφυγή διαίρεσης με το μηδέν
-            if nutrient_value > 0:   
-                cost_per_unit = food['cost'] / nutrient_value
-                cost_per_nutrient.append((food['name'], cost_per_unit))
-        # Εύρεση τροφής με το ελάχιστο κόστος ανά μονάδα
-        if cost_per_nutrient:
-            cheapest = min(cost_per_nutrient, key=lambda x: x[1])
-            min_cost_foods.append((nutrient, cheapest[0], cheapest[1]))
+        cheapest = analytics["min_cost_per_unit"][nutrient]
+        if cheapest is not None:
+            min_cost_foods.append((nutrient, food_table.names[cheapest["row"]], cheapest["value"]))
         else:
             # Αν δεν υπάρχουν έγκυρες τροφές, προσθήκη προεπιλεγμένης τιμής
             min_cost_foods.append((nutrient, "Καμία τροφή", 0.0))
@@ -428,8 +704,8 @@ def calculate_optimal_diet():
     list_frame.pack(pady=10, fill="both", expand=True)
     # Αριστερό listbox για επιλογή τροφών
     listbox = tk.Listbox(list_frame, selectmode=tk.MULTIPLE, bg="#FFFFFF", fg="#000000", height=10)
-    for i, food in enumerate(foods):
-        listbox.insert(tk.END, food['name'])
+    for name in food_table.names:
+        listbox.insert(tk.END, name)
     listbox.pack(side=tk.LEFT, padx=10, fill="both", expand=True)
     # Δημιουργία πλαισίου για το δεξί listbox
     selection_frame = ttk.Frame(popup)
@@ -440,6 +716,7 @@ def calculate_optimal_diet():
     selected_foods_listbox = tk.Listbox(selection_frame, bg="#FFFFFF", fg="#000000", height=10)
     selected_foods_listbox.pack(fill="both", expand=True)
     selected_foods_list = []
+    selected_rows = []
     # Συνάρτηση για ενημέρωση του δεξιού listbox
     def update_selected_foods(event=None):
         try:
@@ -447,6 +724,7 @@ def calculate_optimal_diet():
             current_indices = listbox.curselection()
             selected_foods_list.clear()
             selected_foods_list.extend([foods[i] for i in current_indices])
+            selected_rows[:] = current_indices
             for priority, food in enumerate(selected_foods_list, 1):
                 selected_foods_listbox.insert(tk.END, f"{priority}. {food['name']}")
         except Exception as e:
@@ -465,71 +743,67 @@ def calculate_optimal_diet():
     confirm_button.pack(pady=5)
 
     # Συνάρτηση για τον υπολογισμό της ιδανικής διατροφής
-    def perform_calculation():
+    def perform_calculation(names=None, rows=None):
         if not selected_foods_list:
             messagebox.showwarning("Προσοχή", "Πρέπει να επιλέξετε τουλάχιστον μία τροφή.")
             return
+        if names is None:
+            names, rows = [food["name"] for food in selected_foods_list], list(selected_rows)
+        rows = current_rows(names, rows)
+        if rows is None:
+            messagebox.showwarning("Προσοχή", "Μία από τις επιλεγμένες τροφές διαγράφηκε κατά τον υπολογισμό.")
+            return
         # Ορισμός προτεραιοτήτων για τις επιλεγμένες τροφές
         priorities = list(range(1, len(selected_foods_list) + 1))
-        try:
-            n = len(selected_foods_list)
-            m = len(NUTRIENTS)
-            # Έλεγχος αν ο αριθμός επιλεγμένων τροφών είναι έγκυρος
-            if n < 1 or n > m:
-                messagebox.showwarning("Προσοχή", f"Επιλέξτε από 1 έως {m} τροφές.")
+        Q = q_vector(Q_VALUES)
+        C = current_costs()[rows]
+        # Οι τροφές του αποτελέσματος φέρουν την τιμή της επιλεγμένης ημερομηνίας
+        priced_foods = [dict(foods[row], cost=float(cost)) for row, cost in zip(rows, C)]
+        key = SolveCache.key("optimal", rows, Q, C)
+        A_selected = food_table.columns(rows)
+
+        def solve(task):
+            return solve_cache.lookup(key, lambda: solve_optimal_diet(A_selected, Q, C))
+
+        def solve_done(solution, error):
+            if error is not None:
+                show_solver_error(error, "Αποτυχία υπολογισμού")
                 return
-            # Δημιουργία πίνακα Q με τις απαιτήσεις του ΣΗΠ
-            Q = np.array([Q_VALUES[nutrient] for nutrient in NUTRIENTS])
-            # Δημιουργία πίνακα A με τις θρεπτικές τιμές των επιλεγμένων τροφών
-            A = np.array([[food['nutrients'][nutrient] for food in selected_foods_list] for nutrient in NUTRIENTS])
-             # Υπολογισμός ποσοτήτων με ελάχιστα τετράγωνα
-            T_new, residuals, rank, s = np.linalg.lstsq(A, Q, rcond=None)
-            T_new = np.maximum(T_new, 0)  # Αποτροπή αρνητικών ποσοτήτων
-            # Καθορισμός ποσοστών κατανομής με βάση τις προτεραιότητες 
-            priority_percentages = {1: 0.30, 2: 0.20, 3: 0.15, 4: 0.15, 5: 0.10, 6: 0.10}
-            total_quantity = np.sum(T_new)
-            distributed_quantities = np.zeros(n)
-            for i, priority in enumerate(priorities):
-                percentage = priority_percentages.get(priority, 0.10)
-                distributed_quantities[i] = total_quantity * percentage
-            # Εφαρμογή ορίων στις ποσότητες
-            T_new = distributed_quantities
-            T_new = np.maximum(T_new, 0.1)  # Ελάχιστο όριο ποσότητας
-            T_new = np.minimum(T_new, 10)   # Μέγιστο όριο ποσότητας
+            print(f"Solve cache: {solve_cache.stats}")
+            show_optimal_diet(solution, rows, priced_foods, priorities)
+
+        run_in_background(solve, solve_done, "Υπολογισμός ιδανικής διατροφής", on_stale=lambda: perform_calculation(names, rows))
+
+    def show_optimal_diet(solution, rows, priced_foods, priorities):
+        try:
+            T_new = solution["T"]
+            total_cost = solution["total_cost"]
             # Έλεγχος αν το σύστημα είναι υποκαθορισμένο
-            if rank < min(m, n):
+            if solution["underdetermined"]:
                 messagebox.showwarning("Προσοχή", "Το σύστημα είναι υποκαθορισμένο.")
-            # Υπολογισμός συνολικού κόστους
-            C = np.array([food['cost'] for food in selected_foods_list])
-            total_cost = np.dot(C, T_new)
-            # Έλεγχος για μη έγκυρο κόστος
-            if any(cost <= 0 for cost in C):
-                messagebox.showwarning("Προσοχή", "Μη έγκυρο κόστος σε κάποια τροφή.")
-                return
             # Έλεγχος για υπερβολικό κόστος
             if total_cost > 100:
                 messagebox.showwarning("Προσοχή", f"Το συνολικό κόστος ({total_cost:.2f} €) φαίνεται υπερβολικό.")
             # Δημιουργία συμβολοσειράς αποτελεσμάτων
             result = "Ιδανική ποσότητα ανά τροφή (με βάση το ΣΗΠ και τις προτεραιότητες):\n"
             for i, amount in enumerate(T_new):
-                cost = amount * selected_foods_list[i]['cost']
-                result += f"- {selected_foods_list[i]['name']} (Προτεραιότητα: {priorities[i]}): {amount:.2f} μονάδες (Κόστος: {cost:.2f} €)\n"
+                cost = amount * priced_foods[i]['cost']
+                result += f"- {priced_foods[i]['name']} (Προτεραιότητα: {priorities[i]}): {amount:.2f} μονάδες (Κόστος: {cost:.2f} €)\n"
             result += f"\nΣυνολικό κόστος: {total_cost:.2f} €"
            # Εμφάνιση αποτελεσμάτων 
             messagebox.showinfo("Αποτέλεσμα", result)
             # Ενημέρωση παγκόσμιων μεταβλητών
-            global T, last_selected_foods
+            global T, last_selected_foods, last_diet_state
             T = T_new  # Update global T
-            last_selected_foods = selected_foods_list
+            last_selected_foods = priced_foods
+            last_diet_state = {"rows": rows, "x": solution["x"]}
             # Κλήση συνάρτησης για γραφική απεικόνιση
             plot_cost_vs_total_cost()
-        except np.linalg.LinAlgError as e:
-            messagebox.showerror("Σφάλμα", f"Πρόβλημα στο λογισμικό: {e}.")
         except Exception as e:
             messagebox.showerror("Σφάλμα", f"Αποτυχία υπολογισμού: {e}")
 
 def calculate_weekly_menu():
-    global T, last_selected_foods, Q_VALUES, weekly_menu_data
+    global Q_VALUES
     # Λειτουργία 1: Έλεγχος Εισόδων
     # Ελέγχει αν η λίστα τροφίμων είναι κενή
     if not foods:
@@ -544,127 +818,302 @@ def calculate_weekly_menu():
     if all(value == 0 for value in Q_VALUES.values()):
         messagebox.showwarning("Προσοχή", "Το ΣΗΠ περιέχει μόνο μηδενικές τιμές. Ορίστε σωστές τιμές από το μενού 'Αρχείο' > 'Ορισμός ΣΗΠ'.")
         return
-    
 
-    # Λειτουργία 2: Αρχικοποίηση
-    # Καθορίζει τον αριθμό των θρεπτικών συστατικών και τις ημέρες της εβδομάδαςm = len(NUTRIENTS)
-    days = ["Δευτέρα", "Τρίτη", "Τετάρτη", "Πέμπτη", "Παρασκευή", "Σάββατο", "Κυριακή"]
-    MAX_COST_PER_DAY = 20.0    # Μέγιστο επιτρεπόμενο κόστος ανά ημέρα
-    # Μετατρέπει το Q_VALUES σε πίνακα NumPy για υπολογισμούς
-    original_Q = np.array([Q_VALUES[nutrient] for nutrient in NUTRIENTS])
-    print(f"Original ΣΗΠ for weekly menu: {original_Q}")
-    # Αρχικοποιεί λίστες και σύνολα για αποθήκευση του εβδομαδιαίου μενού
+    # Λειτουργία 2: Επιλογή μεθόδου σχεδιασμού
+    popup = tk.Toplevel(root)
+    popup.title("Εβδομαδιαίο Μενού")
+    popup.geometry("300x240")
+    popup.configure(bg="#FFFFFF")
+    try:
+        gradient = create_gradient(300, 240, "#4CAF50", "#81C784")
+        bg_label = tk.Label(popup, image=gradient)
+        bg_label.image = gradient
+        bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+    except Exception as e:
+        print(f"Error setting popup background: {e}")
+
+    ttk.Label(popup, text="Επιλέξτε μέθοδο:", font=(get_available_font(), 10, "bold"), foreground="#000000").pack(pady=10)
+    method_labels = list(WEEKLY_MENU_METHODS.keys())
+    method_var = tk.StringVar(value=method_labels[0])
+    ttk.OptionMenu(popup, method_var, method_labels[0], *method_labels).pack(pady=5)
+    # Περιορισμός στις μη κυριαρχούμενες τροφές (μέτωπο Pareto κόστους/θρεπτικών ανά κατηγορία)
+    prune_var = tk.BooleanVar(value=True)
+    ttk.Checkbutton(popup, text="Μόνο τροφές του μετώπου Pareto", variable=prune_var).pack(pady=5)
+
+    def confirm_selection():
+        method = WEEKLY_MENU_METHODS[method_var.get()]
+        prune = prune_var.get()
+        popup.destroy()
+        generate_weekly_menu(method, prune)
+
+    ttk.Button(popup, text="Υπολογισμός", command=confirm_selection).pack(pady=10)
+
+def weekly_menu_from_plan(plan, C):
+    """Turn planner output into weekly_menu_data entries: (day, (foods, T, total cost, ΣΗΠ scale))."""
     weekly_menu = []
-    used_food_indices = set()
-
-    # Λειτουργία 3: Οργάνωση Τροφίμων ανά Κατηγορία
-    # Ομαδοποιεί τις τροφές ανά κατηγορία για ευκολότερη επιλογή
-    foods_by_category = {}
-    for idx, food in enumerate(foods):
-        category = food["category"]
-        if category not in foods_by_category:
-            foods_by_category[category] = []
-        foods_by_category[category].append((food, idx))
-
-    # Λειτουργία 4: Υπολογισμός Ημερήσιου Μενού
-    for day_idx, day in enumerate(days):
-        # Προσαρμόζει τις απαιτήσεις κατηγοριών για συγκεκριμένες ημέρες (ψάρια Τετάρτη/Κυριακή)
-        daily_categories = CATEGORIES_PER_DAY.copy()
-        if day in ["Τετάρτη", "Κυριακή"]:
-            daily_categories["Ψάρια"] = 1
-            daily_categories["Κρέας"] = 0
+    for day_plan in plan:
+        selected_foods_list = [dict(foods[idx], cost=float(C[idx])) for idx in day_plan["indices"]]
+        print(f"{day_plan['day']}: Selected {[food['name'] for food in selected_foods_list]}, T: {day_plan['T']}, cost {day_plan['total_cost']:.2f} €")
+        weekly_menu.append((day_plan["day"], (selected_foods_list, day_plan["T"], day_plan["total_cost"], day_plan["q_scale"])))
+    return weekly_menu
+
+class TaskCancelled(Exception):
+    """Raised inside a background job once the user has cancelled it."""
+
+
+class BackgroundTask:
+    """A job on background_executor whose progress and result are polled from the Tk mainloop.
+
+    work(task) runs on the background thread and may call task.report(done, total),
+    which raises TaskCancelled after cancel(). With a title, a progress window with a
+    cancel button is shown while the job runs. on_done(result, error) runs on the Tk
+    thread; it is skipped for a cancelled job and for one that finished after the
+    foods or the ΣΗΠ changed, since its result no longer matches them. In that case
+    on_stale(), if given, is called instead to submit the job again against the
+    current foods and ΣΗΠ.
+    """
+
+    def __init__(self, work, on_done, title=None, on_stale=None):
+        self.on_done = on_done
+        self.on_stale = on_stale
+        self.done = 0
+        self.total = 0
+        self.version = catalogue_version
+        self.cancelled = threading.Event()
+        self.window = None
+        if title is not None:
+            self.window = tk.Toplevel(root)
+            self.window.title(title)
+            self.window.geometry("360x130")
+            self.window.resizable(False, False)
+            self.label_var = tk.StringVar(value=f"{title}...")
+            ttk.Label(self.window, textvariable=self.label_var).pack(pady=10)
+            self.progressbar = ttk.Progressbar(self.window, length=320, mode="indeterminate")
+            self.progressbar.pack(pady=5)
+            self.progressbar.start()
+            ttk.Button(self.window, text="Ακύρωση", command=self.cancel).pack(pady=5)
+            self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.future = background_executor.submit(work, self)
+        root.after(BACKGROUND_POLL_MS, self.poll)
+
+    def report(self, done, total):
+        # Καλείται από το νήμα του υπολογισμού· η γραμμή προόδου ενημερώνεται στο poll
+        if self.cancelled.is_set():
+            raise TaskCancelled()
+        self.done, self.total = done, total
+
+    def cancel(self):
+        self.cancelled.set()
+        self.future.cancel()
+        if self.window is not None:
+            self.label_var.set("Ακύρωση...")
+
+    def poll(self):
+        if not self.future.done():
+            if self.window is not None and self.total:
+                if str(self.progressbar["mode"]) != "determinate":
+                    self.progressbar.stop()
+                    self.progressbar.configure(mode="determinate", maximum=self.total)
+                self.progressbar["value"] = self.done
+                self.label_var.set(f"{self.done} / {self.total}")
+            root.after(BACKGROUND_POLL_MS, self.poll)
+            return
+        if self.window is not None:
+            self.window.destroy()
+        if self.cancelled.is_set():
+            update_status("Ο υπολογισμός ακυρώθηκε.")
+            return
+        if self.version != catalogue_version:
+            if self.on_stale is None:
+                update_status("Οι τροφές ή το ΣΗΠ άλλαξαν κατά τον υπολογισμό· το αποτέλεσμα απορρίφθηκε.")
+                return
+            update_status("Οι τροφές ή το ΣΗΠ άλλαξαν κατά τον υπολογισμό· ο υπολογισμός επαναλαμβάνεται.")
+            self.on_stale()
+            return
+        error = self.future.exception()
+        self.on_done(None if error else self.future.result(), error)
+
+def run_in_background(work, on_done, title=None, on_stale=None):
+    """Run work(task) on the background thread and pass (result, error) to on_done on the Tk thread."""
+    return BackgroundTask(work, on_done, title, on_stale)
+
+def current_rows(names, rows):
+    """Rows of the foods that were at rows under names before an edit, or None if one was deleted."""
+    found = []
+    for name, row in zip(names, rows):
+        if row < len(foods) and foods[row]["name"] == name:
+            found.append(row)
+        elif name in food_table.row_by_name:
+            found.append(food_table.row_by_name[name])
         else:
-            daily_categories["Ψάρια"] = 0
-            daily_categories["Κρέας"] = 1
-
-        # Υπολογίζει τον συνολικό αριθμό τροφίμων που χρειάζονται ανά ημέρα
-        k = sum(daily_categories.values())
-
-        # Αρχικοποιεί μεταβλητές για επιλογή τροφίμων και έλεγχο κόστους
-        selected_food_indices = set()
-        selected_foods_list = []
-        cost_within_limit = False
-        Q_scale = 1.0   # Ξεκινά με πλήρεις διατροφικές απαιτήσεις
-
-        # Λειτουργία 5: Επιλογή Τροφίμων και Βελτιστοποίηση
-        # Επαναλαμβάνεται μέχρι το κόστος να είναι εντός ορίων ή το Q_scale να πέσει πολύ
-        while Q_scale >= 0.7 and not cost_within_limit:
-            Q = original_Q * Q_scale    # Κλιμακώνει τις διατροφικές απαιτήσεις
-            selected_food_indices.clear()
-            selected_foods_list = []
-
-            # Επιλέγει τροφές για κάθε κατηγορία με βάση τις απαιτήσεις
-            for category, count in daily_categories.items():
-                if count == 0:
-                    continue
-                # Προτιμά τροφές που δεν έχουν χρησιμοποιηθεί σε άλλες ημέρες
-                available_foods = [(food, idx) for food, idx in foods_by_category[category] if idx not in used_food_indices and idx not in selected_food_indices]
-                if len(available_foods) < count:
-                    # Εναλλακτικά, επιλέγει οποιαδήποτε διαθέσιμη τροφή στην κατηγορία
-                    available_foods = [(food, idx) for food, idx in foods_by_category[category] if idx not in selected_food_indices]
-                if len(available_foods) < count:
-                    messagebox.showwarning("Προσοχή", f"Δεν υπάρχουν αρκετές τροφές στην κατηγορία '{category}' για την {day}. Χρειάζονται {count}, βρέθηκαν {len(available_foods)}.")
-                    return
+            return None
+    return found
+
+def show_solver_error(error, message):
+    if isinstance(error, InfeasibleError):
+        messagebox.showwarning("Προσοχή", str(error))
+    elif isinstance(error, np.linalg.LinAlgError):
+        messagebox.showerror("Σφάλμα", f"Πρόβλημα στο λογισμικό: {error}. Ελέγξτε τις εισαγόμενες τροφές.")
+        print(f"Linear algebra error: {error}")
+    else:
+        messagebox.showerror("Σφάλμα", f"{message}: {error}")
+        print(f"Error in background task: {error}")
 
-                # Επιλέγει τυχαία τον απαιτούμενο αριθμό τροφίμων 
-                random.shuffle(available_foods)
-                for i in range(count):
-                    if available_foods:
-                        food, idx = available_foods[i]
-                        selected_food_indices.add(idx)
-                        selected_foods_list.append(food)
-                        print(f"{day}: Selected {food['name']} (index {idx}) from category {category}")
-
-            # Ελέγχει αν επιλέχθηκαν αρκετές τροφές
-            if len(selected_foods_list) != k:
-                messagebox.showwarning("Προσοχή", f"Δεν βρέθηκε αρκετός αριθμός τροφών για την {day} για να καλύψει τις κατηγορίες.")
-                return
+def queue_refresh(changed_rows):
+    global pending_refresh_all
+    if changed_rows is None:
+        pending_refresh_all = True
+    else:
+        pending_refresh_rows.update(changed_rows)
 
-            # Λειτουργία 6: Διατροφική Βελτιστοποίηση
-            # Δημιουργεί πίνακα θρεπτικών συστατικών για τις επιλεγμένες τροφές
-            A = np.array([[food['nutrients'][nutrient] for food in selected_foods_list] for nutrient in NUTRIENTS])
-            # Υπολογίζει τις ποσότητες (T) για να ικανοποιηθούν οι κλιμακωμένες απαιτήσεις (Q)
-            T, residuals, rank, s = np.linalg.lstsq(A, Q, rcond=None)
-            T = np.maximum(T, 0)          # Εξασφαλίζει μη αρνητικές ποσότητες
-            T = np.maximum(T, 0.1)        # Εξασφαλίζει ελάχιστη ποσότητα 0.1
-            T = np.minimum(T, 20)         # Περιορίζει τη μέγιστη ποσότητα σε 20
-
-            # Ελέγχει αν τα υπολείμματα είναι υπερβολικά υψηλά (κακή διατροφική προσαρμογή)
-            if residuals.size > 0 and residuals[0] > sum(Q) * 0.5:
-                print(f"{day}: Residuals too high with Q scale {Q_scale}, trying a lower scale.")
-                Q_scale -= 0.05    # Μειώνει τις διατροφικές απαιτήσεις
-                continue
-
-            # Λειτουργία 7: Υπολογισμός και Έλεγχος Κόστους
-            # Υπολογίζει το συνολικό κόστος της ημέρας
-            C = np.array([food['cost'] for food in selected_foods_list])
-            total_cost = np.dot(C, T)
-            print(f"{day}: Costs from selected foods: {C}")
-            print(f"{day}: Calculated T: {T}")
-
-            # Ελέγχει αν τα κόστη είναι έγκυρα (θετικά)
-            if any(cost <= 0 for cost in C):
-                messagebox.showwarning("Προσοχή", f"Μη έγκυρο κόστος σε κάποια τροφή για την {day}. Ελέγξτε τα JSON αρχεία.")
-                return
+def refresh_results_incrementally(changed_rows=None):
+    """Recompute the last optimal diet and weekly menu after a food edit (changed_rows) or a ΣΗΠ change.
 
-            # Ελέγχει αν το συνολικό κόστος είναι εντός του ημερήσιου ορίου
-            if total_cost <= MAX_COST_PER_DAY:
-                cost_within_limit = True
-            else:
-                print(f"{day}: Cost {total_cost:.2f} exceeds limit {MAX_COST_PER_DAY:.2f} with Q scale {Q_scale}, trying a lower scale.")
-                Q_scale -= 0.05    # Μειώνει τις διατροφικές απαιτήσεις αν το κόστος είναι υψηλό
+    Changes made while a re-solve is running are queued and re-solved together once it finishes.
+    """
+    queue_refresh(changed_rows)
+    if refresh_jobs_running == 0:
+        start_refresh()
+
+def refresh_job_finished():
+    global refresh_jobs_running
+    refresh_jobs_running -= 1
+    if refresh_jobs_running == 0 and (pending_refresh_all or pending_refresh_rows):
+        start_refresh()
+
+def refresh_job_stale():
+    # Το αποτέλεσμα απορρίφθηκε· οι γραμμές του ξαναμπαίνουν στην ουρά μαζί με τις νεότερες αλλαγές
+    queue_refresh(refresh_running_rows)
+    refresh_job_finished()
+
+def run_refresh_job(work, on_done):
+    global refresh_jobs_running
 
-        # Λειτουργία 8: Διαχείριση Αποτυχίας Κόστους
-        if not cost_within_limit:
-            messagebox.showwarning("Προσοχή", f"Δεν ήταν δυνατόν να βρεθεί μενού για την {day} με κόστος κάτω από {MAX_COST_PER_DAY:.2f} €, ακόμα και με ΣΗΠ μειωμένο στο 70%. Προσθέστε φθηνότερες τροφές.")
+    def done(result, error):
+        try:
+            on_done(result, error)
+        finally:
+            refresh_job_finished()
+
+    refresh_jobs_running += 1
+    run_in_background(work, done, on_stale=refresh_job_stale)
+
+def start_refresh():
+    global pending_refresh_all, refresh_running_rows
+    changed_rows = None if pending_refresh_all else sorted(pending_refresh_rows)
+    pending_refresh_rows.clear()
+    pending_refresh_all = False
+    if Q_VALUES is None or not foods:
+        return
+    refresh_running_rows = changed_rows
+    Q = q_vector(Q_VALUES)
+    C = np.array(current_costs())
+    diet_state, weekly_state = last_diet_state, last_weekly_state
+    if diet_state is not None and (changed_rows is None or not set(changed_rows).isdisjoint(diet_state["rows"])):
+        rows = diet_state["rows"]
+        # Αντίγραφα των εισόδων, ώστε επεξεργασίες στο μεταξύ να μην επηρεάζουν τον υπολογισμό
+        A_selected = food_table.columns(rows)
+
+        def solve_diet(task):
+            return solve_optimal_diet(A_selected, Q, C[rows], x0=diet_state["x"])
+
+        def diet_done(solution, error):
+            global T, last_selected_foods, last_diet_state
+            if last_diet_state is not diet_state:
+                return
+            if error is not None:
+                print(f"Error re-solving optimal diet: {error}")
+                last_diet_state = None
+                return
+            T = solution["T"]
+            last_selected_foods = [dict(foods[row], cost=float(C[row])) for row in rows]
+            last_diet_state = {"rows": rows, "x": solution["x"]}
+            update_status(f"Η ιδανική διατροφή επανυπολογίστηκε ({solution['total_cost']:.2f} €).")
+            if weekly_menu_data is None:
+                refresh_open_charts()
+
+        run_refresh_job(solve_diet, diet_done)
+
+    if weekly_state is not None and (changed_rows is None or any(not set(changed_rows).isdisjoint(day_plan["indices"]) for day_plan in weekly_state["plan"])):
+        A = food_table.matrix.copy()
+        category_codes = food_table.category_codes.copy()
+
+        def replan(task):
+            return replan_weekly_menu(A, Q, C, category_codes, weekly_state["plan"], changed_rows, MAX_COST_PER_DAY,
+                                      method=weekly_state["method"], prune=weekly_state["prune"])
+
+        def replan_done(plan, error):
+            global weekly_menu_data, last_weekly_state
+            if last_weekly_state is not weekly_state:
+                return
+            if error is not None:
+                print(f"Error re-planning weekly menu: {error}")
+                last_weekly_state = None
+                return
+            last_weekly_state = dict(weekly_state, plan=plan)
+            weekly_menu_data = weekly_menu_from_plan(plan, C)
+            update_status(f"Το εβδομαδιαίο μενού επανυπολογίστηκε ({sum(day_plan['total_cost'] for day_plan in plan):.2f} €).")
+            refresh_open_charts()
+
+        run_refresh_job(replan, replan_done)
+
+def forget_deleted_row(row):
+    """Keep the stored solutions and queued re-solves pointing at the right rows after a food is deleted."""
+    global last_diet_state, last_weekly_state, refresh_running_rows
+
+    def shift(rows):
+        return [idx - 1 if idx > row else idx for idx in rows]
+
+    pending = shift(idx for idx in pending_refresh_rows if idx != row)
+    pending_refresh_rows.clear()
+    pending_refresh_rows.update(pending)
+    if refresh_running_rows is not None:
+        refresh_running_rows = shift(idx for idx in refresh_running_rows if idx != row)
+
+    if last_diet_state is not None:
+        last_diet_state = None if row in last_diet_state["rows"] else dict(last_diet_state, rows=shift(last_diet_state["rows"]))
+    if last_weekly_state is not None:
+        if any(row in day_plan["indices"] for day_plan in last_weekly_state["plan"]):
+            last_weekly_state = None
+        else:
+            plan = [dict(day_plan, indices=shift(day_plan["indices"])) for day_plan in last_weekly_state["plan"]]
+            last_weekly_state = dict(last_weekly_state, plan=plan)
+
+def forget_catalogue():
+    """Drop the stored solutions and queued re-solves after the whole catalogue is replaced; their rows no longer exist."""
+    global last_diet_state, last_weekly_state, refresh_running_rows, pending_refresh_all
+    last_diet_state = last_weekly_state = None
+    pending_refresh_rows.clear()
+    pending_refresh_all = False
+    # Οι εργασίες που τρέχουν απορρίπτονται ως παλιές και δεν ξαναβάζουν γραμμές στην ουρά
+    refresh_running_rows = []
+
+def generate_weekly_menu(method, prune=False):
+    # Λειτουργία 3: Υπολογισμός μενού από τη μηχανή επίλυσης
+    original_Q = q_vector(Q_VALUES)
+    print(f"Original ΣΗΠ for weekly menu: {original_Q}, method: {method}, Pareto pruning: {prune}")
+    C = np.array(current_costs())
+    A = food_table.matrix.copy()
+    category_codes = food_table.category_codes.copy()
+
+    def plan_week(task):
+        return plan_weekly_menu(A, original_Q, C, category_codes, MAX_COST_PER_DAY, method=method, prune=prune, cache=solve_cache, progress=task.report)
+
+    def plan_done(plan, error):
+        if error is not None:
+            show_solver_error(error, "Αποτυχία υπολογισμού μενού")
             return
+        print(f"Solve cache: {solve_cache.stats}")
+        show_weekly_menu(plan, C, method, prune)
+
+    run_in_background(plan_week, plan_done, "Υπολογισμός εβδομαδιαίου μενού", on_stale=lambda: generate_weekly_menu(method, prune))
 
-        # Αποθηκεύει το ημερήσιο μενού
-        daily_menu = (selected_foods_list, T, total_cost, Q_scale)
-        weekly_menu.append((day, daily_menu))
-        used_food_indices.update(selected_food_indices)
+def show_weekly_menu(plan, C, method, prune):
+    global T, last_selected_foods, weekly_menu_data, last_weekly_state
+    last_weekly_state = {"plan": plan, "method": method, "prune": prune}
+    weekly_menu = weekly_menu_from_plan(plan, C)
 
-    # Λειτουργία 9: Δημιουργία και Εμφάνιση Αποτελεσμάτων
+    # Λειτουργία 4: Δημιουργία και Εμφάνιση Αποτελεσμάτων
     # Δημιουργεί συμβολοσειρά για το εβδομαδιαίο μενού
     result = "Εβδομαδιαίο Μενού (Βάσει ΣΗΠ):\n\n"
     weekly_total_cost = 0
@@ -680,7 +1129,7 @@ def calculate_weekly_menu():
     # Εμφανίζει το μενού σε πλαίσιο μηνύματος
     messagebox.showinfo("Εβδομαδιαίο Μενού", result)
 
-    # Λειτουργία 10: Αποθήκευση Αποτελεσμάτων και Οπτικοποίηση
+    # Λειτουργία 5: Αποθήκευση Αποτελεσμάτων και Οπτικοποίηση
     # Αποθηκεύει τις τελευταίες επιλεγμένες τροφές και τα δεδομένα του μενού
     last_selected_foods = selected_foods_list
     weekly_menu_data = weekly_menu
@@ -702,10 +1151,12 @@ def run_sensitivity_analysis():
     
     popup = tk.Toplevel(root)
     popup.title("Επιλογή Τροφών για Ανάλυση Ευαισθησίας")
-    popup.geometry("300x400")
+    # Το φόντο έχει το μέγεθος του παραθύρου, ώστε να το καλύπτει ολόκληρο
+    width, height = 300, 580
+    popup.geometry(f"{width}x{height}")
     popup.configure(bg="#FFFFFF")
     try:
-        gradient = create_gradient(300, 400, "#4CAF50", "#81C784")
+        gradient = create_gradient(width, height, "#4CAF50", "#81C784")
         bg_label = tk.Label(popup, image=gradient)
         bg_label.image = gradient
         bg_label.place(x=0, y=0, relwidth=1, relheight=1)
@@ -714,8 +1165,8 @@ def run_sensitivity_analysis():
     
     ttk.Label(popup, text="Επιλέξτε τροφές για σύγκριση:", font=(get_available_font(), 10, "bold"), foreground="#000000").pack(pady=10)
     listbox = tk.Listbox(popup, selectmode=tk.MULTIPLE, bg="#3A3A3A", fg="#FFFFFF", height=10)
-    for food in foods:
-        listbox.insert(tk.END, food['name'])
+    for name in food_table.names:
+        listbox.insert(tk.END, name)
     listbox.pack(pady=10)
 
     # Add distribution selection
@@ -723,113 +1174,129 @@ def run_sensitivity_analysis():
     distribution_var = tk.StringVar(value="Ομοιόμορφη")
     distribution_menu = ttk.OptionMenu(popup, distribution_var, "Ομοιόμορφη", "Ομοιόμορφη", "Κανονική")
     distribution_menu.pack(pady=5)
+
+    # Add sample count and seed selection
+    ttk.Label(popup, text="Αριθμός δειγμάτων:", font=(get_available_font(), 10, "bold"), foreground="#000000").pack(pady=5)
+    samples_entry = ttk.Entry(popup, width=10)
+    samples_entry.insert(0, "1000")
+    samples_entry.pack(pady=2)
+    ttk.Label(popup, text="Seed (προαιρετικό):", font=(get_available_font(), 10, "bold"), foreground="#000000").pack(pady=5)
+    seed_entry = ttk.Entry(popup, width=10)
+    seed_entry.pack(pady=2)
+    ttk.Label(popup, text="Πλήθος workers:", font=(get_available_font(), 10, "bold"), foreground="#000000").pack(pady=5)
+    workers_entry = ttk.Entry(popup, width=10)
+    workers_entry.insert(0, str(os.cpu_count() or 1))
+    workers_entry.pack(pady=2)
     
     def confirm_selection():
         selected_indices = listbox.curselection()
         if not selected_indices:
             messagebox.showwarning("Προσοχή", "Πρέπει να επιλέξετε τουλάχιστον μία τροφή.")
             return
-        selected_foods = [foods[i] for i in selected_indices]
+        try:
+            n_samples = int(samples_entry.get().strip())
+            if n_samples < 1:
+                raise ValueError("Ο αριθμός δειγμάτων πρέπει να είναι θετικός.")
+            seed_text = seed_entry.get().strip()
+            seed = int(seed_text) if seed_text else None
+            workers = int(workers_entry.get().strip())
+            if workers < 1:
+                raise ValueError("Το πλήθος workers πρέπει να είναι θετικό.")
+        except ValueError as e:
+            messagebox.showerror("Σφάλμα", f"Μη έγκυρα δεδομένα: {e}")
+            return
+        names = [foods[i]["name"] for i in selected_indices]
         distribution = distribution_var.get()
         popup.destroy()
-        
-        try:
-            print(f"Starting sensitivity analysis for {len(selected_foods)} foods: {[food['name'] for food in selected_foods]}")
-            m = len(NUTRIENTS)
-            n = len(foods)
-            A = np.array([[food['nutrients'][nutrient] for food in foods] for nutrient in NUTRIENTS])
-            
-            Q = np.array([Q_VALUES[nutrient] for nutrient in NUTRIENTS])
-            print(f"Using global ΣΗΠ for sensitivity analysis: {Q}")
-            
-            T_base, residuals, rank, s = np.linalg.lstsq(A, Q, rcond=None)
-            if rank < m:
-                messagebox.showwarning("Προσοχή", "Το σύστημα είναι υποκαθορισμένο ή προβληματικό. Δοκιμάστε διαφορετικές τροφές.")
+        start_analysis(names, list(selected_indices), distribution, n_samples, seed, workers)
+
+    def start_analysis(names, rows, distribution, n_samples, seed, workers):
+        rows = current_rows(names, rows)
+        if rows is None:
+            messagebox.showwarning("Προσοχή", "Μία από τις επιλεγμένες τροφές διαγράφηκε κατά τον υπολογισμό.")
+            return
+        print(f"Starting sensitivity analysis for {len(names)} foods: {names}")
+        Q = q_vector(Q_VALUES)
+        print(f"Using global ΣΗΠ for sensitivity analysis: {Q}")
+        A = food_table.matrix.copy()
+        C = np.array(current_costs())
+
+        def analyse(task):
+            return sensitivity_analysis(
+                A, Q, C, rows,
+                distribution="uniform" if distribution == "Ομοιόμορφη" else "normal",
+                n_samples=n_samples, seed=seed, workers=workers, progress=task.report
+            )
+
+        def analysis_done(analysis, error):
+            global sensitivity_chart
+            if error is not None:
+                show_solver_error(error, "Αποτυχία ανάλυσης")
                 return
-            T_base = np.maximum(T_base, 0)
-            base_cost = sum(T_base[i] * foods[i]['cost'] for i in range(n))
-            print(f"Base T: {T_base}, Base Cost: {base_cost}")
-            
-            food_sensitivities = {}
-            for selected_food in selected_foods:
-                sensitivities = []
-                idx = foods.index(selected_food)
-                for _ in range(10):
-                    perturbed_A = A.copy()
-                    # Use selected distribution for perturbation
-                    if distribution == "Ομοιόμορφη":
-                        perturbation = np.random.uniform(0.95, 1.05, size=(m, 1))  # ±5% uniform
-                    else:  # Κανονική
-                        perturbation = np.random.normal(1.0, 0.015, size=(m, 1))  # Mean 1.0, std 0.015 (~±5% in 2 std)
-                        perturbation = np.clip(perturbation, 0.95, 1.05)  # Ensure within reasonable bounds
-                    perturbed_A[:, idx] *= perturbation.flatten()
-                    T_new, residuals_new, rank_new, s_new = np.linalg.lstsq(perturbed_A, Q, rcond=None)
-                    T_new = np.maximum(T_new, 0)
-                    delta_quantity = abs(T_new[idx] - T_base[idx])
-                    new_cost = sum(T_new[i] * foods[i]['cost'] for i in range(n))
-                    delta_cost = abs(new_cost - base_cost)
-                    sensitivities.append((delta_quantity, delta_cost))
-                    print(f"{selected_food['name']} Iteration: Delta Quantity={delta_quantity:.4f}, Delta Cost={delta_cost:.4f}")
-                
-                avg_delta_quantity = sum(d[0] for d in sensitivities) / len(sensitivities)
-                avg_delta_cost = sum(d[1] for d in sensitivities) / len(sensitivities)
-                
-                if T_base[idx] > 0:
-                    avg_delta_quantity = (avg_delta_quantity / T_base[idx]) * 100
-                if base_cost > 0:
-                    avg_delta_cost = (avg_delta_cost / base_cost) * 100
-                
-                food_sensitivities[selected_food['name']] = (avg_delta_quantity, avg_delta_cost)
-            
-            result = f"Αποτελέσματα Ανάλυσης Ευαισθησίας (Κατανομή: {distribution}):\n\n"
-            for food_name, (avg_delta_quantity, avg_delta_cost) in food_sensitivities.items():
-                result += f"Τροφή: {food_name}\n"
-                result += f"  Επίδραση στην ποσότητα: {avg_delta_quantity:.2f}% (ποσοστιαία αλλαγή)\n"
-                result += f"  Επίδραση στο κόστος: {avg_delta_cost:.2f}% (ποσοστιαία αλλαγή)\n\n"
-            messagebox.showinfo("Ανάλυση Ευαισθησίας", result)
-            
-            plot_window = tk.Toplevel(root)
-            plot_window.title("Σύγκριση Ανάλυσης Ευαισθησίας")
-            plot_window.geometry(f"{max(800, len(selected_foods) * 200)}x500")
-            fig, ax = plt.subplots(figsize=(max(10, len(selected_foods) * 2), 5))
-            plt.style.use('dark_background')
-            
-            food_names = list(food_sensitivities.keys())
-            delta_quantities = [food_sensitivities[name][0] for name in food_names]
-            delta_costs = [food_sensitivities[name][1] for name in food_names]
-            
-            bar_width = 0.35
-            index = np.arange(len(food_names))
-            
-            ax.bar(index, delta_quantities, bar_width, label="Επίδραση στην Ποσότητα (%)", color="#4CAF50")
-            ax.bar(index + bar_width, delta_costs, bar_width, label="Επίδραση στο Κόστος (%)", color="#FF5722")
-            
-            ax.set_xlabel("Τροφές", color="#FFFFFF")
-            ax.set_ylabel("Αλλαγή (%)", color="#FFFFFF")
-            ax.set_title("Σύγκριση Ευαισθησίας Τροφών", color="#FFFFFF")
-            ax.set_xticks(index + bar_width / 2)
-            ax.set_xticklabels(food_names, rotation=45, ha='right')
-            ax.legend()
-            ax.tick_params(colors="#FFFFFF")
+            try:
+                print(f"Base T: {analysis['T_base']}, Base Cost: {analysis['base_cost']}")
+                food_sensitivities = {foods[idx]['name']: deltas for idx, deltas in analysis["sensitivities"].items()}
             
-            canvas = FigureCanvasTkAgg(fig, master=plot_window)
-            canvas.draw()
-            canvas.get_tk_widget().pack()
-            # Save the sensitivity analysis chart to DOCUMENTS_DIR
-            sensitivity_path = os.path.join(DOCUMENTS_DIR, "sensitivity_analysis_comparison.png")
-            plt.savefig(sensitivity_path)
-            plt.close(fig)
-        except np.linalg.LinAlgError as e:
-            messagebox.showerror("Σφάλμα", f"Πρόβλημα στο λογισμικό: {e}. Ελέγξτε τις εισαγόμενες τροφές.")
-            print(f"Linear algebra error: {e}")
-        except Exception as e:
-            messagebox.showerror("Σφάλμα", f"Αποτυχία ανάλυσης: {e}")
-            print(f"General error in sensitivity: {e}")
+                result = f"Αποτελέσματα Ανάλυσης Ευαισθησίας (Κατανομή: {distribution}, Δείγματα: {n_samples}):\n\n"
+                for food_name, (avg_delta_quantity, avg_delta_cost) in food_sensitivities.items():
+                    result += f"Τροφή: {food_name}\n"
+                    result += f"  Επίδραση στην ποσότητα: {avg_delta_quantity:.2f}% (ποσοστιαία αλλαγή)\n"
+                    result += f"  Επίδραση στο κόστος: {avg_delta_cost:.2f}% (ποσοστιαία αλλαγή)\n\n"
+                messagebox.showinfo("Ανάλυση Ευαισθησίας", result)
+                import_plotting()
+                if sensitivity_chart is None or not sensitivity_chart.is_open:
+                    sensitivity_chart = diet_charts.SensitivityChart(root)
+                food_names = list(food_sensitivities.keys())
+                sensitivity_chart.update(food_names, [food_sensitivities[name][0] for name in food_names], [food_sensitivities[name][1] for name in food_names])
+                sensitivity_chart.show()
+                # Save the sensitivity analysis chart to DOCUMENTS_DIR
+                sensitivity_chart.save(os.path.join(DOCUMENTS_DIR, "sensitivity_analysis_comparison.png"))
+            except Exception as e:
+                messagebox.showerror("Σφάλμα", f"Αποτυχία ανάλυσης: {e}")
+                print(f"General error in sensitivity: {e}")
+
+        run_in_background(analyse, analysis_done, "Ανάλυση ευαισθησίας",
+                          on_stale=lambda: start_analysis(names, rows, distribution, n_samples, seed, workers))
 
     ttk.Button(popup, text="Επιβεβαίωση Επιλογής", command=confirm_selection).pack(pady=10)
 
+def chart_costs():
+    """Cost per category and the category x day cost matrix of the weekly menu, or of the optimal diet on every day."""
+    if weekly_menu_data:
+        cost_matrix = diet_charts.category_day_costs(weekly_menu_data)
+        return cost_matrix.sum(axis=1), cost_matrix
+    category_costs = diet_charts.category_costs(last_selected_foods, T)
+    return category_costs, np.repeat(category_costs[:, None], len(DAYS), axis=1)
+
+def update_cost_charts():
+    global cost_bar_chart, cost_heatmap
+    category_costs, cost_matrix = chart_costs()
+    # Check for invalid values in the chart data
+    if not np.all(np.isfinite(cost_matrix)):
+        print("Invalid values in cost_matrix:", cost_matrix)
+        messagebox.showerror("Σφάλμα", "Τα δεδομένα για το διάγραμμα περιέχουν μη έγκυρες τιμές (NaN ή inf).")
+        return False
+    print(f"Category costs: {category_costs}, total cost: {category_costs.sum()}")
+    if cost_bar_chart is None or not cost_bar_chart.is_open:
+        cost_bar_chart = diet_charts.CostBarChart(root)
+    if cost_heatmap is None or not cost_heatmap.is_open:
+        cost_heatmap = diet_charts.CostHeatmap(root)
+    cost_bar_chart.update(category_costs)
+    cost_heatmap.update(cost_matrix)
+    return True
+
+def refresh_open_charts():
+    """Update the cost charts in place after a background re-solve, if they are open."""
+    if diet_charts is None or not any(chart is not None and chart.is_open for chart in (cost_bar_chart, cost_heatmap)):
+        return
+    if T is None and weekly_menu_data is None:
+        return
+    try:
+        update_cost_charts()
+    except Exception as e:
+        print(f"Error refreshing charts: {e}")
+
 def plot_cost_vs_total_cost():
-    global T, last_selected_foods, weekly_menu_data
     print("Attempting to plot cost vs total cost")
     if not foods or (T is None and weekly_menu_data is None):
         print("No data available for plotting: T or weekly_menu_data is None")
@@ -837,124 +1304,15 @@ def plot_cost_vs_total_cost():
         return
 
     try:
-        if weekly_menu_data:
-            print("Plotting in weekly menu mode")
-            # Weekly menu mode: Aggregate costs by category across all days
-            category_costs = {category: 0 for category in CATEGORIES_PER_DAY.keys()}
-            for day, (selected_foods_list, T, total_cost, Q_scale) in weekly_menu_data:
-                for i, food in enumerate(selected_foods_list):
-                    category = food['category']
-                    cost = T[i] * food['cost']
-                    category_costs[category] += cost
-
-            labels = list(category_costs.keys())
-            individual_costs = [category_costs[category] for category in labels]
-            total_cost = sum(individual_costs)
-            n = len(labels)
-        else:
-            print("Plotting in optimal diet mode")
-            # Optimal diet mode: Aggregate by category
-            category_costs = {category: 0 for category in CATEGORIES_PER_DAY.keys()}
-            for i, food in enumerate(last_selected_foods):
-                category = food['category']
-                cost = T[i] * food['cost']
-                category_costs[category] += cost
-
-            labels = list(category_costs.keys())
-            individual_costs = [category_costs[category] for category in labels]
-            total_cost = sum(individual_costs)
-            n = len(labels)
-
-        # Check for invalid values in individual_costs
-        if any(np.isnan(cost) or np.isinf(cost) for cost in individual_costs):
-            print("Invalid values in individual_costs:", individual_costs)
-            messagebox.showerror("Σφάλμα", "Τα δεδομένα για το διάγραμμα περιέχουν μη έγκυρες τιμές (NaN ή inf).")
+        import_plotting()
+        print("Plotting in weekly menu mode" if weekly_menu_data else "Plotting in optimal diet mode")
+        if not update_cost_charts():
             return
-
-        print(f"Labels: {labels}")
-        print(f"Individual Costs: {individual_costs}")
-        print(f"Total Cost: {total_cost}")
-
-        # Bar chart (grouped by category)
-        plot_window_bar = tk.Toplevel(root)
-        plot_window_bar.title("Κόστος vs Συνολικό Κόστος ανά Κατηγορία")
-        plot_window_bar.geometry(f"{max(800, n * 50)}x500")
-        fig, ax = plt.subplots(figsize=(max(10, n * 0.5), 5))
-        plt.style.use('dark_background')
-        index = np.arange(n)
-        ax.bar(index, individual_costs, color="#4CAF50", label="Κόστος Κατηγορίας")
-        ax.axhline(y=total_cost, color="#FF5722", linestyle="--", label=f"Συνολικό Κόστος: {total_cost:.2f} €")
-        ax.set_xlabel("Κατηγορία", color="#FFFFFF")
-        ax.set_ylabel("Κόστος (€)", color="#FFFFFF")
-        ax.set_title("Κόστος vs Συνολικό Κόστος", color="#FFFFFF")
-        ax.set_xticks(index)
-        ax.set_xticklabels(labels, rotation=45, ha='right')
-        ax.tick_params(axis='x', labelsize=8)
-        ax.set_ylim(0)
-        ax.legend()
-        canvas = FigureCanvasTkAgg(fig, master=plot_window_bar)
-        canvas.draw()
-        canvas.get_tk_widget().pack()
-        # Save the bar chart to DOCUMENTS_DIR
-        bar_chart_path = os.path.join(DOCUMENTS_DIR, "cost_vs_total_cost.png")
-        plt.savefig(bar_chart_path)
-
-        # Heatmap for cost distribution
-        plot_window_heatmap = tk.Toplevel(root)
-        plot_window_heatmap.title("Κατανομή Κόστους Διατροφής (Heatmap)")
-        plot_window_heatmap.geometry("800x800")
-        fig_heatmap, ax_heatmap = plt.subplots(figsize=(8, 8))
-        plt.style.use('dark_background')
-
-        # Prepare data for heatmap
-        days = ["Δευτέρα", "Τρίτη", "Τετάρτη", "Πέμπτη", "Παρασκευή", "Σάββατο", "Κυριακή"]
-        categories = list(CATEGORIES_PER_DAY.keys())
-        cost_matrix = np.zeros((len(categories), len(days)))
-
-        if weekly_menu_data:
-            print("Preparing heatmap data for weekly menu")
-            for day_idx, (day, (selected_foods_list, T, total_cost, Q_scale)) in enumerate(weekly_menu_data):
-                for i, food in enumerate(selected_foods_list):
-                    category = food['category']
-                    cost = T[i] * food['cost']
-                    category_idx = categories.index(category)
-                    cost_matrix[category_idx, day_idx] += cost
-        else:
-            print("Preparing heatmap data for optimal diet")
-            day_costs = {category: 0 for category in CATEGORIES_PER_DAY.keys()}
-            for i, food in enumerate(last_selected_foods):
-                category = food['category']
-                cost = T[i] * food['cost']
-                day_costs[category] += cost
-            for category_idx, category in enumerate(categories):
-                cost_matrix[category_idx, :] = day_costs[category]
-
-        # Check for invalid values in cost_matrix
-        if np.any(np.isnan(cost_matrix)) or np.any(np.isinf(cost_matrix)):
-            print("Invalid values in cost_matrix:", cost_matrix)
-            messagebox.showerror("Σφάλμα", "Τα δεδομένα για το heatmap περιέχουν μη έγκυρες τιμές (NaN ή inf).")
-            plt.close(fig_heatmap)
-            return
-
-        print(f"Cost Matrix for Heatmap:\n{cost_matrix}")
-
-        # Create heatmap
-        sns.heatmap(cost_matrix, annot=True, fmt=".2f", cmap="YlOrRd", xticklabels=days, yticklabels=categories, ax=ax_heatmap, cbar_kws={'label': 'Κόστος (€)'})
-        ax_heatmap.set_xlabel("Ημέρα", color="#FFFFFF")
-        ax_heatmap.set_ylabel("Κατηγορία", color="#FFFFFF")
-        ax_heatmap.set_title("Κατανομή Κόστους Διατροφής (Heatmap)", color="#FFFFFF")
-        ax_heatmap.tick_params(colors="#FFFFFF")
-        plt.xticks(rotation=45)
-        plt.yticks(rotation=0)
-        plt.tight_layout()
-        canvas_heatmap = FigureCanvasTkAgg(fig_heatmap, master=plot_window_heatmap)
-        canvas_heatmap.draw()
-        canvas_heatmap.get_tk_widget().pack()
-        # Save the heatmap to DOCUMENTS_DIR
-        heatmap_path = os.path.join(DOCUMENTS_DIR, "cost_distribution_heatmap.png")
-        plt.savefig(heatmap_path)
-        plt.close(fig)
-        plt.close(fig_heatmap)
+        cost_bar_chart.show()
+        cost_heatmap.show()
+        # Save the charts to DOCUMENTS_DIR
+        cost_bar_chart.save(os.path.join(DOCUMENTS_DIR, "cost_vs_total_cost.png"))
+        cost_heatmap.save(os.path.join(DOCUMENTS_DIR, "cost_distribution_heatmap.png"))
         print("Plots generated successfully")
         # Inform the user where the charts are saved
         messagebox.showinfo("Διαγράμματα", f"Τα διαγράμματα αποθηκεύτηκαν στον κατάλογο:\n{DOCUMENTS_DIR}")
@@ -981,16 +1339,52 @@ def export_diet_results():
     except Exception as e:
         messagebox.showerror("Σφάλμα", f"Αποτυχία εξαγωγής: {e}")
 
+def food_row_values(food):
+    nutrient_values = [food['nutrients'][nutrient] for nutrient in NUTRIENTS]
+    return [food['name'], food['category']] + nutrient_values + [f"{food['cost']:.2f} €"]
+
+def load_food_list_page():
+    # Οι γραμμές έχουν iid τον δείκτη της τροφής, ώστε edit/delete να βρίσκουν την τροφή
+    global food_list_loaded
+    end = min(food_list_loaded + FOOD_LIST_PAGE, len(foods))
+    for i in range(food_list_loaded, end):
+        tree.insert("", "end", iid=i, values=food_row_values(foods[i]), tags=("evenrow" if i % 2 == 0 else "oddrow",))
+    food_list_loaded = end
+
+def on_food_list_scroll(first, last):
+    food_list_scrollbar.set(first, last)
+    # Κοντά στο τέλος των φορτωμένων γραμμών φορτώνεται η επόμενη σελίδα
+    if float(last) > 0.9 and food_list_loaded < len(foods):
+        load_food_list_page()
+
 def refresh_food_list():
+    global food_list_loaded
     print("Refreshing food list")
     tree.delete(*tree.get_children())
-    for i, food in enumerate(foods):
-        nutrient_values = [food['nutrients'][nutrient] for nutrient in NUTRIENTS]
-        tree.insert("", "end", iid=i, values=([food['name'], food['category']] + nutrient_values + [f"{food['cost']:.2f} €"]))
-        if i % 2 == 0:
-            tree.item(i, tags=("evenrow",))
-        else:
-            tree.item(i, tags=("oddrow",))
+    food_list_loaded = 0
+    load_food_list_page()
+
+def update_food_row(index):
+    if index < food_list_loaded:
+        tree.item(index, values=food_row_values(foods[index]))
+
+def append_food_row():
+    # Η νέα τροφή εμφανίζεται μόνο αν έχει ήδη φορτωθεί όλη η λίστα, αλλιώς έρχεται με τη σελίδα της
+    global food_list_loaded
+    index = len(foods) - 1
+    if food_list_loaded == index:
+        tree.insert("", "end", iid=index, values=food_row_values(foods[index]), tags=("evenrow" if index % 2 == 0 else "oddrow",))
+        food_list_loaded += 1
+
+def remove_food_row(index):
+    # Οι επόμενες φορτωμένες γραμμές μετακινούνται κατά μία θέση και σβήνεται η τελευταία
+    global food_list_loaded
+    if index >= food_list_loaded:
+        return
+    for i in range(index, min(food_list_loaded, len(foods))):
+        tree.item(i, values=food_row_values(foods[i]))
+    food_list_loaded -= 1
+    tree.delete(food_list_loaded)
 
 def update_status(message):
     status_var.set(message)
@@ -1074,12 +1468,19 @@ def open_food_editor(index=None):
             if cost <= 0:
                 raise ValueError("Το κόστος πρέπει να είναι θετικό.")
             food_data = {"name": name, "nutrients": nutrients, "cost": cost, "category": category}
+            # Κάθε νέα τιμή καταγράφεται στο ιστορικό με τη σημερινή ημερομηνία
+            if not is_edit or cost != food["cost"]:
+                price_history.record(name, datetime.date.today(), cost)
+                save_price_history()
             if is_edit:
                 foods[index] = food_data
+                record_food_change("edit", index, food_data)
+                refresh_results_incrementally([index])
+                update_food_row(index)
             else:
                 foods.append(food_data)
-            save_foods(foods)
-            refresh_food_list()
+                record_food_change("add", food=food_data)
+                append_food_row()
             popup.destroy()
         except Exception as e:
             messagebox.showerror("Σφάλμα", f"Μη έγκυρα δεδομένα: {e}")
@@ -1092,8 +1493,9 @@ def delete_food():
         return
     index = int(selected[0])
     del foods[index]
-    save_foods(foods)
-    refresh_food_list()
+    record_food_change("delete", index)
+    forget_deleted_row(index)
+    remove_food_row(index)
     update_status("Τροφή διαγράφηκε.")
 
 def setup_main_window():
@@ -1107,6 +1509,7 @@ def setup_main_window():
         filemenu = tk.Menu(menubar, tearoff=0)
         filemenu.add_command(label="Φόρτωση JSON", command=load_custom_json)
         filemenu.add_command(label="Ορισμός ΣΗΠ", command=set_q_values)
+        filemenu.add_command(label="Ιστορικό Τιμών", command=set_price_date)
         filemenu.add_command(label="Εξαγωγή Αποτελεσμάτων", command=export_diet_results)
         filemenu.add_command(label="Έξοδος", command=confirm_exit)
         menubar.add_cascade(label="Αρχείο", menu=filemenu)
@@ -1123,6 +1526,7 @@ def setup_main_window():
         try:
             logo_path = resource_path("header_logo.png")
             if os.path.exists(logo_path):
+                import_pil()
                 img = Image.open(logo_path)
                 img = img.resize((300, 100), Image.LANCZOS)
                 header_logo = ImageTk.PhotoImage(img)
@@ -1171,6 +1575,10 @@ def setup_main_window():
         tree.column("Ασβέστιο", width=100, minwidth=50)
         tree.column("Σίδηρος", width=100, minwidth=50)
         tree.column("Κόστος", width=100, minwidth=50)
+        global food_list_scrollbar
+        food_list_scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        food_list_scrollbar.pack(side="right", fill="y", pady=10)
+        tree.configure(yscrollcommand=on_food_list_scroll)
         tree.pack(fill="both", expand=True, pady=10)
 
         tree.bind("<Double-1>", lambda e: edit_food())
@@ -1198,7 +1606,7 @@ def setup_main_window():
         for idx, (icon_path, cmd) in enumerate(buttons):
             row = idx // 5
             col = idx % 5
-            btn = CustomButton(btn_frame, image_path=icon_path, command=cmd)
+            btn = custom_button(btn_frame, image_path=icon_path, command=cmd)
             btn.grid(row=row, column=col, padx=15, pady=15, sticky="nsew")
 
         global status_var
@@ -1213,56 +1621,69 @@ def setup_main_window():
         messagebox.showerror("Σφάλμα", f"Σφάλμα κατά την εγκατάσταση: {e}\nΗ εφαρμογή θα συνεχίσει να λειτουργεί.")
         status_var.set("Σφάλμα κατά την εγκατάσταση - Επικοινωνήστε με τον διαχειριστή")
 
-def test_tkinter():
-    print("Testing Tkinter functionality")
-    try:
-        test_root = tk.Tk()
-        test_root.title("Tkinter Test")
-        test_root.geometry("200x100")
-        tk.Label(test_root, text="Tkinter is working!").pack(pady=20)
-        test_root.update()
-        test_root.after(1000, test_root.destroy)
-        test_root.mainloop()
-        print("Tkinter test completed successfully")
-    except Exception as e:
-        print(f"Error in Tkinter test: {e}")
-        raise
-
 def confirm_exit():
     if messagebox.askyesno("Έξοδος", "Είστε σίγουροι ότι θέλετε να κλείσετε την εφαρμογή;"):
         root.quit()
 
-def main():
-    global root, tree, foods, last_selected_foods, Q_VALUES
-    print("Starting main function")
-
-    # Show splash screen before starting the main application
-    show_splash_screen()
+def load_startup_data():
+    """Load the catalogue and the price history; runs on the background thread behind the splash screen."""
+    start = time.perf_counter()
+    load_foods()
+    load_price_history()
+    return time.perf_counter() - start
 
-    try:
-        test_tkinter()
-    except Exception as e:
-        print(f"Error in Tkinter test: {e}")
-        messagebox.showerror("Σφάλμα", f"Αποτυχία δοκιμής Tkinter: {e}\nΗ εφαρμογή θα προσπαθήσει να συνεχίσει.")
-        status_var.set("Πρόβλημα με Tkinter - Ελέγξτε την εγκατάσταση")
+def main():
+    global root, tree, foods, last_selected_foods, Q_VALUES, startup_warnings, food_backend
+    print(f"Starting main function ({time.perf_counter() - START_TIME:.2f} s after start)")
+    import_tkinter()
+    for directory in (APPDATA_DIR, DOCUMENTS_DIR, ICON_DIR):
+        os.makedirs(directory, exist_ok=True)
+    food_backend = open_food_backend()
 
     root = tk.Tk()
     root.withdraw()
     print("Root window created and withdrawn")
 
-    foods = load_foods()
+    # Ο κατάλογος φορτώνεται όσο εμφανίζεται η οθόνη εκκίνησης
+    startup_warnings = []
+    loading = background_executor.submit(load_startup_data)
+    splash_shown = time.perf_counter()
+    splash = show_splash_screen()
+
     Q_VALUES = load_q_values()
     print(f"Loaded Q_VALUES at startup: {Q_VALUES}")
 
-    try:
-        setup_main_window()
-    except Exception as e:
-        print(f"Error setting up main window: {e}")
-        messagebox.showerror("Σφάλμα", f"Αποτυχία εγκατάστασης παραθύρου: {e}\nΗ εφαρμογή θα συνεχίσει με περιορισμένη λειτουργικότητα.")
-        status_var.set("Πρόβλημα με το παράθυρο - Επικοινωνήστε με τον διαχειριστή")
+    def show_main_window():
+        global startup_warnings
+        if not loading.done():
+            root.after(BACKGROUND_POLL_MS, show_main_window)
+            return
+        remaining_ms = SPLASH_MIN_MS - (time.perf_counter() - splash_shown) * 1000
+        if remaining_ms > 0:
+            root.after(int(remaining_ms), show_main_window)
+            return
+        warnings, startup_warnings = startup_warnings, None
+        try:
+            print(f"Data loaded in {loading.result():.2f} s")
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            warnings.append(f"Σφάλμα φόρτωσης δεδομένων: {e}")
+        splash.destroy()
+
+        try:
+            setup_main_window()
+        except Exception as e:
+            print(f"Error setting up main window: {e}")
+            messagebox.showerror("Σφάλμα", f"Αποτυχία εγκατάστασης παραθύρου: {e}\nΗ εφαρμογή θα συνεχίσει με περιορισμένη λειτουργικότητα.")
+            status_var.set("Πρόβλημα με το παράθυρο - Επικοινωνήστε με τον διαχειριστή")
+
+        root.deiconify()
+        root.update_idletasks()
+        print(f"Main window shown {time.perf_counter() - START_TIME:.2f} s after start")
+        for message in warnings:
+            messagebox.showwarning("Προσοχή", message)
 
-    root.deiconify()
-    print("Main window deiconified")
+    show_main_window()
 
     try:
         print("Starting mainloop")
@@ -1274,4 +1695,5 @@ def main():
         status_var.set("Απροσδόκητο σφάλμα - Επικοινωνήστε με τον διαχειριστή")
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Required for process pools in the PyInstaller build
     main()
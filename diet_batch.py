@@ -0,0 +1,180 @@
+"""Batch weekly-menu generation for many households.
+
+Usage:
+    python diet_batch.py profiles.jsonl --output menus.jsonl --workers 8
+
+Each profile holds an ``id``, the ΣΗΠ values (either under ``"q"`` or as one
+field per nutrient, which is also the CSV layout) and an optional
+``max_cost_per_day``. Menus are computed with diet_engine.plan_weekly_menu
+across a process pool and streamed to JSONL or CSV as they complete.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from diet_engine import (
+    NUTRIENTS, MAX_COST_PER_DAY, PLANNER_METHODS,
+    q_vector, plan_weekly_menu
+)
+from food_store import SqliteFoodStore, load_food_table
+
+DEFAULT_FOOD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "foods_expanded.json")
+CSV_FIELDS = ["id", "status", "day", "food", "category", "quantity", "cost", "q_scale", "error"]
+REPORT_EVERY = 100   # Αναφορά ρυθμού κάθε τόσα μενού
+
+# Per-process catalogue, set once by the pool initializer
+_worker_state = {}
+
+def read_profiles(path):
+    """Yield household profiles one at a time from a .jsonl, .json or .csv file.
+
+    A JSONL line that is not valid JSON is yielded as a ValueError naming the
+    line, which plan_household turns into an error row like any bad profile.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if extension == ".csv":
+            for row in csv.DictReader(f):
+                yield row
+        elif extension == ".json":
+            yield from json.load(f)
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield ValueError(f"Γραμμή {line_number}: μη έγκυρο JSON ({e.msg}).")
+
+def parse_profile(profile, position):
+    q_values = profile.get("q", profile)
+    missing = [nutrient for nutrient in NUTRIENTS if nutrient not in q_values]
+    if missing:
+        raise ValueError(f"Το προφίλ δεν έχει τιμές ΣΗΠ για: {missing}")
+    q_values = {nutrient: float(q_values[nutrient]) for nutrient in NUTRIENTS}
+    if any(value < 0 for value in q_values.values()) or all(value == 0 for value in q_values.values()):
+        raise ValueError("Οι τιμές ΣΗΠ πρέπει να είναι μη αρνητικές και όχι όλες μηδενικές.")
+    max_cost = profile.get("max_cost_per_day") or MAX_COST_PER_DAY
+    return str(profile.get("id", position)), q_vector(q_values), float(max_cost)
+
+def _init_worker(paths, method, seed, cache_dir=None, database=None, prune=False):
+    if database is not None:
+        store = SqliteFoodStore(database)
+        _worker_state["table"] = store.load_table()
+        store.close()
+    else:
+        _worker_state["table"] = load_food_table(paths, cache_dir=cache_dir)
+    _worker_state["method"] = method
+    _worker_state["seed"] = seed
+    _worker_state["prune"] = prune
+
+def plan_household(task):
+    """Plan one household; any failure becomes an error row so the rest of the batch still runs."""
+    position, profile = task
+    try:
+        return _plan_household(position, profile)
+    except Exception as e:
+        household_id = profile.get("id", position) if isinstance(profile, dict) else position
+        return {"id": str(household_id), "status": "error", "error": str(e) or type(e).__name__}
+
+def _plan_household(position, profile):
+    table = _worker_state["table"]
+    if isinstance(profile, ValueError):
+        raise profile
+    if not isinstance(profile, dict):
+        raise ValueError("Το προφίλ δεν είναι αντικείμενο JSON.")
+    household_id, Q, max_cost = parse_profile(profile, position)
+    seed = _worker_state["seed"]
+    rng = random.Random(seed + position) if seed is not None else None
+    plan = plan_weekly_menu(table.matrix, Q, table.costs, table.category_codes, max_cost, rng=rng, method=_worker_state["method"], prune=_worker_state["prune"])
+    days = []
+    for day_plan in plan:
+        days.append({
+            "day": day_plan["day"],
+            "foods": [
+                {"name": table.names[idx], "category": table.category_name(idx), "quantity": round(float(amount), 4), "cost": round(float(amount * table.costs[idx]), 4)}
+                for idx, amount in zip(day_plan["indices"], day_plan["T"])
+            ],
+            "total_cost": round(day_plan["total_cost"], 4),
+            "q_scale": round(day_plan["q_scale"], 4),
+        })
+    return {"id": household_id, "status": "ok", "weekly_total_cost": round(sum(day["total_cost"] for day in days), 4), "days": days}
+
+class ResultWriter:
+    """Stream results to JSONL (default) or CSV depending on the output extension."""
+
+    def __init__(self, path):
+        self.file = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+        self.csv = None
+        if path != "-" and os.path.splitext(path)[1].lower() == ".csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, result):
+        if self.csv is None:
+            self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            return
+        if result["status"] != "ok":
+            self.csv.writerow({"id": result["id"], "status": result["status"], "error": result["error"]})
+            return
+        for day in result["days"]:
+            for food in day["foods"]:
+                self.csv.writerow({"id": result["id"], "status": "ok", "day": day["day"], "food": food["name"], "category": food["category"], "quantity": food["quantity"], "cost": food["cost"], "q_scale": day["q_scale"]})
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+def run_batch(profiles_path, output_path, food_paths, method="lp", workers=None, seed=None, chunksize=8, cache_dir=None, database=None, prune=False):
+    """Plan a weekly menu for every profile and return (completed, failed, seconds).
+
+    With ``cache_dir`` the catalogue cache is built once here, and every worker
+    then maps the same cached arrays instead of parsing its own copy. With
+    ``database`` the workers read the catalogue from a SQLite food store instead.
+    """
+    workers = workers or os.cpu_count() or 1
+    if cache_dir is not None and database is None:
+        load_food_table(food_paths, cache_dir=cache_dir)
+    writer = ResultWriter(output_path)
+    completed = failed = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(food_paths, method, seed, cache_dir, database, prune)) as pool:
+            for result in pool.map(plan_household, enumerate(read_profiles(profiles_path)), chunksize=chunksize):
+                writer.write(result)
+                completed += 1
+                failed += result["status"] != "ok"
+                if completed % REPORT_EVERY == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"{completed} menus, {completed / elapsed:.1f} menus/second", file=sys.stderr)
+    finally:
+        writer.close()
+    return completed, failed, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate weekly menus for many households.")
+    parser.add_argument("profiles", help="household profiles (.jsonl, .json or .csv)")
+    parser.add_argument("--output", "-o", default="-", help="output file (.jsonl or .csv), '-' for stdout")
+    parser.add_argument("--foods", nargs="+", default=[DEFAULT_FOOD_FILE], help="food catalogue JSON files")
+    parser.add_argument("--method", choices=PLANNER_METHODS, default="lp")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the random method")
+    parser.add_argument("--chunksize", type=int, default=8, help="profiles sent to a worker at a time")
+    parser.add_argument("--cache-dir", default=None, help="binary catalogue cache shared by the workers")
+    parser.add_argument("--db", default=None, help="read the catalogue from this SQLite food store instead of --foods")
+    parser.add_argument("--prune", action="store_true", help="plan only with the Pareto-optimal foods of each category")
+    args = parser.parse_args(argv)
+
+    completed, failed, elapsed = run_batch(args.profiles, args.output, args.foods, args.method, args.workers, args.seed, args.chunksize, args.cache_dir, args.db, args.prune)
+    rate = completed / elapsed if elapsed > 0 else 0.0
+    print(f"Generated {completed} weekly menus ({failed} failed) in {elapsed:.2f} s: {rate:.1f} menus/second", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
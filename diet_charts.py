@@ -0,0 +1,238 @@
+"""Persistent cost charts for the Diet Assistant GUI.
+
+Each chart owns one Toplevel window and one matplotlib Figure, created once and
+reused. Figures are built directly (no pyplot), so nothing is registered in
+pyplot's global figure list and closing the window releases the figure.
+Re-plotting updates the existing artists in place and blits them over a cached
+background; the whole figure is redrawn only when the axis or colour range has
+to change.
+"""
+import abc
+import tkinter as tk
+
+import matplotlib.style
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from diet_engine import CATEGORY_NAMES, DAYS
+
+CHART_STYLE = "dark_background"
+BAR_COLOR = "#4CAF50"
+SECOND_BAR_COLOR = "#FF5722"
+HEATMAP_CMAP = "YlOrRd"
+AXIS_HEADROOM = 1.1     # Περιθώριο πάνω από τη μέγιστη τιμή όταν αλλάζει η κλίμακα
+AXIS_SHRINK = 0.5       # Η κλίμακα μικραίνει μόνο όταν οι τιμές πέσουν κάτω από αυτό το κλάσμα της
+
+
+def category_costs(food_list, T):
+    """Cost per category (CATEGORY_NAMES order) of quantities T of food_list."""
+    code_of = {category: code for code, category in enumerate(CATEGORY_NAMES)}
+    codes = np.array([code_of[food["category"]] for food in food_list], dtype=np.intp)
+    costs = np.asarray(T, dtype=np.float64) * np.array([food["cost"] for food in food_list], dtype=np.float64)
+    return np.bincount(codes, weights=costs, minlength=len(CATEGORY_NAMES))
+
+def category_day_costs(weekly_menu):
+    """Category x day cost matrix of weekly menu entries (day, (foods, T, total cost, ΣΗΠ scale))."""
+    matrix = np.zeros((len(CATEGORY_NAMES), len(DAYS)))
+    code_of = {category: code for code, category in enumerate(CATEGORY_NAMES)}
+    day_of = {day: index for index, day in enumerate(DAYS)}
+    categories, days, costs = [], [], []
+    for day, (food_list, T, total_cost, Q_scale) in weekly_menu:
+        categories.extend(code_of[food["category"]] for food in food_list)
+        days.extend([day_of[day]] * len(food_list))
+        costs.append(np.asarray(T, dtype=np.float64) * [food["cost"] for food in food_list])
+    if costs:
+        np.add.at(matrix, (np.array(categories, dtype=np.intp), np.array(days, dtype=np.intp)), np.concatenate(costs))
+    return matrix
+
+
+class Chart(abc.ABC):
+    """A chart window whose ``animated`` artists are blitted over a cached background."""
+
+    title = ""
+    geometry = "800x500"
+    figsize = (10, 5)
+
+    def __init__(self, master):
+        self.window = tk.Toplevel(master)
+        self.window.title(self.title)
+        self.window.geometry(self.geometry)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.animated = []
+        self.background = None
+        self._saving = False
+        with matplotlib.style.context(CHART_STYLE):
+            self.figure = Figure(figsize=self.figsize, layout="constrained")
+            self.build()
+        for artist in self.animated:
+            artist.set_animated(True)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    @abc.abstractmethod
+    def build(self):
+        """Create the axes and artists on ``self.figure``, listing the blitted ones in ``self.animated``."""
+
+    @property
+    def is_open(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def _on_draw(self, event):
+        # Μετά από κάθε πλήρη σχεδίαση κρατιέται το φόντο και ζωγραφίζονται τα μεταβλητά στοιχεία από πάνω
+        if self._saving:
+            return
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self.animated:
+            self.figure.draw_artist(artist)
+
+    def refresh(self, redraw=False):
+        if redraw or self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        for artist in self.animated:
+            self.figure.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
+
+    def save(self, path):
+        # Το savefig παραλείπει τα animated στοιχεία, οπότε γίνονται προσωρινά κανονικά
+        self._saving = True
+        for artist in self.animated:
+            artist.set_animated(False)
+        try:
+            self.figure.savefig(path, facecolor=self.figure.get_facecolor())
+        finally:
+            for artist in self.animated:
+                artist.set_animated(True)
+            self._saving = False
+
+    def show(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def close(self):
+        self.window.destroy()
+        self.figure.clear()
+
+
+class CostBarChart(Chart):
+    """Cost of every category against the total cost."""
+
+    title = "Κόστος vs Συνολικό Κόστος ανά Κατηγορία"
+    geometry = f"{max(800, len(CATEGORY_NAMES) * 50)}x500"
+    figsize = (max(10, len(CATEGORY_NAMES) * 0.5), 5)
+
+    def build(self):
+        self.ax = self.figure.add_subplot()
+        index = np.arange(len(CATEGORY_NAMES))
+        self.bars = self.ax.bar(index, np.zeros(len(CATEGORY_NAMES)), color=BAR_COLOR, label="Κόστος Κατηγορίας")
+        self.total_line = self.ax.axhline(y=0, color=SECOND_BAR_COLOR, linestyle="--", label="Συνολικό Κόστος: 0.00 €")
+        self.ax.set_xlabel("Κατηγορία", color="#FFFFFF")
+        self.ax.set_ylabel("Κόστος (€)", color="#FFFFFF")
+        self.ax.set_title("Κόστος vs Συνολικό Κόστος", color="#FFFFFF")
+        self.ax.set_xticks(index)
+        self.ax.set_xticklabels(CATEGORY_NAMES, rotation=45, ha='right')
+        self.ax.tick_params(axis='x', labelsize=8)
+        self.ax.set_ylim(0, 1)
+        self.legend = self.ax.legend()
+        handles, labels = self.ax.get_legend_handles_labels()
+        self.total_label = self.legend.get_texts()[handles.index(self.total_line)]
+        self.animated = list(self.bars) + [self.total_line, self.legend]
+
+    def update(self, costs):
+        costs = np.asarray(costs, dtype=np.float64)
+        total_cost = float(costs.sum())
+        for bar, cost in zip(self.bars, costs):
+            bar.set_height(cost)
+        self.total_line.set_ydata([total_cost, total_cost])
+        self.total_label.set_text(f"Συνολικό Κόστος: {total_cost:.2f} €")
+        top = self.ax.get_ylim()[1]
+        redraw = total_cost > top or total_cost < top * AXIS_SHRINK
+        if redraw:
+            self.ax.set_ylim(0, max(total_cost * AXIS_HEADROOM, 1e-6))
+        self.refresh(redraw)
+
+
+class CostHeatmap(Chart):
+    """Annotated category x day cost matrix."""
+
+    title = "Κατανομή Κόστους Διατροφής (Heatmap)"
+    geometry = "800x800"
+    figsize = (8, 8)
+
+    def build(self):
+        self.ax = self.figure.add_subplot()
+        self.image = self.ax.imshow(np.zeros((len(CATEGORY_NAMES), len(DAYS))), cmap=HEATMAP_CMAP, vmin=0, vmax=1, aspect="auto", interpolation="nearest")
+        self.colorbar = self.figure.colorbar(self.image, ax=self.ax, label="Κόστος (€)")
+        self.texts = np.array([[self.ax.text(day, category, "", ha="center", va="center") for day in range(len(DAYS))]
+                               for category in range(len(CATEGORY_NAMES))])
+        self.ax.set_xticks(np.arange(len(DAYS)))
+        self.ax.set_xticklabels(DAYS, rotation=45)
+        self.ax.set_yticks(np.arange(len(CATEGORY_NAMES)))
+        self.ax.set_yticklabels(CATEGORY_NAMES, rotation=0)
+        self.ax.set_xlabel("Ημέρα", color="#FFFFFF")
+        self.ax.set_ylabel("Κατηγορία", color="#FFFFFF")
+        self.ax.set_title("Κατανομή Κόστους Διατροφής (Heatmap)", color="#FFFFFF")
+        self.ax.tick_params(colors="#FFFFFF")
+        self.animated = [self.image] + list(self.texts.ravel())
+
+    def update(self, cost_matrix):
+        cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+        self.image.set_data(cost_matrix)
+        vmax = float(cost_matrix.max())
+        top = self.image.get_clim()[1]
+        redraw = vmax > top or vmax < top * AXIS_SHRINK
+        if redraw:
+            self.image.set_clim(0, max(vmax * AXIS_HEADROOM, 1e-6))
+        # Σκούρο κείμενο σε ανοιχτά κελιά και λευκό σε σκούρα, όπως στα heatmap του seaborn
+        luminance = self.image.cmap(self.image.norm(cost_matrix))[..., :3] @ np.array([0.299, 0.587, 0.114])
+        for text, value, light in zip(self.texts.ravel(), cost_matrix.ravel(), (luminance > 0.408).ravel()):
+            text.set_text(f"{value:.2f}")
+            text.set_color(".15" if light else "w")
+        self.refresh(redraw)
+
+
+class SensitivityChart(Chart):
+    """Quantity and cost sensitivity of the analysed foods; rebuilt in place when the foods change."""
+
+    title = "Σύγκριση Ανάλυσης Ευαισθησίας"
+
+    def build(self):
+        self.ax = self.figure.add_subplot()
+        self.food_names = None
+
+    def update(self, food_names, delta_quantities, delta_costs):
+        food_names = list(food_names)
+        if food_names != self.food_names:
+            self.food_names = food_names
+            self.window.geometry(f"{max(800, len(food_names) * 200)}x500")
+            self.figure.set_size_inches(max(10, len(food_names) * 2), 5)
+            with matplotlib.style.context(CHART_STYLE):
+                self.ax.clear()
+                bar_width = 0.35
+                index = np.arange(len(food_names))
+                self.quantity_bars = self.ax.bar(index, delta_quantities, bar_width, label="Επίδραση στην Ποσότητα (%)", color=BAR_COLOR)
+                self.cost_bars = self.ax.bar(index + bar_width, delta_costs, bar_width, label="Επίδραση στο Κόστος (%)", color=SECOND_BAR_COLOR)
+                self.ax.set_xlabel("Τροφές", color="#FFFFFF")
+                self.ax.set_ylabel("Αλλαγή (%)", color="#FFFFFF")
+                self.ax.set_title("Σύγκριση Ευαισθησίας Τροφών", color="#FFFFFF")
+                self.ax.set_xticks(index + bar_width / 2)
+                self.ax.set_xticklabels(food_names, rotation=45, ha='right')
+                self.ax.legend()
+                self.ax.tick_params(colors="#FFFFFF")
+            self.animated = list(self.quantity_bars) + list(self.cost_bars)
+            for artist in self.animated:
+                artist.set_animated(True)
+        else:
+            for bar, value in zip(self.quantity_bars, delta_quantities):
+                bar.set_height(value)
+            for bar, value in zip(self.cost_bars, delta_costs):
+                bar.set_height(value)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.refresh(redraw=True)
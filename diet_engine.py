@@ -0,0 +1,1342 @@
+"""Headless solver core for Diet Assistant.
+
+Pure NumPy functions that take a food matrix A (nutrients x foods), a cost
+vector C and a ΣΗΠ vector Q and return structured results. This module must
+not import tkinter, matplotlib, seaborn or PIL so that it can run in batch
+jobs and worker processes without a display.
+"""
+import hashlib
+import random
+import threading
+from collections import OrderedDict
+from collections.abc import MutableSequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Define the specific nutrients
+NUTRIENTS = [
+    "Υδατάνθρακες",
+    "Πρωτεΐνες",
+    "Λίπη",
+    "Εδώδιμες ίνες",
+    "Ασβέστιο",
+    "Σίδηρος"
+]
+
+# Categories and number of foods per category for each day
+CATEGORIES_PER_DAY = {
+    "Φρούτα": 1,
+    "Λαχανικά": 2,
+    "Όσπρια": 1,
+    "Κρέας": 1,
+    "Αλεύρι/Ψωμί": 1,
+    "Ψάρια": 0,
+    "Ξηροί Καρποί": 1
+}
+
+DAYS = ["Δευτέρα", "Τρίτη", "Τετάρτη", "Πέμπτη", "Παρασκευή", "Σάββατο", "Κυριακή"]
+FISH_DAYS = ("Τετάρτη", "Κυριακή")
+
+MAX_COST_PER_DAY = 20.0    # Μέγιστο επιτρεπόμενο κόστος ανά ημέρα
+MIN_PORTION = 0.1          # Ελάχιστη ποσότητα τροφής στο ημερήσιο μενού
+MAX_PORTION = 20.0         # Μέγιστη ποσότητα τροφής στο ημερήσιο μενού
+MIN_Q_SCALE = 0.7          # Κατώτατο όριο κλιμάκωσης του ΣΗΠ
+Q_SCALE_STEP = 0.05
+
+# Ποσοστά κατανομής με βάση τις προτεραιότητες
+PRIORITY_PERCENTAGES = {1: 0.30, 2: 0.20, 3: 0.15, 4: 0.15, 5: 0.10, 6: 0.10}
+
+DISTRIBUTIONS = ("uniform", "normal")
+PLANNER_METHODS = ("random", "lp", "greedy", "week")
+SELECTION_POOL_LIMIT = 40     # Μέγιστες υποψήφιες τροφές ανά κατηγορία στην αναζήτηση επιλογής
+SELECTION_COST_WEIGHT = 0.1   # Βάρος του κόστους έναντι του σχετικού υπολοίπου
+SELECTION_MAX_PASSES = 5      # Μέγιστα περάσματα τοπικής αναζήτησης ανταλλαγών
+LP_ZERO_TOL = 1e-9          # Ποσότητες κάτω από αυτό θεωρούνται μηδενικές στη λύση LP
+LP_BLAND_AFTER = 50         # Εκφυλισμένες περιστροφές πριν από τη μετάβαση στον κανόνα Bland
+SENSITIVITY_CHUNK_BYTES = 64 * 1024 * 1024   # Μέγιστη μνήμη ανά δέσμη διαταραγμένων πινάκων
+SENSITIVITY_METHODS = ("rank1", "batched")
+EXECUTORS = ("process", "thread")
+ANALYTICS_TOP_K = 5         # Πλήθος τροφών στις λίστες κορυφής των αναλύσεων
+PARETO_BLOCK = 1024         # Υποψήφιες τροφές ανά μπλοκ σύγκρισης στο skyline
+PARETO_CHUNK = 128          # Τροφές του μετώπου ανά βήμα σύγκρισης με ένα μπλοκ
+SOLVE_CACHE_SIZE = 4096     # Μέγιστες αποθηκευμένες λύσεις στην κρυφή μνήμη επιλύσεων
+
+# Σταθερή σειρά κατηγοριών για τους κωδικούς κατηγορίας του FoodTable
+CATEGORY_NAMES = list(CATEGORIES_PER_DAY.keys())
+
+
+class InfeasibleError(ValueError):
+    """Raised when no acceptable solution exists for the given inputs."""
+
+
+class SolveCache:
+    """Bounded LRU cache of solver results with hit and miss counters.
+
+    Keys identify a solve by kind, food rows, ΣΗΠ vector and bounds (see
+    ``key``), not by the matrix contents, so the owner must ``clear`` the cache
+    whenever the foods behind those rows change. Cached arrays are made
+    read-only because every hit returns the same objects. The cache may be
+    shared with a background solver thread: a result whose computation
+    overlapped a ``clear`` is returned but not stored.
+    """
+
+    def __init__(self, maxsize=SOLVE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(kind, *parts):
+        """Canonical digest of a solve: arrays by dtype, shape and bytes, anything else by repr."""
+        digest = hashlib.blake2b(kind.encode(), digest_size=16)
+        for part in parts:
+            if isinstance(part, (np.ndarray, list, tuple)):
+                array = np.ascontiguousarray(part)
+                digest.update(f"{array.dtype}{array.shape}".encode())
+                digest.update(array.tobytes())
+            else:
+                digest.update(repr(part).encode())
+            digest.update(b"|")
+        return digest.digest()
+
+    def lookup(self, key, compute):
+        """Return the cached result for ``key``, computing and storing it on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            generation = self._generation
+        value = compute()
+        for item in (value.values() if isinstance(value, dict) else value if isinstance(value, tuple) else (value,)):
+            if isinstance(item, np.ndarray):
+                item.setflags(write=False)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = value
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    @property
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+def _cached(cache, compute, kind, *parts):
+    if cache is None:
+        return compute()
+    return cache.lookup(SolveCache.key(kind, *parts), compute)
+
+
+class FoodTable(MutableSequence):
+    """Columnar food catalogue.
+
+    Nutrients are stored one contiguous float64 row per food; ``matrix`` exposes
+    them as the nutrients x foods matrix A the solvers expect. Costs and
+    category codes (indices into CATEGORY_NAMES) live in parallel arrays and
+    ``row_by_name`` maps a food name to its first row. As a sequence the table
+    reads and writes plain food dicts, built on access, so it can stand in for
+    the list of foods without keeping one.
+    """
+
+    def __init__(self, capacity=0):
+        self._nutrients = np.empty((capacity, len(NUTRIENTS)), dtype=np.float64)
+        self._costs = np.empty(capacity, dtype=np.float64)
+        self._category_codes = np.empty(capacity, dtype=np.int8)
+        self.names = []
+        self.row_by_name = {}
+        self.size = 0
+
+    @classmethod
+    def from_foods(cls, food_list):
+        table = cls(capacity=len(food_list))
+        for food in food_list:
+            table.append(food)
+        return table
+
+    @classmethod
+    def from_arrays(cls, nutrients, costs, category_codes, names):
+        """Wrap existing column arrays (e.g. memory-mapped ones) without copying them."""
+        table = cls()
+        table._nutrients, table._costs, table._category_codes = nutrients, costs, category_codes
+        table.names = list(names)
+        table.size = len(table.names)
+        table._reindex()
+        return table
+
+    def __len__(self):
+        return self.size
+
+    def _check_row(self, row):
+        if row < 0:
+            row += self.size
+        if not 0 <= row < self.size:
+            raise IndexError("FoodTable index out of range")
+        return row
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self.size))]
+        row = self._check_row(row)
+        return {
+            "name": self.names[row],
+            "nutrients": dict(zip(NUTRIENTS, self._nutrients[row].tolist())),
+            "cost": float(self._costs[row]),
+            "category": CATEGORY_NAMES[self._category_codes[row]],
+        }
+
+    def __setitem__(self, row, food):
+        self.update(self._check_row(row), food)
+
+    def __delitem__(self, row):
+        self.delete(self._check_row(row))
+
+    @property
+    def matrix(self):
+        return self._nutrients[:self.size].T
+
+    @property
+    def costs(self):
+        return self._costs[:self.size]
+
+    @property
+    def category_codes(self):
+        return self._category_codes[:self.size]
+
+    def columns(self, rows):
+        """Nutrients x len(rows) matrix for the given row indices."""
+        return self._nutrients[np.asarray(rows, dtype=np.intp)].T
+
+    def category_name(self, row):
+        return CATEGORY_NAMES[self._category_codes[row]]
+
+    def rows_in_category(self, category):
+        return np.flatnonzero(self.category_codes == CATEGORY_NAMES.index(category))
+
+    def _grow(self):
+        capacity = max(16, 2 * len(self._costs))
+        nutrients = np.empty((capacity, len(NUTRIENTS)), dtype=np.float64)
+        costs = np.empty(capacity, dtype=np.float64)
+        category_codes = np.empty(capacity, dtype=np.int8)
+        nutrients[:self.size] = self._nutrients[:self.size]
+        costs[:self.size] = self._costs[:self.size]
+        category_codes[:self.size] = self._category_codes[:self.size]
+        self._nutrients, self._costs, self._category_codes = nutrients, costs, category_codes
+
+    def _write(self, row, food):
+        self._nutrients[row] = [food['nutrients'][nutrient] for nutrient in NUTRIENTS]
+        self._costs[row] = food['cost']
+        self._category_codes[row] = CATEGORY_NAMES.index(food['category'])
+
+    def append(self, food):
+        if self.size == len(self._costs):
+            self._grow()
+        self._write(self.size, food)
+        self.names.append(food['name'])
+        self.row_by_name.setdefault(food['name'], self.size)
+        self.size += 1
+
+    def insert(self, row, food):
+        if row >= self.size:
+            self.append(food)
+            return
+        row = max(0, row + self.size if row < 0 else row)
+        if self.size == len(self._costs):
+            self._grow()
+        self._nutrients[row + 1:self.size + 1] = self._nutrients[row:self.size].copy()
+        self._costs[row + 1:self.size + 1] = self._costs[row:self.size].copy()
+        self._category_codes[row + 1:self.size + 1] = self._category_codes[row:self.size].copy()
+        self._write(row, food)
+        self.names.insert(row, food['name'])
+        self.size += 1
+        self._reindex()
+
+    def truncate(self, size):
+        """Drop every row from ``size`` on, e.g. to undo a partially loaded file."""
+        if size < self.size:
+            del self.names[size:]
+            self.size = size
+            self._reindex()
+
+    def snapshot(self):
+        """Copy of the current rows, for ``restore`` after a failed bulk change such as a merge."""
+        return self.size, self._nutrients[:self.size].copy(), self._costs[:self.size].copy(), self._category_codes[:self.size].copy()
+
+    def restore(self, snapshot):
+        """Undo appends and in-place overwrites made since ``snapshot`` (row order and names are unchanged by those)."""
+        size, nutrients, costs, category_codes = snapshot
+        self.truncate(size)
+        self._nutrients[:size] = nutrients
+        self._costs[:size] = costs
+        self._category_codes[:size] = category_codes
+
+    def update(self, row, food):
+        self._write(row, food)
+        if self.names[row] != food['name']:
+            self.names[row] = food['name']
+            self._reindex()
+
+    def upsert(self, names, nutrients, costs, category_codes):
+        """Insert or overwrite foods by name from column arrays and return (added, updated).
+
+        Names already in the table are overwritten in place and new names are
+        appended in one block; when a name repeats within the batch the last
+        occurrence wins.
+        """
+        last = {name: i for i, name in enumerate(names)}
+        existing = [(self.row_by_name[name], i) for name, i in last.items() if name in self.row_by_name]
+        new = [i for name, i in last.items() if name not in self.row_by_name]
+        if existing:
+            rows, sources = (np.array(column, dtype=np.intp) for column in zip(*existing))
+            self._nutrients[rows] = nutrients[sources]
+            self._costs[rows] = costs[sources]
+            self._category_codes[rows] = category_codes[sources]
+        if new:
+            while self.size + len(new) > len(self._costs):
+                self._grow()
+            end = self.size + len(new)
+            self._nutrients[self.size:end] = nutrients[new]
+            self._costs[self.size:end] = costs[new]
+            self._category_codes[self.size:end] = category_codes[new]
+            for row, i in enumerate(new, start=self.size):
+                self.names.append(names[i])
+                self.row_by_name[names[i]] = row
+            self.size = end
+        return len(new), len(existing)
+
+    def delete(self, row):
+        last = self.size - 1
+        self._nutrients[row:last] = self._nutrients[row + 1:self.size]
+        self._costs[row:last] = self._costs[row + 1:self.size]
+        self._category_codes[row:last] = self._category_codes[row + 1:self.size]
+        del self.names[row]
+        self.size = last
+        self._reindex()
+
+    def _reindex(self):
+        self.row_by_name = {}
+        for row, name in enumerate(self.names):
+            self.row_by_name.setdefault(name, row)
+
+
+def validate_food(food):
+    """Raise ValueError if a food record cannot be used by the solvers."""
+    if set(food['nutrients'].keys()) != set(NUTRIENTS):
+        raise ValueError(f"Η τροφή '{food['name']}' δεν έχει τα σωστά θρεπτικά συστατικά: {NUTRIENTS}")
+    if food['cost'] <= 0:
+        raise ValueError(f"Το κόστος για την τροφή '{food['name']}' πρέπει να είναι θετικό.")
+    if 'category' not in food:
+        raise ValueError(f"Η τροφή '{food['name']}' δεν έχει πεδίο κατηγορίας.")
+    if food['category'] not in CATEGORIES_PER_DAY:
+        raise ValueError(f"Η κατηγορία '{food['category']}' της τροφής '{food['name']}' δεν είναι έγκυρη.")
+
+def nutrient_matrix(food_list):
+    """Build the nutrients x foods matrix A from a list of food dicts."""
+    return np.array([[food['nutrients'][nutrient] for food in food_list] for nutrient in NUTRIENTS], dtype=np.float64)
+
+def cost_vector(food_list):
+    return np.array([food['cost'] for food in food_list], dtype=np.float64)
+
+def q_vector(q_values):
+    """Convert a {nutrient: value} ΣΗΠ mapping to a vector ordered as NUTRIENTS."""
+    return np.array([q_values[nutrient] for nutrient in NUTRIENTS], dtype=np.float64)
+
+def daily_categories(day):
+    """Category counts for a given day (fish on Wednesday/Sunday, meat otherwise)."""
+    categories = CATEGORIES_PER_DAY.copy()
+    if day in FISH_DAYS:
+        categories["Ψάρια"] = 1
+        categories["Κρέας"] = 0
+    else:
+        categories["Ψάρια"] = 0
+        categories["Κρέας"] = 1
+    return categories
+
+def bounded_lstsq(A, b, lower=0.0, upper=np.inf, x0=None, max_iter=None, tol=1e-10):
+    """Bounded-variable least squares: minimize ||A x - b|| with lower <= x <= upper.
+
+    Active-set method in the style of Lawson-Hanson NNLS, extended to upper
+    bounds. Variables strictly inside their bounds form the free set; passing a
+    previous solution as ``x0`` warm-starts from its free set. Returns
+    ``(x, residual, free)`` where ``residual`` is ||A x - b||^2.
+    """
+    A = np.asarray(A, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    m, n = A.shape
+    lower = np.broadcast_to(np.asarray(lower, dtype=np.float64), (n,)).copy()
+    upper = np.broadcast_to(np.asarray(upper, dtype=np.float64), (n,)).copy()
+    if np.any(lower > upper):
+        raise ValueError("Το κάτω όριο ποσότητας υπερβαίνει το άνω όριο.")
+    start = np.zeros(n) if x0 is None else np.asarray(x0, dtype=np.float64)
+    x = np.clip(start, lower, upper)
+    free = (x > lower) & (x < upper)
+    max_iter = max_iter if max_iter is not None else 3 * n + 30
+
+    for _ in range(max_iter):
+        # Βέλτιστη λύση στο τρέχον ελεύθερο σύνολο, με γραμμική παρεμβολή όταν παραβιάζονται όρια
+        while free.any():
+            F = np.flatnonzero(free)
+            rhs = b - A[:, ~free] @ x[~free]
+            z = np.linalg.lstsq(A[:, F], rhs, rcond=None)[0]
+            inside = (z > lower[F]) & (z < upper[F])
+            if inside.all():
+                x[F] = z
+                break
+            step = z - x[F]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                to_bound = np.where(z <= lower[F], (lower[F] - x[F]) / step, (upper[F] - x[F]) / step)
+            alpha = np.clip(np.min(to_bound[~inside]), 0.0, 1.0)
+            x[F] += alpha * step
+            # Με άπειρα όρια η ανοχή δίνει inf - inf· η σύγκριση με NaN είναι σωστά ψευδής
+            with np.errstate(invalid='ignore'):
+                hit_lower = F[x[F] <= lower[F] + tol * np.maximum(1.0, np.abs(lower[F]))]
+                hit_upper = F[x[F] >= upper[F] - tol * np.maximum(1.0, np.abs(upper[F]))]
+            x[hit_lower] = lower[hit_lower]
+            x[hit_upper] = upper[hit_upper]
+            free[hit_lower] = False
+            free[hit_upper] = False
+            # Τουλάχιστον μία μεταβλητή πρέπει να φύγει από το ελεύθερο σύνολο
+            if len(hit_lower) + len(hit_upper) == 0:
+                worst = F[~inside][np.argmin(to_bound[~inside])]
+                x[worst] = lower[worst] if z[F == worst][0] <= lower[worst] else upper[worst]
+                free[worst] = False
+
+        # Συνθήκες KKT: ελέγχει αν κάποια δεσμευμένη μεταβλητή μπορεί να μειώσει το υπόλοιπο
+        w = A.T @ (b - A @ x)
+        scale = tol * max(1.0, np.abs(A.T @ b).max(initial=0.0))
+        candidates = ~free & (((x <= lower) & (w > scale)) | ((x >= upper) & (w < -scale)))
+        if not candidates.any():
+            break
+        free[np.argmax(np.where(candidates, np.abs(w), -1.0))] = True
+
+    residual = float(np.sum((A @ x - b) ** 2))
+    return x, residual, free
+
+def _pivot(tableau, row, col):
+    tableau[row] /= tableau[row, col]
+    factors = tableau[:, col].copy()
+    factors[row] = 0.0
+    tableau -= np.outer(factors, tableau[row])
+
+def _complement(tableau, col, bound):
+    # Αντικατάσταση x = bound - x': η στήλη αλλάζει πρόσημο και το δεξί μέλος μετατοπίζεται
+    tableau[:, -1] -= tableau[:, col] * bound
+    tableau[:, col] *= -1
+
+def _run_simplex(tableau, basis, n_cols, max_iter, tol, upper, flipped):
+    """Bounded-variable primal simplex iterations on a tableau whose last row holds reduced costs.
+
+    A variable with a finite ``upper`` bound never gets a tableau row of its
+    own. When it reaches the bound it is complemented in place (x = upper - x')
+    and marked in ``flipped``, so every non-basic variable still sits at zero.
+    """
+    degenerate = 0
+    for _ in range(max_iter):
+        reduced = tableau[-1, :n_cols]
+        if degenerate > LP_BLAND_AFTER:
+            # Κανόνας Bland για αποφυγή κύκλων σε εκφυλισμένες κορυφές
+            entering = np.flatnonzero(reduced < -tol)
+            if not len(entering):
+                return
+            col = entering[0]
+        else:
+            col = int(np.argmin(reduced))
+            if reduced[col] >= -tol:
+                return
+        column = tableau[:-1, col]
+        rhs = tableau[:-1, -1]
+        basic_upper = upper[basis]
+        # Βασικές μεταβλητές που μηδενίζονται ή φτάνουν στο άνω όριό τους
+        to_lower = column > tol
+        to_upper = (column < -tol) & np.isfinite(basic_upper)
+        ratios = np.full(len(column), np.inf)
+        ratios[to_lower] = rhs[to_lower] / column[to_lower]
+        ratios[to_upper] = (basic_upper[to_upper] - rhs[to_upper]) / -column[to_upper]
+        best = ratios.min()
+        if upper[col] <= best:
+            if not np.isfinite(upper[col]):
+                raise InfeasibleError("Το γραμμικό πρόγραμμα δεν είναι φραγμένο.")
+            # Η εισερχόμενη μεταβλητή φτάνει στο δικό της όριο πριν από κάθε βασική
+            degenerate = degenerate + 1 if upper[col] <= tol else 0
+            _complement(tableau, col, upper[col])
+            flipped[col] = not flipped[col]
+            continue
+        ties = np.flatnonzero(ratios <= best + tol)
+        row = ties[np.argmin(basis[ties])]
+        degenerate = degenerate + 1 if best <= tol else 0
+        if to_upper[row]:
+            leaving = basis[row]
+            _complement(tableau, leaving, upper[leaving])
+            tableau[row] *= -1
+            flipped[leaving] = not flipped[leaving]
+        _pivot(tableau, row, col)
+        basis[row] = col
+    raise InfeasibleError("Το γραμμικό πρόγραμμα δεν συνέκλινε.")
+
+def linprog_simplex(c, A_ub=None, b_ub=None, A_eq=None, b_eq=None, lower=0.0, upper=np.inf, max_iter=None, tol=1e-9):
+    """Minimize c @ x subject to A_ub @ x <= b_ub, A_eq @ x == b_eq and lower <= x <= upper.
+
+    Self-contained dense two-phase tableau simplex (Dantzig pricing, switching
+    to Bland's rule on long degenerate runs). The bounds are handled by the
+    ratio test rather than as extra rows, so they cost nothing in the tableau;
+    ``lower`` must be finite. Returns a dict with ``x`` and ``cost``; raises
+    InfeasibleError when no feasible point exists.
+    """
+    c = np.asarray(c, dtype=np.float64)
+    n = len(c)
+    A_ub = np.zeros((0, n)) if A_ub is None else np.asarray(A_ub, dtype=np.float64)
+    b_ub = np.zeros(0) if b_ub is None else np.asarray(b_ub, dtype=np.float64)
+    A_eq = np.zeros((0, n)) if A_eq is None else np.asarray(A_eq, dtype=np.float64)
+    b_eq = np.zeros(0) if b_eq is None else np.asarray(b_eq, dtype=np.float64)
+    lower = np.broadcast_to(np.asarray(lower, dtype=np.float64), (n,))
+    upper = np.broadcast_to(np.asarray(upper, dtype=np.float64), (n,))
+    if np.any(lower > upper):
+        raise ValueError("Το κάτω όριο ποσότητας υπερβαίνει το άνω όριο.")
+    # Μετατόπιση ώστε κάθε μεταβλητή να ξεκινά από το μηδέν
+    b_ub = b_ub - A_ub @ lower
+    b_eq = b_eq - A_eq @ lower
+    m_ub, m_eq = len(b_ub), len(b_eq)
+    m = m_ub + m_eq
+
+    # Κάθε γραμμή με αρνητικό δεξί μέλος ή ισότητα χρειάζεται τεχνητή μεταβλητή
+    flip = np.concatenate([b_ub < 0, b_eq < 0])
+    needs_artificial = np.concatenate([b_ub < 0, np.ones(m_eq, dtype=bool)])
+    artificial_rows = np.flatnonzero(needs_artificial)
+    n_art = len(artificial_rows)
+    n_cols = n + m_ub + n_art
+
+    tableau = np.zeros((m + 1, n_cols + 1))
+    tableau[:m_ub, :n] = A_ub
+    tableau[m_ub:m, :n] = A_eq
+    tableau[np.arange(m_ub), n + np.arange(m_ub)] = 1.0
+    tableau[:m, -1] = np.concatenate([b_ub, b_eq])
+    tableau[np.flatnonzero(flip)] *= -1
+    tableau[artificial_rows, n + m_ub + np.arange(n_art)] = 1.0
+    basis = np.array([n + i if i < m_ub and not needs_artificial[i] else -1 for i in range(m)], dtype=np.intp)
+    for k, row in enumerate(artificial_rows):
+        basis[row] = n + m_ub + k
+    bounds = np.concatenate([upper - lower, np.full(m_ub + n_art, np.inf)])
+    flipped = np.zeros(n_cols, dtype=bool)
+
+    max_iter = max_iter if max_iter is not None else 50 * (m + n_cols) + 100
+    if n_art:
+        # Φάση 1: ελαχιστοποίηση του αθροίσματος των τεχνητών μεταβλητών
+        tableau[-1, :] = -tableau[artificial_rows].sum(axis=0)
+        tableau[-1, n + m_ub:n_cols] = 0.0
+        _run_simplex(tableau, basis, n_cols, max_iter, tol, bounds, flipped)
+        if -tableau[-1, -1] > tol * max(1.0, np.abs(tableau[:m, -1]).max(initial=0.0)):
+            raise InfeasibleError("Το γραμμικό πρόγραμμα δεν έχει εφικτή λύση.")
+        # Απομάκρυνση τεχνητών μεταβλητών που έμειναν στη βάση με μηδενική τιμή
+        keep = []
+        for row in range(m):
+            if basis[row] >= n + m_ub:
+                candidates = np.flatnonzero(np.abs(tableau[row, :n + m_ub]) > tol)
+                if not len(candidates):
+                    continue   # Πλεονάζουσα γραμμή
+                _pivot(tableau, row, candidates[0])
+                basis[row] = candidates[0]
+            keep.append(row)
+        tableau = np.vstack([tableau[keep], tableau[-1:]])
+        tableau = np.delete(tableau, np.s_[n + m_ub:n_cols], axis=1)
+        basis = basis[keep]
+        n_cols = n + m_ub
+        bounds, flipped = bounds[:n_cols], flipped[:n_cols]
+
+    # Φάση 2: το πραγματικό κόστος, εκφρασμένο ως ανηγμένα κόστη της τρέχουσας βάσης
+    tableau[-1, :] = 0.0
+    tableau[-1, :n] = np.where(flipped[:n], -c, c)
+    for row, var in enumerate(basis):
+        if tableau[-1, var] != 0.0:
+            tableau[-1] -= tableau[-1, var] * tableau[row]
+    _run_simplex(tableau, basis, n_cols, max_iter, tol, bounds, flipped)
+
+    x = np.zeros(n_cols)
+    x[basis] = tableau[:-1, -1]
+    x = np.where(flipped, bounds - x, x)
+    x = np.clip(lower + x[:n], lower, upper)
+    return {"x": x, "cost": float(c @ x)}
+
+def solve_optimal_diet(A, Q, C, x0=None):
+    """Priority-weighted quantities for the selected foods (columns of A, in priority order).
+
+    The result's ``x`` is the underlying non-negative least-squares solution;
+    passing it back as ``x0`` after one column of A or one entry of Q changed
+    warm-starts the solve from the previous free set.
+    """
+    A = np.asarray(A, dtype=np.float64)
+    Q = np.asarray(Q, dtype=np.float64)
+    C = np.asarray(C, dtype=np.float64)
+    m, n = A.shape
+    # Έλεγχος αν ο αριθμός επιλεγμένων τροφών είναι έγκυρος
+    if n < 1 or n > m:
+        raise InfeasibleError(f"Επιλέξτε από 1 έως {m} τροφές.")
+    if np.any(C <= 0):
+        raise InfeasibleError("Μη έγκυρο κόστος σε κάποια τροφή.")
+    # Μη αρνητικά ελάχιστα τετράγωνα αντί για lstsq και αποκοπή στο μηδέν
+    x, residual, free = bounded_lstsq(A, Q, 0.0, np.inf, x0=x0)
+    rank = np.linalg.matrix_rank(A)
+    # Κατανομή της συνολικής ποσότητας με βάση τις προτεραιότητες
+    percentages = np.array([PRIORITY_PERCENTAGES.get(priority, 0.10) for priority in range(1, n + 1)])
+    T_new = np.sum(x) * percentages
+    # Εφαρμογή ορίων στις ποσότητες
+    T_new = np.clip(T_new, 0.1, 10)
+    return {
+        "T": T_new,
+        "x": x,
+        "total_cost": float(np.dot(C, T_new)),
+        "rank": int(rank),
+        "underdetermined": bool(rank < min(m, n)),
+    }
+
+def _overdetermined(A):
+    # Όπως το lstsq, το υπόλοιπο ελέγχεται μόνο για υπερκαθορισμένα συστήματα πλήρους τάξης
+    m, n = A.shape
+    return n < m and np.linalg.matrix_rank(A) == n
+
+def _group_by_category(category_codes):
+    category_codes = np.asarray(category_codes)
+    return {category: np.flatnonzero(category_codes == code).tolist() for code, category in enumerate(CATEGORY_NAMES)}
+
+def _day_candidates(foods_by_category, day_categories, used_food_indices, day):
+    """Candidate rows per required category, preferring foods not used on earlier days."""
+    pools = {}
+    for category, count in day_categories.items():
+        if count == 0:
+            continue
+        candidates = foods_by_category.get(category, [])
+        available = [idx for idx in candidates if idx not in used_food_indices]
+        if len(available) < count:
+            # Εναλλακτικά, επιλέγει οποιαδήποτε διαθέσιμη τροφή στην κατηγορία
+            available = list(candidates)
+        if len(available) < count:
+            raise InfeasibleError(f"Δεν υπάρχουν αρκετές τροφές στην κατηγορία '{category}' για την {day}. Χρειάζονται {count}, βρέθηκαν {len(available)}.")
+        pools[category] = available
+    return pools
+
+def _pareto_pools(A, C, foods_by_category):
+    """Shrink every category to its Pareto-optimal foods, peeling further fronts while it is too small.
+
+    Each category keeps at least as many foods as it fills over the whole
+    week, so every day can still pick foods not used on earlier days.
+    """
+    weekly_counts = {category: sum(daily_categories(day)[category] for day in DAYS) for category in CATEGORY_NAMES}
+    pools = {}
+    for category, rows in foods_by_category.items():
+        remaining = np.asarray(rows, dtype=np.intp)
+        kept = []
+        while remaining.size and len(kept) < weekly_counts.get(category, 0):
+            front = pareto_front(A, C, remaining)
+            kept.extend(front.tolist())
+            remaining = np.setdiff1d(remaining, front, assume_unique=True)
+        pools[category] = sorted(kept)
+    return pools
+
+def _no_menu_error(day, max_cost_per_day):
+    return InfeasibleError(f"Δεν ήταν δυνατόν να βρεθεί μενού για την {day} με κόστος κάτω από {max_cost_per_day:.2f} €, ακόμα και με ΣΗΠ μειωμένο στο {MIN_Q_SCALE * 100:.0f}%. Προσθέστε φθηνότερες τροφές.")
+
+def _bounded_solve(A, selected, Q, x0=None, cache=None):
+    """bounded_lstsq of the selected columns within the portion bounds, through the solve cache."""
+    return _cached(cache, lambda: bounded_lstsq(A[:, selected], Q, MIN_PORTION, MAX_PORTION, x0=x0), "bounded", selected, Q, MIN_PORTION, MAX_PORTION)
+
+def _plan_day_random(A, original_Q, C, pools, day_categories, day, max_cost_per_day, rng, cache=None):
+    Q_scale = 1.0   # Ξεκινά με πλήρεις διατροφικές απαιτήσεις
+    # Επαναλαμβάνεται μέχρι το κόστος να είναι εντός ορίων ή το Q_scale να πέσει πολύ
+    while Q_scale >= MIN_Q_SCALE:
+        Q = original_Q * Q_scale
+        selected = []
+        for category, available in pools.items():
+            available = list(available)
+            rng.shuffle(available)
+            selected.extend(available[:day_categories[category]])
+
+        A_day = A[:, selected]
+        # Τα όρια ποσότητας [0.1, 20] επιβάλλονται μέσα στη λύση, όχι με αποκοπή μετά
+        T, residual, free = _bounded_solve(A, selected, Q, cache=cache)
+
+        # Ελέγχει αν τα υπολείμματα είναι υπερβολικά υψηλά (κακή διατροφική προσαρμογή)
+        if _overdetermined(A_day) and residual > sum(Q) * 0.5:
+            Q_scale -= Q_SCALE_STEP
+            continue
+
+        C_day = C[selected]
+        if np.any(C_day <= 0):
+            raise InfeasibleError(f"Μη έγκυρο κόστος σε κάποια τροφή για την {day}. Ελέγξτε τα JSON αρχεία.")
+        total_cost = float(np.dot(C_day, T))
+        if total_cost <= max_cost_per_day:
+            return selected, T, total_cost, Q_scale
+        Q_scale -= Q_SCALE_STEP
+    raise _no_menu_error(day, max_cost_per_day)
+
+def _cached_linprog(cache, kind, rows, structure, c, A_ub, b_ub, lower=0.0, upper=np.inf):
+    """linprog_simplex through the solve cache; an infeasible program is cached as None."""
+    def solve():
+        try:
+            return linprog_simplex(c, A_ub, b_ub, lower=lower, upper=upper)["x"]
+        except InfeasibleError:
+            return None
+    return _cached(cache, solve, kind, rows, structure, c, b_ub, lower, upper)
+
+def _plan_day_lp(A, original_Q, C, pools, day_categories, day, max_cost_per_day, cache=None):
+    """Minimum-cost menu from an LP over every candidate food of the day's categories.
+
+    The LP requires A x >= Q, C x <= max_cost_per_day, 0 <= x <= MAX_PORTION
+    per food and, per category with count k, between k * MIN_PORTION and
+    k * MAX_PORTION units in total. Every category then keeps exactly k foods,
+    those with the largest quantities and otherwise the best ΣΗΠ coverage per
+    euro, and their quantities are solved again between MIN_PORTION and
+    MAX_PORTION.
+    """
+    rows = np.array([idx for available in pools.values() for idx in available], dtype=np.intp)
+    if np.any(C[rows] <= 0):
+        raise InfeasibleError(f"Μη έγκυρο κόστος σε κάποια τροφή για την {day}. Ελέγξτε τα JSON αρχεία.")
+    n = len(rows)
+    membership = np.zeros((len(pools), n))
+    counts = np.empty(len(pools), dtype=np.intp)
+    start = 0
+    for i, (category, available) in enumerate(pools.items()):
+        membership[i, start:start + len(available)] = 1.0
+        counts[i] = day_categories[category]
+        start += len(available)
+    A_ub = np.vstack([-A[:, rows], C[rows][None, :], -membership, membership])
+
+    Q_scale = 1.0
+    while Q_scale >= MIN_Q_SCALE:
+        b_ub = np.concatenate([-original_Q * Q_scale, [max_cost_per_day], -counts * MIN_PORTION, counts * MAX_PORTION])
+        x = _cached_linprog(cache, "lp-day", rows, [len(available) for available in pools.values()], C[rows], A_ub, b_ub, upper=MAX_PORTION)
+        if x is not None:
+            value = _value_per_euro(A, original_Q, C, rows)
+            selected = [rows[position] for i in range(len(pools))
+                        for position in _top_slots(np.flatnonzero(membership[i]), x, value, counts[i])]
+            T = _portion_lp(A, original_Q * Q_scale, C, selected, max_cost_per_day, cache)
+            if T is not None:
+                return selected, T, float(np.dot(C[selected], T)), Q_scale
+        Q_scale -= Q_SCALE_STEP
+    raise _no_menu_error(day, max_cost_per_day)
+
+def _value_per_euro(A, Q, C, rows):
+    """ΣΗΠ coverage per euro of the given foods, each nutrient counted up to its target."""
+    rows = np.asarray(rows, dtype=np.intp)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coverage = np.nan_to_num(np.minimum(A[:, rows] / Q[:, None], 1.0)).sum(axis=0)
+    return coverage / C[rows]
+
+def _top_slots(positions, x, value, count):
+    """The count positions with the largest LP quantity, ties and zero quantities ordered by value."""
+    quantity = np.where(x[positions] > LP_ZERO_TOL, x[positions], 0.0)
+    order = np.lexsort((-value[positions], -quantity))
+    return positions[order[:count]]
+
+def _portion_lp(A, Q, C, selected, max_cost_per_day, cache=None):
+    """Cheapest quantities in [MIN_PORTION, MAX_PORTION] of the selected foods covering Q, or None."""
+    A_ub = np.vstack([-A[:, selected], C[selected][None, :]])
+    b_ub = np.concatenate([-Q, [max_cost_per_day]])
+    return _cached_linprog(cache, "lp-day-portions", selected, None, C[selected], A_ub, b_ub, MIN_PORTION, MAX_PORTION)
+
+def _prefilter_pool(A, Q, C, pool):
+    """Keep the SELECTION_POOL_LIMIT foods with the best ΣΗΠ coverage per euro."""
+    if len(pool) <= SELECTION_POOL_LIMIT:
+        return list(pool)
+    pool = np.asarray(pool)
+    order = np.argsort(-_value_per_euro(A, Q, C, pool), kind='stable')
+    return pool[order[:SELECTION_POOL_LIMIT]].tolist()
+
+def _selection_score(A, Q, C, selected, max_cost_per_day, x0=None, cache=None):
+    """Bounded solve for a food selection; lower score is better, over-budget is infinite."""
+    T, residual, free = _bounded_solve(A, selected, Q, x0=x0, cache=cache)
+    total_cost = float(np.dot(C[selected], T))
+    score = residual / max(float(Q @ Q), 1e-12) + SELECTION_COST_WEIGHT * total_cost / max_cost_per_day
+    if total_cost > max_cost_per_day:
+        score = np.inf
+    return score, T, residual, total_cost
+
+def _slot_selection(initial, slots, category_codes):
+    """Arrange a previous selection in slot order, or None if it no longer fills the slots."""
+    by_category = {}
+    for idx in initial:
+        by_category.setdefault(CATEGORY_NAMES[category_codes[idx]], []).append(idx)
+    if any(len(by_category.get(category, [])) != slots.count(category) for category in set(slots) | set(by_category)):
+        return None
+    return [by_category[category].pop(0) for category in slots]
+
+def _select_foods(A, Q, C, pools, day_categories, max_cost_per_day, cache=None, initial=None):
+    """Greedy construction followed by swap local search within each category slot.
+
+    ``initial`` is a ready selection (already in slot order) to start the
+    local search from instead of building one greedily.
+    Returns ``(selected, T, residual, total_cost, score)`` for the best selection found.
+    """
+    pools = {category: _prefilter_pool(A, Q, C, pool) for category, pool in pools.items()}
+    slots = [category for category, pool in pools.items() for _ in range(day_categories[category])]
+
+    # Άπληστη κατασκευή: κάθε θέση παίρνει την τροφή που βελτιώνει περισσότερο τη μερική λύση
+    selected = list(initial) if initial is not None else []
+    for category in slots[len(selected):]:
+        best = None
+        for idx in pools[category]:
+            if idx in selected:
+                continue
+            score, T, residual, total_cost = _selection_score(A, Q, C, selected + [idx], np.inf, cache=cache)
+            if best is None or score < best[0]:
+                best = (score, idx)
+        selected.append(best[1])
+
+    score, T, residual, total_cost = _selection_score(A, Q, C, selected, max_cost_per_day, cache=cache)
+    # Τοπική αναζήτηση: ανταλλαγή μιας τροφής με άλλη της ίδιας κατηγορίας όσο βελτιώνεται το σκορ
+    for _ in range(SELECTION_MAX_PASSES):
+        improved = False
+        for position, category in enumerate(slots):
+            for idx in pools[category]:
+                if idx in selected:
+                    continue
+                candidate = selected[:position] + [idx] + selected[position + 1:]
+                result = _selection_score(A, Q, C, candidate, max_cost_per_day, x0=T, cache=cache)
+                if result[0] < score - 1e-12:
+                    selected = candidate
+                    score, T, residual, total_cost = result
+                    improved = True
+        if not improved:
+            break
+    return selected, T, residual, total_cost, score
+
+def _plan_day_greedy(A, original_Q, C, pools, day_categories, day, max_cost_per_day, cache=None, initial=None):
+    Q_scale = 1.0
+    while Q_scale >= MIN_Q_SCALE:
+        Q = original_Q * Q_scale
+        selected, T, residual, total_cost, score = _select_foods(A, Q, C, pools, day_categories, max_cost_per_day, cache, initial)
+        if np.any(C[selected] <= 0):
+            raise InfeasibleError(f"Μη έγκυρο κόστος σε κάποια τροφή για την {day}. Ελέγξτε τα JSON αρχεία.")
+        too_high = _overdetermined(A[:, selected]) and residual > sum(Q) * 0.5
+        if np.isfinite(score) and not too_high:
+            return selected, T, total_cost, Q_scale
+        Q_scale -= Q_SCALE_STEP
+    raise _no_menu_error(day, max_cost_per_day)
+
+def _plan_week_lp(A, original_Q, C, foods_by_category, max_cost_per_day, cache=None):
+    """One minimum-cost LP over all seven days.
+
+    Variables are the quantity of every allowed food on every day (fish only
+    on FISH_DAYS, meat on the others), each between 0 and MAX_PORTION.
+    Constraints: at least Q_scale x ΣΗΠ on every day, so the ``q_scale``
+    reported for each day holds for that day, a weekly budget of
+    7 x max_cost_per_day shared across the days, and the per-day category
+    totals of the daily LP. Day by day, every category with count k then keeps
+    the k foods with the largest quantities among those not chosen on earlier
+    days, and the quantities of the whole week are solved again by
+    _week_portion_lp.
+    """
+    day_rows, day_counts = [], []
+    for day in DAYS:
+        day_categories = daily_categories(day)
+        pools = {category: foods_by_category.get(category, []) for category, count in day_categories.items() if count > 0}
+        for category, pool in pools.items():
+            if len(pool) < day_categories[category]:
+                raise InfeasibleError(f"Δεν υπάρχουν αρκετές τροφές στην κατηγορία '{category}' για την {day}. Χρειάζονται {day_categories[category]}, βρέθηκαν {len(pool)}.")
+        day_rows.append([np.asarray(pool, dtype=np.intp) for pool in pools.values()])
+        day_counts.append([day_categories[category] for category in pools])
+
+    rows = np.concatenate([np.concatenate(pools) for pools in day_rows])
+    if np.any(C[rows] <= 0):
+        raise InfeasibleError("Μη έγκυρο κόστος σε κάποια τροφή. Ελέγξτε τα JSON αρχεία.")
+    m, n = len(original_Q), len(rows)
+    nutrients = A[:, rows]
+    daily = np.zeros((m * len(DAYS), n))
+    category_min = []
+    category_max = []
+    category_rows = []
+    start = 0
+    for d, pools in enumerate(day_rows):
+        width = sum(len(pool) for pool in pools)
+        daily[d * m:(d + 1) * m, start:start + width] = -nutrients[:, start:start + width]
+        offset = start
+        for pool, count in zip(pools, day_counts[d]):
+            row = np.zeros(n)
+            row[offset:offset + len(pool)] = 1.0
+            category_rows.append(row)
+            category_min.append(count * MIN_PORTION)
+            category_max.append(count * MAX_PORTION)
+            offset += len(pool)
+        start += width
+    category_rows = np.array(category_rows)
+    A_ub = np.vstack([daily, C[rows][None, :], -category_rows, category_rows])
+    structure = [len(pool) for pools in day_rows for pool in pools]
+    value = _value_per_euro(A, original_Q, C, rows)
+
+    Q_scale = 1.0
+    while Q_scale >= MIN_Q_SCALE:
+        b_ub = np.concatenate([
+            np.tile(-original_Q * Q_scale, len(DAYS)),
+            [max_cost_per_day * len(DAYS)], -np.array(category_min), np.array(category_max),
+        ])
+        x = _cached_linprog(cache, "lp-week", rows, structure, C[rows], A_ub, b_ub, upper=MAX_PORTION)
+        if x is None:
+            Q_scale -= Q_SCALE_STEP
+            continue
+        # Όπως στα ημερήσια μενού, κάθε τροφή επιλέγεται μία φορά την εβδομάδα όσο φτάνουν οι τροφές της κατηγορίας
+        used = np.zeros(A.shape[1], dtype=bool)
+        week_selected = []
+        start = 0
+        for pools, counts in zip(day_rows, day_counts):
+            selected = []
+            for pool, count in zip(pools, counts):
+                positions = start + np.arange(len(pool))
+                chosen = _top_slots(positions[~used[pool]], x, value, count)
+                if len(chosen) < count:
+                    chosen = np.concatenate([chosen, _top_slots(np.setdiff1d(positions, chosen), x, value, count - len(chosen))])
+                selected.extend(rows[chosen].tolist())
+                start += len(pool)
+            used[selected] = True
+            week_selected.append(selected)
+        T_week = _week_portion_lp(A, original_Q * Q_scale, C, week_selected, max_cost_per_day, cache)
+        if T_week is None:
+            Q_scale -= Q_SCALE_STEP
+            continue
+        weekly_menu = []
+        start = 0
+        for day, selected in zip(DAYS, week_selected):
+            T = T_week[start:start + len(selected)]
+            weekly_menu.append({"day": day, "indices": selected, "T": T, "total_cost": float(np.dot(C[selected], T)), "q_scale": Q_scale})
+            start += len(selected)
+        return weekly_menu
+    raise InfeasibleError(f"Δεν ήταν δυνατόν να βρεθεί εβδομαδιαίο μενού με κόστος κάτω από {max_cost_per_day * len(DAYS):.2f} €, ακόμα και με ΣΗΠ μειωμένο στο {MIN_Q_SCALE * 100:.0f}%. Προσθέστε φθηνότερες τροφές.")
+
+def _week_portion_lp(A, Q, C, week_selected, max_cost_per_day, cache=None):
+    """Cheapest quantities in [MIN_PORTION, MAX_PORTION] of the foods chosen for every day, or None.
+
+    Every day covers Q, the week stays within 7 x max_cost_per_day, and a food
+    chosen on several days gets at most MAX_PORTION units over the week.
+    """
+    selected = np.concatenate([np.asarray(day_selected, dtype=np.intp) for day_selected in week_selected])
+    m, n = len(Q), len(selected)
+    coverage = np.zeros((m * len(week_selected), n))
+    start = 0
+    for d, day_selected in enumerate(week_selected):
+        coverage[d * m:(d + 1) * m, start:start + len(day_selected)] = -A[:, day_selected]
+        start += len(day_selected)
+    foods, times = np.unique(selected, return_counts=True)
+    repeated = foods[times > 1]
+    caps = (selected[None, :] == repeated[:, None]).astype(np.float64)
+    A_ub = np.vstack([coverage, C[selected][None, :], caps])
+    b_ub = np.concatenate([np.tile(-Q, len(week_selected)), [max_cost_per_day * len(week_selected)], np.full(len(repeated), MAX_PORTION)])
+    structure = [len(day_selected) for day_selected in week_selected]
+    return _cached_linprog(cache, "lp-week-portions", selected, structure, C[selected], A_ub, b_ub, MIN_PORTION, MAX_PORTION)
+
+def plan_weekly_menu(A, Q, C, category_codes, max_cost_per_day=MAX_COST_PER_DAY, rng=None, method="random", prune=False, cache=None, progress=None):
+    """Plan seven daily menus, trying the full ΣΗΠ first and shrinking it if needed.
+
+    ``category_codes`` holds the CATEGORY_NAMES index of every column of A
+    (e.g. ``FoodTable.category_codes``). With ``method="random"`` each day
+    picks CATEGORIES_PER_DAY foods at random and solves for their quantities;
+    ``method="lp"`` runs one minimum-cost linear program per day and scale;
+    ``method="greedy"`` chooses the foods of every slot by greedy construction
+    plus swap local search on the bounded-solve residual and cost;
+    ``method="week"`` optimizes all seven days jointly as one LP with the
+    ΣΗΠ on every day and a weekly budget shared across the days. With ``prune=True`` every method
+    only considers the Pareto-optimal foods of each category (see
+    ``pareto_front``), topped up with further fronts where a category would
+    otherwise run out of distinct foods for the week. A SolveCache passed as
+    ``cache`` serves repeated solves of the same food rows and ΣΗΠ.
+    ``progress(days_done, total_days)`` is called after every planned day; an
+    exception raised from it aborts the plan.
+    Returns a list of per-day dicts with the selected column ``indices``,
+    quantities ``T``, ``total_cost`` and the ``q_scale`` that was finally used.
+    """
+    if method not in PLANNER_METHODS:
+        raise ValueError(f"Άγνωστη μέθοδος: {method}")
+    A = np.asarray(A, dtype=np.float64)
+    original_Q = np.asarray(Q, dtype=np.float64)
+    C = np.asarray(C, dtype=np.float64)
+    rng = rng if rng is not None else random.Random()
+    foods_by_category = _group_by_category(category_codes)
+    if prune:
+        foods_by_category = _pareto_pools(A, C, foods_by_category)
+    if method == "week":
+        weekly_menu = _plan_week_lp(A, original_Q, C, foods_by_category, max_cost_per_day, cache)
+        if progress is not None:
+            progress(len(DAYS), len(DAYS))
+        return weekly_menu
+    used_food_indices = set()
+    weekly_menu = []
+
+    for day_number, day in enumerate(DAYS, 1):
+        day_categories = daily_categories(day)
+        pools = _day_candidates(foods_by_category, day_categories, used_food_indices, day)
+        if method == "lp":
+            selected, T, total_cost, Q_scale = _plan_day_lp(A, original_Q, C, pools, day_categories, day, max_cost_per_day, cache)
+        elif method == "greedy":
+            selected, T, total_cost, Q_scale = _plan_day_greedy(A, original_Q, C, pools, day_categories, day, max_cost_per_day, cache)
+        else:
+            selected, T, total_cost, Q_scale = _plan_day_random(A, original_Q, C, pools, day_categories, day, max_cost_per_day, rng, cache)
+        weekly_menu.append({"day": day, "indices": selected, "T": T, "total_cost": total_cost, "q_scale": Q_scale})
+        used_food_indices.update(selected)
+        if progress is not None:
+            progress(day_number, len(DAYS))
+
+    return weekly_menu
+
+def _perturbations(rng, distribution, n_samples, m):
+    if distribution == "uniform":
+        return rng.uniform(0.95, 1.05, size=(n_samples, m))  # ±5% uniform
+    return np.clip(rng.normal(1.0, 0.015, size=(n_samples, m)), 0.95, 1.05)  # ~±5% in 2 std
+
+def _solve_perturbed_batched(A, Q, idx, perturbations, progress=None):
+    """Least-squares solutions for a stack of copies of A with column idx scaled."""
+    m, n = A.shape
+    rcond = np.finfo(np.float64).eps * max(m, n)
+    chunk = max(1, SENSITIVITY_CHUNK_BYTES // (A.nbytes * 2))
+    T_new = np.empty((len(perturbations), n))
+    for start in range(0, len(perturbations), chunk):
+        block = perturbations[start:start + chunk]
+        stack = np.broadcast_to(A, (len(block), m, n)).copy()
+        stack[:, :, idx] *= block
+        T_new[start:start + chunk] = np.linalg.pinv(stack, rcond=rcond) @ Q
+        if progress is not None:
+            progress(start + len(block))
+    return T_new
+
+def _gram_inverse(A):
+    """(A A^T)^-1 from a thin SVD of a full-row-rank A, computed once per analysis."""
+    U, s, Vt = np.linalg.svd(A, full_matrices=False)
+    return (U / s ** 2) @ U.T
+
+def _solve_perturbed_rank1(A, Q, idx, perturbations, G_inv, progress=None):
+    """Minimum-norm solutions for column idx scaled, via Woodbury updates of (A A^T)^-1.
+
+    Scaling one column changes A A^T by a' a'^T - a a^T, so each sample only
+    needs a 2x2 solve on top of the base factorization instead of a new SVD.
+    """
+    m, n = A.shape
+    a = A[:, idx]
+    y0 = G_inv @ Q
+    h = G_inv @ a
+    chunk = max(1, SENSITIVITY_CHUNK_BYTES // (8 * (n + 4 * m)))
+    T_new = np.empty((len(perturbations), n))
+    for start in range(0, len(perturbations), chunk):
+        a_new = a * perturbations[start:start + chunk]          # (s, m)
+        h_new = a_new @ G_inv                                   # (s, m)
+        K = np.empty((len(a_new), 2, 2))
+        K[:, 0, 0] = 1 + np.einsum('ij,ij->i', a_new, h_new)
+        K[:, 0, 1] = a_new @ h
+        K[:, 1, 0] = h_new @ a
+        K[:, 1, 1] = -1 + a @ h
+        r = np.stack([a_new @ y0, np.full(len(a_new), a @ y0)], axis=1)
+        z = np.linalg.solve(K, r[:, :, None])[:, :, 0]
+        y = y0 - h_new * z[:, :1] - h[None, :] * z[:, 1:]      # (A' A'^T)^-1 Q
+        block = y @ A
+        block[:, idx] = np.einsum('ij,ij->i', a_new, y)
+        T_new[start:start + chunk] = block
+        if progress is not None:
+            progress(start + len(a_new))
+    return T_new
+
+def _food_sensitivity(A, Q, C, T_base, base_cost, idx, distribution, n_samples, rng, G_inv=None, progress=None):
+    perturbations = _perturbations(rng, distribution, n_samples, A.shape[0])
+    if G_inv is not None:
+        T_new = _solve_perturbed_rank1(A, Q, idx, perturbations, G_inv, progress)
+    else:
+        T_new = _solve_perturbed_batched(A, Q, idx, perturbations, progress)
+    T_new = np.maximum(T_new, 0)
+    avg_delta_quantity = np.mean(np.abs(T_new[:, idx] - T_base[idx]))
+    avg_delta_cost = np.mean(np.abs(T_new @ C - base_cost))
+    if T_base[idx] > 0:
+        avg_delta_quantity = (avg_delta_quantity / T_base[idx]) * 100
+    if base_cost > 0:
+        avg_delta_cost = (avg_delta_cost / base_cost) * 100
+    return float(avg_delta_quantity), float(avg_delta_cost)
+
+# Per-process state of sensitivity workers, filled once by the pool initializer
+_worker_state = {}
+
+def _init_sensitivity_worker(shm_name, shape, args):
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)
+    except TypeError:   # Python < 3.13
+        shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state["shm"] = shm
+    _worker_state["A"] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker_state["args"] = args
+
+def _sensitivity_task(idx, stream):
+    Q, C, T_base, base_cost, distribution, n_samples, G_inv = _worker_state["args"]
+    return _food_sensitivity(_worker_state["A"], Q, C, T_base, base_cost, idx, distribution, n_samples, np.random.default_rng(stream), G_inv)
+
+def _collect(futures, progress, n_samples):
+    """Results of futures in order, reporting n_samples per finished food and cancelling the rest on error."""
+    results = []
+    try:
+        for future in futures:
+            results.append(future.result())
+            if progress is not None:
+                progress(len(results) * n_samples)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return results
+
+def _parallel_sensitivities(A, args, indices, streams, workers, executor, progress=None):
+    Q, C, T_base, base_cost, distribution, n_samples, G_inv = args
+    if executor == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_food_sensitivity, A, Q, C, T_base, base_cost, idx, distribution, n_samples, np.random.default_rng(stream), G_inv)
+                       for idx, stream in zip(indices, streams)]
+            return _collect(futures, progress, n_samples)
+    # Ο πίνακας A μοιράζεται μέσω κοινής μνήμης αντί να γίνεται pickle σε κάθε εργασία
+    shm = shared_memory.SharedMemory(create=True, size=max(A.nbytes, 1))
+    try:
+        np.ndarray(A.shape, dtype=np.float64, buffer=shm.buf)[:] = A
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sensitivity_worker, initargs=(shm.name, A.shape, args)) as pool:
+            futures = [pool.submit(_sensitivity_task, idx, stream) for idx, stream in zip(indices, streams)]
+            return _collect(futures, progress, n_samples)
+    finally:
+        shm.close()
+        shm.unlink()
+
+def sensitivity_analysis(A, Q, C, indices, distribution="uniform", n_samples=10, seed=None, method="rank1", workers=1, executor="process", progress=None):
+    """Monte Carlo sensitivity of quantity and cost to ±5% noise on each food's column.
+
+    With ``method="rank1"`` the base matrix is factorized once and each sample
+    is a low-rank update of it; ``method="batched"`` solves all ``n_samples``
+    perturbed matrices of a food as one stacked pinv batch. With ``workers`` > 1
+    the foods are spread over a process pool (A is shared through shared
+    memory) or a thread pool. Every food draws from its own stream spawned from
+    ``seed``, so results are reproducible for a fixed seed whatever the worker
+    count. ``progress(samples_done, total_samples)`` is called as samples are
+    solved (per chunk when serial, per food with workers); an exception raised
+    from it aborts the analysis. Returns the base solution and a
+    ``sensitivities`` dict mapping every column in ``indices`` to
+    ``(avg_delta_quantity_pct, avg_delta_cost_pct)``.
+    """
+    A = np.ascontiguousarray(A, dtype=np.float64)
+    Q = np.asarray(Q, dtype=np.float64)
+    C = np.asarray(C, dtype=np.float64)
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Άγνωστη κατανομή: {distribution}")
+    if n_samples < 1:
+        raise ValueError("Ο αριθμός δειγμάτων πρέπει να είναι θετικός.")
+    if method not in SENSITIVITY_METHODS:
+        raise ValueError(f"Άγνωστη μέθοδος: {method}")
+    if executor not in EXECUTORS:
+        raise ValueError(f"Άγνωστος εκτελεστής: {executor}")
+    m, n = A.shape
+
+    T_base, residuals, rank, s = np.linalg.lstsq(A, Q, rcond=None)
+    if rank < m:
+        raise InfeasibleError("Το σύστημα είναι υποκαθορισμένο ή προβληματικό. Δοκιμάστε διαφορετικές τροφές.")
+    T_base = np.maximum(T_base, 0)
+    base_cost = float(np.dot(T_base, C))
+    G_inv = _gram_inverse(A) if method == "rank1" else None
+
+    indices = list(indices)
+    streams = np.random.SeedSequence(seed).spawn(len(indices))
+    total_samples = len(indices) * n_samples
+    report = None if progress is None else (lambda done: progress(done, total_samples))
+    if workers > 1 and len(indices) > 1:
+        args = (Q, C, T_base, base_cost, distribution, n_samples, G_inv)
+        results = _parallel_sensitivities(A, args, indices, streams, min(workers, len(indices)), executor, report)
+    else:
+        results = []
+        for position, (idx, stream) in enumerate(zip(indices, streams)):
+            food_report = None if report is None else (lambda done, offset=position * n_samples: report(offset + done))
+            results.append(_food_sensitivity(A, Q, C, T_base, base_cost, idx, distribution, n_samples, np.random.default_rng(stream), G_inv, food_report))
+    sensitivities = dict(zip(indices, results))
+
+    return {"T_base": T_base, "base_cost": base_cost, "rank": int(rank), "sensitivities": sensitivities}
+
+def cost_per_unit(A, C):
+    """Nutrients x foods matrix of cost per unit of each nutrient, inf where a food lacks it."""
+    A = np.asarray(A, dtype=np.float64)
+    C = np.asarray(C, dtype=np.float64)
+    out = np.full(A.shape, np.inf)
+    np.divide(C[None, :], A, out=out, where=A > 0)
+    return out
+
+def _top_rows(values, k, largest):
+    """Rows of the k largest (or smallest) finite values, best first."""
+    k = min(k, len(values))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    keys = -values if largest else values
+    rows = np.argpartition(keys, k - 1)[:k]
+    rows = rows[np.argsort(keys[rows], kind="stable")]
+    return rows[np.isfinite(values[rows])]
+
+def catalogue_analytics(A, C, category_codes, top_k=ANALYTICS_TOP_K):
+    """Per-nutrient and per-category statistics of the whole catalogue in a few array passes.
+
+    Returns plain dicts and lists (row indices into A) so the result can go
+    straight to the GUI, a CLI or a JSON export:
+
+    - ``max_value``: per nutrient, the maximum value and every row reaching it
+    - ``min_cost_per_unit``: per nutrient, the cheapest cost per unit and its
+      row, or None when no food contains the nutrient
+    - ``top_value`` / ``top_cost_per_unit``: per nutrient, the ``top_k`` rows
+      with the highest value and with the lowest cost per unit
+    - ``categories``: per category, the food count, mean cost and the
+      per-nutrient maximum value and minimum cost per unit
+    """
+    A = np.asarray(A, dtype=np.float64)
+    C = np.asarray(C, dtype=np.float64)
+    category_codes = np.asarray(category_codes, dtype=np.intp)
+    m, n = A.shape
+    if n == 0:
+        raise ValueError("Δεν υπάρχουν τροφές.")
+    unit_costs = cost_per_unit(A, C)
+    max_values = A.max(axis=1)
+    min_rows = unit_costs.argmin(axis=1)
+    min_costs = unit_costs[np.arange(m), min_rows]
+
+    # Ανά κατηγορία: μέγιστα και ελάχιστα με μία συσσώρευση για όλες τις τροφές
+    n_categories = len(CATEGORY_NAMES)
+    counts = np.bincount(category_codes, minlength=n_categories)
+    cost_sums = np.bincount(category_codes, weights=C, minlength=n_categories)
+    category_max = np.full((n_categories, m), -np.inf)
+    category_min_cost = np.full((n_categories, m), np.inf)
+    np.maximum.at(category_max, category_codes, A.T)
+    np.minimum.at(category_min_cost, category_codes, unit_costs.T)
+
+    analytics = {"max_value": {}, "min_cost_per_unit": {}, "top_value": {}, "top_cost_per_unit": {}, "categories": {}}
+    for i, nutrient in enumerate(NUTRIENTS):
+        analytics["max_value"][nutrient] = {"value": float(max_values[i]), "rows": np.flatnonzero(A[i] == max_values[i]).tolist()}
+        analytics["min_cost_per_unit"][nutrient] = {"value": float(min_costs[i]), "row": int(min_rows[i])} if np.isfinite(min_costs[i]) else None
+        analytics["top_value"][nutrient] = _top_rows(A[i], top_k, largest=True).tolist()
+        analytics["top_cost_per_unit"][nutrient] = _top_rows(unit_costs[i], top_k, largest=False).tolist()
+    for code, category in enumerate(CATEGORY_NAMES):
+        if not counts[code]:
+            continue
+        analytics["categories"][category] = {
+            "count": int(counts[code]),
+            "mean_cost": float(cost_sums[code] / counts[code]),
+            "max_value": dict(zip(NUTRIENTS, category_max[code].tolist())),
+            "min_cost_per_unit": {nutrient: (value if np.isfinite(value) else None) for nutrient, value in zip(NUTRIENTS, category_min_cost[code].tolist())},
+        }
+    return analytics
+
+def pareto_front(A, C, rows=None):
+    """Rows of the foods no other food dominates on cost and nutrients, in ascending order.
+
+    A food is dominated when another costs no more and has at least as much of
+    every nutrient, and is strictly better in one of them. Sort-filter skyline:
+    identical foods are merged, then sorted by the sum of their normalized
+    coordinates so that no food can be dominated by a later one. They are
+    scanned in blocks of PARETO_BLOCK, each block compared as one array
+    operation with the front found so far (strongest foods first, dropping
+    candidates as soon as they are dominated) and with its own members. The
+    cost is about O(n x front size) rather than O(n^2). ``rows`` restricts the
+    search to those columns of A.
+    """
+    A = np.asarray(A, dtype=np.float64)
+    C = np.asarray(C, dtype=np.float64)
+    rows = np.arange(A.shape[1]) if rows is None else np.asarray(rows, dtype=np.intp)
+    if rows.size == 0:
+        return rows
+    # Όλες οι συντεταγμένες ελαχιστοποιούνται: κόστος και αρνητικά θρεπτικά
+    points, inverse = np.unique(np.vstack([C[rows][None, :], -A[:, rows]]), axis=1, return_inverse=True)
+    low = points.min(axis=1, keepdims=True)
+    span = np.ptp(points, axis=1, keepdims=True)
+    span[span == 0] = 1.0
+    order = np.argsort(((points - low) / span).sum(axis=0), kind="stable")
+    points = np.ascontiguousarray(points[:, order])
+
+    def no_worse(front, block):
+        # Για διακριτά σημεία, "όχι χειρότερο σε καμία διάσταση" σημαίνει κυριαρχία
+        result = front[0][:, None] <= block[0][None, :]
+        for d in range(1, len(front)):
+            result &= front[d][:, None] <= block[d][None, :]
+        return result
+
+    front = np.empty((points.shape[0], 0))
+    kept = []
+    for start in range(0, points.shape[1], PARETO_BLOCK):
+        block = points[:, start:start + PARETO_BLOCK]
+        candidates = np.arange(block.shape[1])
+        for front_start in range(0, front.shape[1], PARETO_CHUNK):
+            if not candidates.size:
+                break
+            candidates = candidates[~no_worse(front[:, front_start:front_start + PARETO_CHUNK], block[:, candidates]).any(axis=0)]
+        if candidates.size:
+            dominance = no_worse(block[:, candidates], block[:, candidates])
+            np.fill_diagonal(dominance, False)
+            candidates = candidates[~dominance.any(axis=0)]
+        front = np.hstack([front, block[:, candidates]])
+        kept.append(start + candidates)
+    on_front = np.zeros(points.shape[1], dtype=bool)
+    on_front[order[np.concatenate(kept)]] = True
+    return np.sort(rows[on_front[inverse.ravel()]])
+
+def _resolve_day_quantities(A, original_Q, C, selected, T0, max_cost_per_day):
+    """Warm-started bounded re-solve of a kept selection, shrinking the ΣΗΠ as the random planner does."""
+    Q_scale = 1.0
+    while Q_scale >= MIN_Q_SCALE:
+        Q = original_Q * Q_scale
+        T, residual, free = bounded_lstsq(A[:, selected], Q, MIN_PORTION, MAX_PORTION, x0=T0)
+        total_cost = float(np.dot(C[selected], T))
+        if not (_overdetermined(A[:, selected]) and residual > sum(Q) * 0.5) and total_cost <= max_cost_per_day:
+            return T, total_cost, Q_scale
+        Q_scale -= Q_SCALE_STEP
+    return None
+
+def replan_weekly_menu(A, Q, C, category_codes, previous, changed_rows=None, max_cost_per_day=MAX_COST_PER_DAY,
+                       rng=None, method="random", prune=False, cache=None):
+    """Update a plan from plan_weekly_menu after one food column or the ΣΗΠ changed.
+
+    With ``changed_rows`` (edited foods) only the days using one of them are
+    planned again; without it (a ΣΗΠ change) every day is. A re-planned day
+    starts from its previous solution where the method allows it: the random
+    method keeps its foods and warm-starts their quantities, falling back to a
+    new draw if they no longer fit, and the greedy method starts its swap
+    search from the previous foods. The LP methods solve their program again.
+    Other days are returned unchanged and their foods stay reserved.
+    """
+    if method not in PLANNER_METHODS:
+        raise ValueError(f"Άγνωστη μέθοδος: {method}")
+    A = np.asarray(A, dtype=np.float64)
+    original_Q = np.asarray(Q, dtype=np.float64)
+    C = np.asarray(C, dtype=np.float64)
+    if method == "week":
+        return plan_weekly_menu(A, original_Q, C, category_codes, max_cost_per_day, rng, method, prune, cache)
+    rng = rng if rng is not None else random.Random()
+    foods_by_category = _group_by_category(category_codes)
+    if prune:
+        foods_by_category = _pareto_pools(A, C, foods_by_category)
+    changed = None if changed_rows is None else set(changed_rows)
+    weekly_menu = [dict(day_plan) for day_plan in previous]
+
+    for position, day_plan in enumerate(weekly_menu):
+        if changed is not None and changed.isdisjoint(day_plan["indices"]):
+            continue
+        day = day_plan["day"]
+        day_categories = daily_categories(day)
+        used_food_indices = {idx for other in weekly_menu if other is not day_plan for idx in other["indices"]}
+        pools = _day_candidates(foods_by_category, day_categories, used_food_indices, day)
+        slots = [category for category in pools for _ in range(day_categories[category])]
+        initial = _slot_selection(day_plan["indices"], slots, category_codes)
+        if method == "random" and initial is not None:
+            previous_T = dict(zip(day_plan["indices"], day_plan["T"]))
+            T0 = np.array([previous_T[idx] for idx in initial])
+            resolved = _resolve_day_quantities(A, original_Q, C, initial, T0, max_cost_per_day)
+            if resolved is not None:
+                T, total_cost, Q_scale = resolved
+                weekly_menu[position] = {"day": day, "indices": initial, "T": T, "total_cost": total_cost, "q_scale": Q_scale}
+                continue
+        if method == "lp":
+            selected, T, total_cost, Q_scale = _plan_day_lp(A, original_Q, C, pools, day_categories, day, max_cost_per_day, cache)
+        elif method == "greedy":
+            selected, T, total_cost, Q_scale = _plan_day_greedy(A, original_Q, C, pools, day_categories, day, max_cost_per_day, cache, initial)
+        else:
+            selected, T, total_cost, Q_scale = _plan_day_random(A, original_Q, C, pools, day_categories, day, max_cost_per_day, rng, cache)
+        weekly_menu[position] = {"day": day, "indices": selected, "T": T, "total_cost": total_cost, "q_scale": Q_scale}
+    return weekly_menu
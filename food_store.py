@@ -0,0 +1,624 @@
+"""Food catalogue storage for Diet Assistant.
+
+Reads and writes the JSON catalogue files without holding a second copy of
+the data: records are parsed one at a time, validated as they arrive and
+appended straight into a FoodTable. A binary cache of the parsed catalogue
+(NumPy arrays opened as memory maps plus a names index) makes later loads
+skip parsing altogether. SqliteFoodStore is an alternative backend that keeps
+the catalogue in an indexed SQLite database, and PriceHistory keeps dated
+price ticks per food. Like diet_engine, this module has no GUI dependencies.
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+
+import numpy as np
+
+from diet_engine import NUTRIENTS, CATEGORY_NAMES, FoodTable, validate_food
+
+READ_CHUNK_SIZE = 1 << 16       # Χαρακτήρες ανά ανάγνωση από το αρχείο
+PROGRESS_EVERY = 10000          # Αναφορά προόδου κάθε τόσες εγγραφές
+CACHE_VERSION = 1
+CACHE_ARRAYS = ("nutrients", "costs", "category_codes")
+HASH_CHUNK_SIZE = 1 << 20
+JOURNAL_OPS = ("add", "edit", "delete")
+IMPORT_BATCH_SIZE = 10000       # Εγγραφές ανά δέσμη ελέγχου κατά τη συγχώνευση
+# Στήλες SQLite για κάθε θρεπτικό συστατικό, με τη σειρά του NUTRIENTS
+NUTRIENT_COLUMNS = {nutrient: f"n{i}" for i, nutrient in enumerate(NUTRIENTS)}
+FOOD_COLUMNS = ("name", "category", "cost", *NUTRIENT_COLUMNS.values())
+
+_decoder = json.JSONDecoder()
+NUMBER_START = "-0123456789"
+_NUMBER_END = re.compile(r"[\s,\]}]")
+
+def iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array from a text file one at a time."""
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        # Κρατά μόνο το μη επεξεργασμένο τμήμα ώστε η μνήμη να μένει σταθερή
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    fill()
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != "[":
+        raise ValueError("Το αρχείο τροφών πρέπει να περιέχει λίστα JSON.")
+    position += 1
+    expect_value = True
+    while True:
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("Μη αναμενόμενο τέλος αρχείου JSON.")
+        if buffer[position] == "]":
+            return
+        if not expect_value:
+            if buffer[position] != ",":
+                raise ValueError(f"Αναμενόταν ',' στη θέση {position} του JSON.")
+            position += 1
+            expect_value = True
+            continue
+        # Ένας αριθμός στο τέλος του buffer μπορεί να συνεχίζεται στο επόμενο τμήμα
+        if buffer[position] in NUMBER_START:
+            while not eof and not _NUMBER_END.search(buffer, position):
+                fill()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            break
+        position = end
+        expect_value = False
+        yield value
+
+def stream_foods_into(table, path, progress=None):
+    """Append the validated foods of a JSON file to ``table`` and return how many were read.
+
+    Records are validated as they arrive. On any error the rows added from this
+    file are removed again before the exception propagates, so a bad file never
+    leaves a partial catalogue behind. ``progress(count, bytes_read, total_bytes)``
+    is called every PROGRESS_EVERY records and once at the end.
+    """
+    start_size = len(table)
+    total_bytes = os.path.getsize(path)
+    count = 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for food in iter_json_array(f):
+                validate_food(food)
+                table.append(food)
+                count += 1
+                if progress and count % PROGRESS_EVERY == 0:
+                    progress(count, f.buffer.tell(), total_bytes)
+    except Exception:
+        table.truncate(start_size)
+        raise
+    if progress:
+        progress(count, total_bytes, total_bytes)
+    return count
+
+def _import_fields(record):
+    """Pull the fields of one import record, raising ValueError with the reason it is unusable."""
+    if not isinstance(record, dict):
+        raise ValueError("Η εγγραφή δεν είναι αντικείμενο JSON.")
+    name = record.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Η τροφή δεν έχει έγκυρο όνομα.")
+    nutrients = record.get("nutrients")
+    if not isinstance(nutrients, dict) or set(nutrients.keys()) != set(NUTRIENTS):
+        raise ValueError(f"Η τροφή '{name}' δεν έχει τα σωστά θρεπτικά συστατικά: {NUTRIENTS}")
+    if "category" not in record:
+        raise ValueError(f"Η τροφή '{name}' δεν έχει πεδίο κατηγορίας.")
+    try:
+        values = [float(nutrients[nutrient]) for nutrient in NUTRIENTS]
+        cost = float(record["cost"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Η τροφή '{name}' έχει μη αριθμητικές τιμές ή δεν έχει κόστος.")
+    return name, values, cost, record["category"]
+
+def _merge_batch(table, batch, report, seen):
+    positions, names, values, costs, categories = [], [], [], [], []
+    for position, record in batch:
+        try:
+            name, nutrient_values, cost, category = _import_fields(record)
+        except ValueError as e:
+            report["rejected"].append({"record": position, "error": str(e)})
+            continue
+        positions.append(position)
+        names.append(name)
+        values.append(nutrient_values)
+        costs.append(cost)
+        categories.append(category)
+    if not names:
+        return
+    # Αριθμητικοί έλεγχοι για όλη τη δέσμη μαζί
+    values = np.array(values, dtype=np.float64)
+    costs = np.array(costs, dtype=np.float64)
+    category_index = {category: code for code, category in enumerate(CATEGORY_NAMES)}
+    codes = np.array([category_index.get(category, -1) for category in categories], dtype=np.int8)
+    problems = [
+        (~(costs > 0) | ~np.isfinite(costs), "Το κόστος για την τροφή '{}' πρέπει να είναι θετικό."),
+        (~np.isfinite(values).all(axis=1) | (values < 0).any(axis=1), "Οι τιμές θρεπτικών της τροφής '{}' πρέπει να είναι μη αρνητικές."),
+        (codes < 0, "Η κατηγορία της τροφής '{}' δεν είναι έγκυρη."),
+    ]
+    valid = np.ones(len(names), dtype=bool)
+    for failed, message in problems:
+        for i in np.flatnonzero(failed & valid):
+            report["rejected"].append({"record": positions[i], "error": message.format(names[i])})
+        valid &= ~failed
+    keep = np.flatnonzero(valid)
+    kept_names = [names[i] for i in keep]
+    unique_names = set(kept_names)
+    # Ονόματα που εμφανίστηκαν σε προηγούμενη δέσμη είναι διπλότυπα του αρχείου, όχι ενημερώσεις
+    repeated = len(unique_names & seen)
+    seen |= unique_names
+    report["duplicates"] += len(kept_names) - len(unique_names) + repeated
+    added, updated = table.upsert(kept_names, values[keep], costs[keep], codes[keep])
+    report["added"] += added
+    report["updated"] += updated - repeated
+
+def merge_foods_from(table, path, progress=None, batch_size=IMPORT_BATCH_SIZE):
+    """Upsert the foods of a JSON file into ``table`` by name and return an import report.
+
+    The file is streamed and checked a batch at a time; invalid records are
+    skipped and listed in the report instead of aborting the import. The report
+    holds the counts of ``added``, ``updated`` and in-file ``duplicates`` plus
+    ``rejected``, a list of ``{"record": position, "error": reason}``, sorted
+    by position. If the file itself is unreadable part-way through, the batches
+    already merged are rolled back and ``table`` is left as it was.
+    """
+    report = {"added": 0, "updated": 0, "duplicates": 0, "rejected": []}
+    total_bytes = os.path.getsize(path)
+    seen = set()
+    batch = []
+    count = 0
+    snapshot = table.snapshot()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for count, record in enumerate(iter_json_array(f), start=1):
+                batch.append((count - 1, record))
+                if len(batch) == batch_size:
+                    _merge_batch(table, batch, report, seen)
+                    batch = []
+                    if progress:
+                        progress(count, f.buffer.tell(), total_bytes)
+            _merge_batch(table, batch, report, seen)
+    except BaseException:
+        table.restore(snapshot)
+        raise
+    report["rejected"].sort(key=lambda rejection: rejection["record"])
+    if progress:
+        progress(count, total_bytes, total_bytes)
+    return report
+
+def load_food_table(paths, progress=None, cache_dir=None):
+    """Stream several catalogue files into one new FoodTable.
+
+    With ``cache_dir`` a valid binary cache of the same files is mapped instead,
+    and a fresh cache is written after parsing when there was none.
+    """
+    if cache_dir is not None:
+        table = load_cached_table(cache_dir, paths)
+        if table is not None:
+            return table
+    table = FoodTable()
+    for path in paths:
+        stream_foods_into(table, path, progress)
+    if cache_dir is not None:
+        try:
+            write_cache(cache_dir, table, paths)
+        except OSError:
+            pass  # Η cache είναι προαιρετική· ο πίνακας φορτώθηκε κανονικά
+    return table
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_signature(paths):
+    """Identify the catalogue files by path, size, mtime and content hash."""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append({"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _file_hash(path)})
+    return signature
+
+def _sources_unchanged(recorded, paths):
+    if len(recorded) != len(paths):
+        return False
+    for entry, path in zip(recorded, paths):
+        if entry["path"] != os.path.abspath(path) or not os.path.exists(path):
+            return False
+        stat = os.stat(path)
+        if stat.st_size != entry["size"]:
+            return False
+        # Ίδιο mtime σημαίνει ίδιο αρχείο· διαφορετικό mtime ελέγχεται με το hash
+        if stat.st_mtime_ns != entry["mtime_ns"] and _file_hash(path) != entry["sha256"]:
+            return False
+    return True
+
+def load_cached_table(cache_dir, paths):
+    """Map the cached catalogue for ``paths`` zero-copy, or return None if it is missing or stale.
+
+    The arrays are opened copy-on-write, so edits made in the GUI stay in memory
+    and never reach the cache file, and processes mapping the same cache share
+    its pages.
+    """
+    try:
+        with open(os.path.join(cache_dir, "index.json"), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if (index["version"] != CACHE_VERSION or index["nutrients"] != NUTRIENTS
+                or index["categories"] != CATEGORY_NAMES or not _sources_unchanged(index["sources"], paths)):
+            return None
+        nutrients, costs, category_codes = (np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="c") for name in CACHE_ARRAYS)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    names = index["names"]
+    if not (nutrients.shape == (len(names), len(NUTRIENTS)) and len(costs) == len(names) == len(category_codes)):
+        return None
+    return FoodTable.from_arrays(nutrients, costs, category_codes, names)
+
+def write_cache(cache_dir, table, paths):
+    """Write the binary cache of ``table`` for the catalogue files in ``paths``.
+
+    The cache is built in a sibling directory and swapped in, so a reader never
+    sees a half-written cache. An empty table is not cached.
+    """
+    if not len(table):
+        return
+    temp_dir = cache_dir + ".tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+    arrays = {"nutrients": table.matrix.T, "costs": table.costs, "category_codes": table.category_codes}
+    for name in CACHE_ARRAYS:
+        np.save(os.path.join(temp_dir, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+    index = {
+        "version": CACHE_VERSION,
+        "nutrients": NUTRIENTS,
+        "categories": CATEGORY_NAMES,
+        "sources": source_signature(paths),
+        "names": table.names,
+    }
+    with open(os.path.join(temp_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    old_dir = cache_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(cache_dir):
+        os.replace(cache_dir, old_dir)
+    os.replace(temp_dir, cache_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def write_foods(path, foods):
+    """Write foods in the same layout as json.dump(..., indent=4), one record at a time.
+
+    The records go to a temporary file that replaces ``path`` only once it is
+    complete and flushed to disk, so a crash leaves either the old or the new
+    catalogue, never a truncated one.
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        if not len(foods):
+            f.write("[]")
+        else:
+            f.write("[\n")
+            for i, food in enumerate(foods):
+                if i:
+                    f.write(",\n")
+                record = json.dumps(food, indent=4, ensure_ascii=False)
+                f.write("    " + record.replace("\n", "\n    "))
+            f.write("\n]")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def _base_signature(paths):
+    signature = []
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature.append({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+        else:
+            signature.append(None)
+    return signature
+
+class FoodJournal:
+    """Append-only log of catalogue edits made since the base file was last written.
+
+    Each line is one JSON operation (add, edit or delete by row), appended and
+    flushed on its own, so an edit costs one short write instead of rewriting
+    the catalogue. ``sources`` lists every file the base catalogue is loaded
+    from (by default only ``base_path``, which compaction writes). The first
+    line records the size and mtime of each of them; a journal whose base has
+    since changed (by a compaction or from outside) no longer applies and is
+    discarded. A torn last line left by a crash is ignored on replay.
+    """
+
+    def __init__(self, path, base_path, sources=None):
+        self.path = path
+        self.base_path = base_path
+        self.sources = list(sources) if sources is not None else [base_path]
+        self.pending = 0
+
+    def replay(self, table):
+        """Apply the journal to a freshly loaded ``table`` and return how many operations were applied."""
+        self.pending = 0
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("base") != _base_signature(self.sources):
+            self.reset()
+            return 0
+        # Η τελευταία γραμμή χωρίς '\n' είναι μισογραμμένη εγγραφή από διακοπή
+        for line in lines[1:-1]:
+            entry = json.loads(line)
+            if entry["op"] == "add":
+                validate_food(entry["food"])
+                table.append(entry["food"])
+            elif entry["op"] == "edit":
+                validate_food(entry["food"])
+                table[entry["row"]] = entry["food"]
+            elif entry["op"] == "delete":
+                del table[entry["row"]]
+            else:
+                raise ValueError(f"Άγνωστη εγγραφή ημερολογίου: {entry['op']}")
+            self.pending += 1
+        return self.pending
+
+    def record(self, op, row=None, food=None):
+        """Append one operation and flush it to disk."""
+        if op not in JOURNAL_OPS:
+            raise ValueError(f"Άγνωστη εγγραφή ημερολογίου: {op}")
+        entry = {"op": op}
+        if row is not None:
+            entry["row"] = row
+        if food is not None:
+            entry["food"] = food
+        if not os.path.exists(self.path):
+            self.reset()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending += 1
+
+    def reset(self):
+        """Start an empty journal against the current base file, e.g. after compaction."""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"base": _base_signature(self.sources)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self.pending = 0
+
+    def compact(self, foods):
+        """Write the whole catalogue to the base file and empty the journal."""
+        write_foods(self.base_path, foods)
+        self.reset()
+
+class SqliteFoodStore:
+    """Food catalogue kept in a local SQLite database.
+
+    Rows are returned in id order, which is also the order of the FoodTable
+    built by ``load_table``. ``ids`` maps table rows to database ids, so edits
+    address foods by row exactly like FoodJournal. The database only stores the
+    catalogue: every query runs on the loaded FoodTable, so the table has no
+    secondary indexes to keep up to date on writes. It runs in WAL mode so
+    several processes can read it while one writes. The connection may be used
+    from any thread (the GUI loads the catalogue on a background thread); a
+    lock serializes access to it.
+    """
+
+    _insert = f"INSERT INTO foods ({', '.join(FOOD_COLUMNS)}) VALUES ({', '.join('?' * len(FOOD_COLUMNS))})"
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = 0
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        nutrient_columns = ", ".join(f"{column} REAL NOT NULL" for column in NUTRIENT_COLUMNS.values())
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS foods (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                f"name TEXT NOT NULL, category TEXT NOT NULL, cost REAL NOT NULL, {nutrient_columns})"
+            )
+            # Βάσεις από παλαιότερες εκδόσεις είχαν δευτερεύοντα ευρετήρια που απλώς καθυστερούσαν τις εγγραφές
+            for index in ("category", "cost", "name", *NUTRIENT_COLUMNS.values()):
+                self.connection.execute(f"DROP INDEX IF EXISTS foods_{index}")
+        self.ids = [food_id for (food_id,) in self.connection.execute("SELECT id FROM foods ORDER BY id")]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def _values(self, food):
+        validate_food(food)
+        return (food["name"], food["category"], float(food["cost"]), *(float(food["nutrients"][nutrient]) for nutrient in NUTRIENTS))
+
+    def load_table(self):
+        """Read the whole catalogue into a FoodTable."""
+        columns = ", ".join(NUTRIENT_COLUMNS.values())
+        with self._lock:
+            rows = self.connection.execute(f"SELECT id, name, category, cost, {columns} FROM foods ORDER BY id").fetchall()
+            self.ids = [row[0] for row in rows]
+        nutrients = np.array([row[4:] for row in rows], dtype=np.float64).reshape(len(rows), len(NUTRIENTS))
+        costs = np.array([row[3] for row in rows], dtype=np.float64)
+        category_codes = np.array([CATEGORY_NAMES.index(row[2]) for row in rows], dtype=np.int8)
+        return FoodTable.from_arrays(nutrients, costs, category_codes, [row[1] for row in rows])
+
+    def record(self, op, row=None, food=None):
+        """Apply one add, edit or delete by table row and commit it."""
+        with self._lock, self.connection:
+            if op == "add":
+                cursor = self.connection.execute(self._insert, self._values(food))
+                self.ids.append(cursor.lastrowid)
+            elif op == "edit":
+                assignments = ", ".join(f"{column} = ?" for column in FOOD_COLUMNS)
+                self.connection.execute(f"UPDATE foods SET {assignments} WHERE id = ?", (*self._values(food), self.ids[row]))
+            elif op == "delete":
+                self.connection.execute("DELETE FROM foods WHERE id = ?", (self.ids[row],))
+                del self.ids[row]
+            else:
+                raise ValueError(f"Άγνωστη εγγραφή ημερολογίου: {op}")
+
+    def compact(self, foods):
+        """Replace the stored catalogue with ``foods`` in one transaction."""
+        with self._lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM foods")
+                self.connection.executemany(self._insert, (self._values(food) for food in foods))
+            self.ids = [food_id for (food_id,) in self.connection.execute("SELECT id FROM foods ORDER BY id")]
+
+def _day(date):
+    """Days since the epoch for a date, datetime or ISO 'YYYY-MM-DD' string."""
+    return int(np.datetime64(date, "D").astype(np.int64))
+
+class PriceHistory:
+    """Dated price ticks per food name, for looking up the price in force on a day.
+
+    Each food keeps two parallel arrays sorted by day (days since the epoch and
+    prices), so an as-of lookup is one binary search. Ticks are bulk-loaded with
+    a single sort and saved as one columnar .npz file: every tick's day and price
+    in food order, plus the names and their start offsets.
+    """
+
+    def __init__(self):
+        self._ticks = {}
+
+    def __len__(self):
+        return len(self._ticks)
+
+    @property
+    def tick_count(self):
+        return sum(len(days) for days, _ in self._ticks.values())
+
+    @classmethod
+    def load(cls, path):
+        history = cls()
+        with np.load(path) as data:
+            names, offsets, days, prices = data["names"], data["offsets"], data["days"], data["prices"]
+        for name, start, end in zip(names.tolist(), offsets[:-1], offsets[1:]):
+            history._ticks[name] = (days[start:end], prices[start:end])
+        return history
+
+    def save(self, path):
+        names = list(self._ticks)
+        lengths = [len(self._ticks[name][0]) for name in names]
+        offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+        days = np.concatenate([self._ticks[name][0] for name in names]) if names else np.empty(0, dtype=np.int64)
+        prices = np.concatenate([self._ticks[name][1] for name in names]) if names else np.empty(0)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, names=np.array(names, dtype=str), offsets=offsets, days=days, prices=prices)
+        os.replace(temp_path, path)
+
+    def bulk_load(self, names, dates, prices):
+        """Add many ticks at once; a tick for an existing (food, day) replaces it. Returns the number added."""
+        days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64).reshape(-1)
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(names) != len(days) or len(days) != len(prices):
+            raise ValueError("Τα ονόματα, οι ημερομηνίες και οι τιμές πρέπει να έχουν το ίδιο μήκος.")
+        if np.any(~np.isfinite(prices) | (prices <= 0)):
+            raise ValueError("Οι τιμές του ιστορικού πρέπει να είναι θετικές.")
+        # Οι υπάρχουσες τιμές μπαίνουν πρώτες ώστε οι νέες να τις αντικαθιστούν στην ίδια ημέρα
+        unique_names = list(self._ticks)
+        code_by_name = {name: code for code, name in enumerate(unique_names)}
+        old_codes = np.repeat(np.arange(len(unique_names)), [len(days_) for days_, _ in self._ticks.values()])
+        new_codes = np.array([code_by_name.setdefault(name, len(code_by_name)) for name in names], dtype=np.int64)
+        unique_names = list(code_by_name)
+        codes = np.concatenate([old_codes.astype(np.int64), new_codes])
+        all_days = np.concatenate([days_ for days_, _ in self._ticks.values()] + [days])
+        all_prices = np.concatenate([prices_ for _, prices_ in self._ticks.values()] + [prices])
+        order = np.lexsort((all_days, codes))
+        codes, all_days, all_prices = codes[order], all_days[order], all_prices[order]
+        # Από ίδιες (τροφή, ημέρα) κρατά την τελευταία, αφού η lexsort είναι σταθερή
+        last = np.ones(len(codes), dtype=bool)
+        last[:-1] = (codes[1:] != codes[:-1]) | (all_days[1:] != all_days[:-1])
+        codes, all_days, all_prices = codes[last], all_days[last], all_prices[last]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        self._ticks = {
+            unique_names[group_codes[0]]: (group_days, group_prices)
+            for group_codes, group_days, group_prices in zip(np.split(codes, bounds), np.split(all_days, bounds), np.split(all_prices, bounds))
+            if len(group_codes)
+        }
+        return len(days)
+
+    def load_csv(self, path):
+        """Bulk-load ticks from a CSV file with name, date (YYYY-MM-DD) and price columns."""
+        names, dates, prices = [], [], []
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                names.append(row["name"])
+                dates.append(row["date"])
+                prices.append(float(row["price"]))
+        return self.bulk_load(names, dates, prices)
+
+    def record(self, name, date, price):
+        """Add or replace the tick of one food on one day."""
+        if not price > 0:
+            raise ValueError("Οι τιμές του ιστορικού πρέπει να είναι θετικές.")
+        day = _day(date)
+        days, prices = self._ticks.get(name, (np.empty(0, dtype=np.int64), np.empty(0)))
+        position = int(np.searchsorted(days, day))
+        if position < len(days) and days[position] == day:
+            prices = prices.copy()
+            prices[position] = price
+        else:
+            days, prices = np.insert(days, position, day), np.insert(prices, position, price)
+        self._ticks[name] = (days, prices)
+
+    def price_as_of(self, name, date):
+        """Price of a food in force on ``date`` (its latest tick on or before it), or None."""
+        if name not in self._ticks:
+            return None
+        days, prices = self._ticks[name]
+        position = int(np.searchsorted(days, _day(date), side="right"))
+        return float(prices[position - 1]) if position else None
+
+    def costs_as_of(self, names, date, fallback):
+        """Cost vector for ``names`` on ``date``; foods without an earlier tick keep their ``fallback`` cost."""
+        day = _day(date)
+        costs = np.array(fallback, dtype=np.float64)
+        for row, name in enumerate(names):
+            ticks = self._ticks.get(name)
+            if ticks is not None:
+                position = int(np.searchsorted(ticks[0], day, side="right"))
+                if position:
+                    costs[row] = ticks[1][position - 1]
+        return costs
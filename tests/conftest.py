@@ -0,0 +1,17 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FOOD_FILE = os.path.join(ROOT, "foods_expanded.json")
+Q_VALUES = [150.0, 40.0, 30.0, 15.0, 200.0, 8.0]
+
+
+@pytest.fixture(scope="session")
+def food_list():
+    with open(FOOD_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
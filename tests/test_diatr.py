@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+# Όπως τη φορτώνει μια διεργασία spawn του process pool, με το tkinter μη διαθέσιμο
+WORKER_IMPORT = f"""
+import runpy, sys
+sys.path.insert(0, {ROOT!r})
+sys.modules["tkinter"] = None
+runpy.run_path({os.path.join(ROOT, "diatr.py")!r}, run_name="__mp_main__")
+print(sorted(name for name in ("matplotlib", "PIL") if name in sys.modules))
+"""
+
+
+def test_worker_import_is_headless(tmp_path):
+    env = dict(os.environ, APPDATA=str(tmp_path / "appdata"), HOME=str(tmp_path / "home"), DIET_ASSISTANT_STORE="sqlite")
+    result = subprocess.run([sys.executable, "-c", WORKER_IMPORT], env=env, cwd=str(tmp_path), capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == "[]"
+    # Ούτε φάκελοι ούτε η βάση τροφών δημιουργούνται κατά την εισαγωγή
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,78 @@
+import csv
+import json
+
+import pytest
+
+from conftest import FOOD_FILE, Q_VALUES
+from diet_batch import main
+from diet_engine import DAYS, NUTRIENTS
+from food_store import SqliteFoodStore
+
+PROFILES = [
+    {"id": "a", "q": dict(zip(NUTRIENTS, Q_VALUES))},
+    dict(zip(NUTRIENTS, [300, 60, 70, 25, 1000, 15]), id="b", max_cost_per_day=40),
+    ["όχι", "προφίλ"],
+    "κείμενο",
+    {"id": "c", "q": 5},
+    {"id": "d", "q": dict.fromkeys(NUTRIENTS, 0)},
+]
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    path = tmp_path / "profiles.jsonl"
+    path.write_text("\n".join(json.dumps(profile, ensure_ascii=False) for profile in PROFILES) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_batch_writes_a_row_per_profile(tmp_path, profiles):
+    output = str(tmp_path / "menus.jsonl")
+    assert main([profiles, "--output", output, "--workers", "2", "--method", "lp"]) == 1
+    results = read_jsonl(output)
+    assert [result["id"] for result in results] == ["a", "b", "2", "3", "c", "d"]
+    assert [result["status"] for result in results] == ["ok", "ok", "error", "error", "error", "error"]
+    assert all(result["error"] for result in results[2:])
+    for result in results[:2]:
+        assert [day["day"] for day in result["days"]] == DAYS
+        assert result["weekly_total_cost"] == pytest.approx(sum(day["total_cost"] for day in result["days"]), abs=1e-3)
+
+
+def test_batch_reports_malformed_jsonl_lines(tmp_path, profiles):
+    with open(profiles, "a", encoding="utf-8") as f:
+        f.write('{"id": "e", "q": \n\n' + json.dumps(PROFILES[0]) + "\n")
+    output = str(tmp_path / "menus.jsonl")
+    main([profiles, "--output", output, "--workers", "1"])
+    results = read_jsonl(output)
+    assert [result["status"] for result in results[-2:]] == ["error", "ok"]
+    assert results[-2]["error"].startswith("Γραμμή 7:")
+    assert len(results) == len(PROFILES) + 2
+
+
+def test_batch_seeded_random_method_is_reproducible(tmp_path, profiles):
+    outputs = []
+    for run in range(2):
+        output = str(tmp_path / f"menus{run}.jsonl")
+        main([profiles, "--output", output, "--workers", str(run + 1), "--method", "random", "--seed", "5"])
+        outputs.append(read_jsonl(output))
+    assert outputs[0] == outputs[1]
+
+
+def test_batch_csv_output_from_cache_and_database(tmp_path, profiles, food_list):
+    database = str(tmp_path / "foods.sqlite3")
+    store = SqliteFoodStore(database)
+    store.compact(food_list)
+    store.close()
+    rows = []
+    for source in (["--cache-dir", str(tmp_path / "cache"), "--foods", FOOD_FILE], ["--db", database]):
+        output = str(tmp_path / "menus.csv")
+        main([profiles, "--output", output, "--workers", "1", *source])
+        with open(output, "r", encoding="utf-8", newline="") as f:
+            rows.append(list(csv.DictReader(f)))
+    assert rows[0] == rows[1]
+    assert {row["id"] for row in rows[0] if row["status"] == "ok"} == {"a", "b"}
+    assert {row["day"] for row in rows[0] if row["id"] == "a"} == set(DAYS)
@@ -0,0 +1,493 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import diet_engine
+from conftest import Q_VALUES
+from diet_engine import (
+    CATEGORY_NAMES, DAYS, MAX_COST_PER_DAY, MIN_PORTION, MAX_PORTION, NUTRIENTS, FoodTable, InfeasibleError, SolveCache,
+    bounded_lstsq, catalogue_analytics, daily_categories, linprog_simplex, nutrient_matrix, pareto_front, plan_weekly_menu, replan_weekly_menu, sensitivity_analysis,
+    _gram_inverse, _select_foods, _selection_score, _slot_selection, _solve_perturbed_batched, _solve_perturbed_rank1
+)
+
+
+def random_problem(seed, m, n):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(m, n)), rng.normal(size=m)
+
+
+def assert_bvls_kkt(A, b, x, lower, upper, tol=1e-7):
+    """x is optimal for min ||Ax - b|| on the box iff the gradient points out of every active bound."""
+    assert np.all(x >= lower - tol) and np.all(x <= upper + tol)
+    w = A.T @ (b - A @ x)
+    scale = tol * max(1.0, np.abs(A.T @ b).max())
+    at_lower = np.isclose(x, lower, atol=tol)
+    at_upper = np.isclose(x, upper, atol=tol)
+    inside = ~at_lower & ~at_upper
+    assert np.all(np.abs(w[inside]) <= scale)
+    assert np.all(w[at_lower & ~at_upper] <= scale)
+    assert np.all(w[at_upper & ~at_lower] >= -scale)
+
+
+def food(name, value=1.0, cost=1.0, category="Φρούτα"):
+    return {"name": name, "nutrients": {nutrient: value for nutrient in NUTRIENTS}, "cost": cost, "category": category}
+
+
+def assert_table_matches(table, expected):
+    assert list(table) == expected
+    assert len(table) == len(expected)
+    np.testing.assert_array_equal(table.matrix, nutrient_matrix(expected))
+    np.testing.assert_array_equal(table.costs, [f["cost"] for f in expected])
+    assert [table.category_name(row) for row in range(len(table))] == [f["category"] for f in expected]
+    first = {}
+    for row, f in enumerate(expected):
+        first.setdefault(f["name"], row)
+    assert table.row_by_name == first
+
+
+# FoodTable
+
+@pytest.mark.parametrize("seed", range(5))
+def test_food_table_mutations_match_a_list(seed, food_list):
+    rng = np.random.default_rng(seed)
+    table = FoodTable()
+    expected = []
+    for step in range(300):
+        op = rng.integers(5) if expected else 0
+        new_food = dict(food_list[rng.integers(len(food_list))])
+        if op == 0:
+            table.append(new_food)
+            expected.append(new_food)
+        elif op == 1:
+            row = int(rng.integers(-len(expected), len(expected) + 2))
+            table.insert(row, new_food)
+            expected.insert(row, new_food)
+        elif op == 2:
+            row = int(rng.integers(-len(expected), len(expected)))
+            table[row] = new_food
+            expected[row] = new_food
+        elif op == 3:
+            row = int(rng.integers(-len(expected), len(expected)))
+            del table[row]
+            del expected[row]
+        else:
+            size = int(rng.integers(len(expected) // 2, len(expected) + 1))
+            table.truncate(size)
+            del expected[size:]
+    assert_table_matches(table, expected)
+
+
+def test_food_table_rejects_rows_out_of_range(food_list):
+    table = FoodTable.from_foods(food_list[:3])
+    for row in (3, -4):
+        with pytest.raises(IndexError):
+            table[row]
+        with pytest.raises(IndexError):
+            del table[row]
+
+
+def test_food_table_upsert_overwrites_by_name_and_appends(food_list):
+    table = FoodTable.from_foods(food_list[:4])
+    batch = [food(food_list[1]["name"], value=3.0), food("Νέα"), food("Νέα", value=5.0, category="Λαχανικά")]
+    added, updated = table.upsert([f["name"] for f in batch], nutrient_matrix(batch).T, np.array([f["cost"] for f in batch]),
+                                  np.array([CATEGORY_NAMES.index(f["category"]) for f in batch], dtype=np.int8))
+    assert (added, updated) == (1, 1)
+    assert_table_matches(table, [food_list[0], batch[0], *food_list[2:4], batch[2]])
+
+
+def test_food_table_restore_undoes_appends_and_overwrites(food_list):
+    table = FoodTable.from_foods(food_list[:4])
+    snapshot = table.snapshot()
+    table[0] = food(food_list[0]["name"], value=9.0)
+    for f in food_list[4:40]:
+        table.append(f)
+    table.restore(snapshot)
+    assert_table_matches(table, food_list[:4])
+
+
+# linprog_simplex
+
+def test_simplex_two_variable_optimum():
+    result = linprog_simplex([-1, -1], A_ub=[[1, 2], [3, 1]], b_ub=[4, 6])
+    np.testing.assert_allclose(result["x"], [1.6, 1.2])
+    assert result["cost"] == pytest.approx(-2.8)
+
+
+def test_simplex_equality_and_greater_equal_rows():
+    # min x + 2y + 3z  s.t.  x + y + z = 10,  y >= 2,  z >= 3
+    result = linprog_simplex([1, 2, 3], A_ub=[[0, -1, 0], [0, 0, -1]], b_ub=[-2, -3], A_eq=[[1, 1, 1]], b_eq=[10])
+    np.testing.assert_allclose(result["x"], [5, 2, 3], atol=1e-9)
+    assert result["cost"] == pytest.approx(18)
+
+
+def test_simplex_terminates_on_beale_cycling_example():
+    c = [0, 0, 0, -0.75, 150, -0.02, 6]
+    A_eq = [[1, 0, 0, 0.25, -60, -0.04, 9],
+            [0, 1, 0, 0.5, -90, -0.02, 3],
+            [0, 0, 1, 0, 0, 1, 0]]
+    result = linprog_simplex(c, A_eq=A_eq, b_eq=[0, 0, 1])
+    assert result["cost"] == pytest.approx(-0.05)
+
+
+def test_simplex_infeasible():
+    with pytest.raises(InfeasibleError):
+        linprog_simplex([1, 1], A_ub=[[1, 1], [-1, -1]], b_ub=[1, -2])
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_simplex_diet_lp_beats_feasible_points(seed):
+    # min C x  s.t.  A x >= Q, x >= 0, with a positive A so every problem is feasible
+    rng = np.random.default_rng(seed)
+    A = rng.uniform(0.1, 2.0, size=(4, 8))
+    Q = rng.uniform(1.0, 10.0, size=4)
+    C = rng.uniform(0.5, 3.0, size=8)
+    result = linprog_simplex(C, A_ub=-A, b_ub=-Q)
+    assert np.all(result["x"] >= 0)
+    assert np.all(A @ result["x"] >= Q - 1e-8)
+    samples = rng.uniform(0, 10, size=(2000, 8))
+    feasible = samples[np.all(samples @ A.T >= Q, axis=1)]
+    assert len(feasible)
+    assert result["cost"] <= (feasible @ C).min() + 1e-9
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_simplex_bounds_match_explicit_bound_rows(seed):
+    rng = np.random.default_rng(seed)
+    m, n = rng.integers(2, 8), rng.integers(2, 15)
+    A = rng.uniform(-1, 2, size=(m, n))
+    b = rng.uniform(-3, 5, size=m)
+    c = rng.uniform(-2, 3, size=n)
+    lower = rng.uniform(0, 0.5, size=n) * (rng.random(n) < 0.5)
+    upper = lower + rng.uniform(0.1, 3, size=n)
+    upper[rng.random(n) < 0.2] = np.inf
+    finite = np.isfinite(upper)
+    A_rows = np.vstack([A, np.eye(n)[finite], -np.eye(n)])
+    b_rows = np.concatenate([b, upper[finite], -lower])
+    try:
+        expected = linprog_simplex(c, A_rows, b_rows)
+    except InfeasibleError:
+        with pytest.raises(InfeasibleError):
+            linprog_simplex(c, A, b, lower=lower, upper=upper)
+        return
+    result = linprog_simplex(c, A, b, lower=lower, upper=upper)
+    assert result["cost"] == pytest.approx(expected["cost"], rel=1e-6, abs=1e-9)
+    assert np.all(A @ result["x"] <= b + 1e-7)
+    assert np.all(result["x"] >= lower) and np.all(result["x"] <= upper)
+
+
+def test_simplex_rejects_crossed_bounds():
+    with pytest.raises(ValueError):
+        linprog_simplex([1, 1], lower=[0, 2], upper=[1, 1])
+
+
+# bounded_lstsq
+
+@pytest.mark.parametrize("m, n", [(6, 4), (6, 6), (10, 3)])
+def test_bvls_without_bounds_matches_lstsq(m, n):
+    A, b = random_problem(m * n, m, n)
+    x, residual, free = bounded_lstsq(A, b, -np.inf, np.inf)
+    expected = np.linalg.lstsq(A, b, rcond=None)[0]
+    np.testing.assert_allclose(x, expected, atol=1e-9)
+    assert residual == pytest.approx(np.sum((A @ expected - b) ** 2))
+    assert free.all()
+
+
+def test_bvls_with_loose_bounds_matches_lstsq():
+    A, b = random_problem(1, 8, 5)
+    expected = np.linalg.lstsq(A, b, rcond=None)[0]
+    x, _, _ = bounded_lstsq(A, b, expected - 1.0, expected + 1.0)
+    np.testing.assert_allclose(x, expected, atol=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bvls_satisfies_kkt(seed):
+    A, b = random_problem(seed, 6, 9)
+    lower = np.zeros(9)
+    upper = np.full(9, 0.5)
+    x, residual, _ = bounded_lstsq(A, b, lower, upper)
+    assert_bvls_kkt(A, b, x, lower, upper)
+    assert residual == pytest.approx(np.sum((A @ x - b) ** 2))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_nnls_satisfies_kkt_and_warm_start_agrees(seed):
+    A, b = random_problem(100 + seed, 6, 12)
+    x, _, _ = bounded_lstsq(A, b)
+    assert_bvls_kkt(A, b, x, 0.0, np.inf)
+    # Μετά από μικρή αλλαγή μιας στήλης η θερμή εκκίνηση δίνει την ίδια λύση με την ψυχρή
+    A[:, 0] *= 1.05
+    cold, _, _ = bounded_lstsq(A, b)
+    warm, _, _ = bounded_lstsq(A, b, x0=x)
+    np.testing.assert_allclose(warm, cold, atol=1e-8)
+
+
+def test_bvls_rejects_crossed_bounds():
+    A, b = random_problem(0, 3, 2)
+    with pytest.raises(ValueError):
+        bounded_lstsq(A, b, [0.0, 1.0], [1.0, 0.5])
+
+
+# Sensitivity
+
+@pytest.mark.parametrize("idx", [0, 3, 9])
+def test_rank1_sensitivity_matches_batched(idx):
+    rng = np.random.default_rng(idx)
+    A = rng.uniform(0.1, 5.0, size=(6, 10))
+    Q = rng.uniform(10.0, 100.0, size=6)
+    perturbations = rng.uniform(0.95, 1.05, size=(50, 6))
+    rank1 = _solve_perturbed_rank1(A, Q, idx, perturbations, _gram_inverse(A))
+    batched = _solve_perturbed_batched(A, Q, idx, perturbations)
+    np.testing.assert_allclose(rank1, batched, rtol=1e-7, atol=1e-9)
+
+
+def test_sensitivity_methods_and_workers_agree():
+    rng = np.random.default_rng(7)
+    A = rng.uniform(0.1, 5.0, size=(6, 10))
+    Q = np.array(Q_VALUES)
+    C = rng.uniform(0.5, 3.0, size=10)
+    indices = [0, 4, 8]
+    serial = sensitivity_analysis(A, Q, C, indices, n_samples=40, seed=3, method="rank1")
+    batched = sensitivity_analysis(A, Q, C, indices, n_samples=40, seed=3, method="batched")
+    threaded = sensitivity_analysis(A, Q, C, indices, n_samples=40, seed=3, method="rank1", workers=3, executor="thread")
+    for idx in indices:
+        np.testing.assert_allclose(serial["sensitivities"][idx], batched["sensitivities"][idx], rtol=1e-6)
+        assert serial["sensitivities"][idx] == threaded["sensitivities"][idx]
+
+
+def test_sensitivity_rejects_rank_deficient_system():
+    A = np.ones((6, 3))
+    with pytest.raises(InfeasibleError):
+        sensitivity_analysis(A, np.array(Q_VALUES), np.ones(3), [0])
+
+
+# Weekly planner
+
+@pytest.mark.parametrize("method", ["lp", "week"])
+def test_lp_weekly_menu_covers_scaled_needs_with_valid_portions(food_list, method):
+    table = FoodTable.from_foods(food_list)
+    Q = np.array(Q_VALUES)
+    plan = plan_weekly_menu(table.matrix, Q, table.costs, table.category_codes, method=method)
+    assert len(plan) == 7
+    for day_plan in plan:
+        T = np.asarray(day_plan["T"])
+        assert np.all(T >= MIN_PORTION - 1e-9) and np.all(T <= MAX_PORTION + 1e-9)
+        coverage = table.columns(day_plan["indices"]) @ T
+        assert np.all(coverage >= day_plan["q_scale"] * Q * (1 - 1e-6))
+        assert day_plan["total_cost"] == pytest.approx(float(T @ table.costs[day_plan["indices"]]))
+
+
+@pytest.mark.parametrize("method", ["lp", "week", "greedy"])
+def test_weekly_menu_fills_every_category_slot(food_list, method):
+    table = FoodTable.from_foods(food_list)
+    plan = plan_weekly_menu(table.matrix, np.array(Q_VALUES), table.costs, table.category_codes, method=method)
+    for day_plan in plan:
+        counts = Counter(table.category_name(idx) for idx in day_plan["indices"])
+        assert counts == {category: count for category, count in daily_categories(day_plan["day"]).items() if count}
+    used = [idx for day_plan in plan for idx in day_plan["indices"]]
+    assert len(used) == len(set(used))
+
+
+def test_greedy_menu_portions_and_budget(food_list):
+    table = FoodTable.from_foods(food_list)
+    plan = plan_weekly_menu(table.matrix, np.array(Q_VALUES), table.costs, table.category_codes, max_cost_per_day=15.0, method="greedy")
+    for day_plan in plan:
+        T = np.asarray(day_plan["T"])
+        assert np.all(T >= MIN_PORTION - 1e-9) and np.all(T <= MAX_PORTION + 1e-9)
+        assert day_plan["total_cost"] <= 15.0 + 1e-9
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_greedy_selection_is_a_swap_local_optimum(seed, food_list):
+    table = FoodTable.from_foods(food_list)
+    A, C, Q = table.matrix, table.costs, np.array(Q_VALUES)
+    rng = np.random.default_rng(seed)
+    day_categories = daily_categories(DAYS[seed])
+    pools = {category: sorted(rng.choice(table.rows_in_category(category), 6, replace=False).tolist())
+             for category, count in day_categories.items() if count}
+    selected, T, residual, total_cost, score = _select_foods(A, Q, C, pools, day_categories, MAX_COST_PER_DAY)
+    assert _slot_selection(selected, [c for c in pools for _ in range(day_categories[c])], table.category_codes) == selected
+    assert score == _selection_score(A, Q, C, selected, MAX_COST_PER_DAY)[0]
+    for position, idx in enumerate(selected):
+        for other in pools[table.category_name(idx)]:
+            if other not in selected:
+                candidate = selected[:position] + [other] + selected[position + 1:]
+                assert _selection_score(A, Q, C, candidate, MAX_COST_PER_DAY)[0] >= score - 1e-9
+
+
+# Catalogue analytics
+
+def test_catalogue_analytics_matches_loops(food_list):
+    table = FoodTable.from_foods(food_list)
+    analytics = catalogue_analytics(table.matrix, table.costs, table.category_codes, top_k=5)
+    for nutrient in NUTRIENTS:
+        values = [f["nutrients"][nutrient] for f in food_list]
+        unit_costs = [f["cost"] / f["nutrients"][nutrient] if f["nutrients"][nutrient] > 0 else np.inf for f in food_list]
+        assert analytics["max_value"][nutrient]["value"] == max(values)
+        assert analytics["max_value"][nutrient]["rows"] == [row for row, value in enumerate(values) if value == max(values)]
+        assert analytics["min_cost_per_unit"][nutrient]["value"] == pytest.approx(min(unit_costs))
+        assert unit_costs[analytics["min_cost_per_unit"][nutrient]["row"]] == pytest.approx(min(unit_costs))
+        assert [values[row] for row in analytics["top_value"][nutrient]] == sorted(values, reverse=True)[:5]
+        assert [unit_costs[row] for row in analytics["top_cost_per_unit"][nutrient]] == pytest.approx(sorted(unit_costs)[:5])
+    for category, stats in analytics["categories"].items():
+        members = [f for f in food_list if f["category"] == category]
+        assert stats["count"] == len(members)
+        assert stats["mean_cost"] == pytest.approx(np.mean([f["cost"] for f in members]))
+        assert stats["max_value"] == {nutrient: max(f["nutrients"][nutrient] for f in members) for nutrient in NUTRIENTS}
+    assert sum(stats["count"] for stats in analytics["categories"].values()) == len(food_list)
+
+
+def test_catalogue_analytics_missing_nutrient_and_short_catalogue():
+    foods = [food("Α", value=0.0, cost=2.0), food("Β", value=2.0, cost=1.0, category="Λαχανικά")]
+    table = FoodTable.from_foods(foods)
+    analytics = catalogue_analytics(table.matrix, table.costs, table.category_codes, top_k=5)
+    for nutrient in NUTRIENTS:
+        assert analytics["min_cost_per_unit"][nutrient] == {"value": 0.5, "row": 1}
+        assert analytics["top_value"][nutrient] == [1, 0]
+        assert analytics["top_cost_per_unit"][nutrient] == [1]
+    assert analytics["categories"]["Φρούτα"]["min_cost_per_unit"] == dict.fromkeys(NUTRIENTS)
+    with pytest.raises(ValueError):
+        catalogue_analytics(np.empty((len(NUTRIENTS), 0)), np.empty(0), np.empty(0, dtype=np.int8))
+
+
+# Pareto front
+
+def brute_force_front(A, C, rows):
+    points = np.vstack([C[None, :], -A])
+    front = []
+    for i in rows:
+        dominated = any(np.all(points[:, j] <= points[:, i]) and np.any(points[:, j] < points[:, i]) for j in rows)
+        if not dominated:
+            front.append(i)
+    return sorted(front)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_pareto_front_matches_brute_force(seed, monkeypatch):
+    # Μικρά μπλοκ, ώστε να ελέγχονται και οι συγκρίσεις ανάμεσα σε μπλοκ και τμήματα του μετώπου
+    monkeypatch.setattr(diet_engine, "PARETO_BLOCK", 16)
+    monkeypatch.setattr(diet_engine, "PARETO_CHUNK", 4)
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 400))
+    # Λίγες διακριτές τιμές, ώστε να υπάρχουν ισοπαλίες και πανομοιότυπες τροφές
+    A = rng.integers(0, 4, size=(3, n)).astype(np.float64)
+    C = rng.integers(1, 5, size=n).astype(np.float64)
+    rows = np.arange(n) if seed % 2 else np.sort(rng.choice(n, n // 2 + 1, replace=False))
+    assert pareto_front(A, C, None if seed % 2 else rows).tolist() == brute_force_front(A, C, rows.tolist())
+
+
+def test_pareto_front_of_the_catalogue(food_list):
+    table = FoodTable.from_foods(food_list)
+    assert pareto_front(table.matrix, table.costs).tolist() == brute_force_front(table.matrix, table.costs, range(len(table)))
+    assert pareto_front(table.matrix, table.costs, []).tolist() == []
+
+
+# Solve cache
+
+def test_solve_cache_evicts_least_recently_used():
+    cache = SolveCache(maxsize=2)
+    calls = []
+
+    def compute(name):
+        return lambda: calls.append(name) or name
+
+    keys = {name: SolveCache.key("test", name) for name in "abc"}
+    for name in "aba":
+        assert cache.lookup(keys[name], compute(name)) == name
+    cache.lookup(keys["c"], compute("c"))   # Το "b" είναι το λιγότερο πρόσφατο
+    assert len(cache) == 2
+    cache.lookup(keys["a"], compute("a"))
+    cache.lookup(keys["b"], compute("b"))
+    assert calls == ["a", "b", "c", "b"]
+    assert cache.stats == {"hits": 2, "misses": 4, "size": 2, "maxsize": 2}
+
+
+def test_solve_cache_clear_and_overlapping_compute():
+    cache = SolveCache()
+    key = SolveCache.key("bounded", [1, 2], np.array(Q_VALUES), MIN_PORTION)
+    cached = cache.lookup(key, lambda: (np.ones(3), 0.0))
+    assert not cached[0].flags.writeable
+    assert cache.lookup(key, lambda: None) is cached
+    cache.clear()
+    assert len(cache) == 0
+    # Ένα αποτέλεσμα που υπολογιζόταν ενώ ο κατάλογος καθαρίστηκε επιστρέφεται αλλά δεν αποθηκεύεται
+    assert cache.lookup(key, lambda: cache.clear() or "stale") == "stale"
+    assert len(cache) == 0
+
+
+def test_solve_cache_keys_distinguish_kind_rows_and_dtype():
+    rows = [1, 2, 3]
+    keys = {
+        SolveCache.key("lp-day", rows, 1.0), SolveCache.key("lp-week", rows, 1.0), SolveCache.key("lp-day", [1, 2, 4], 1.0),
+        SolveCache.key("lp-day", np.array(rows, dtype=np.float64), 1.0), SolveCache.key("lp-day", rows, 0.9),
+    }
+    assert len(keys) == 5
+    assert SolveCache.key("lp-day", rows, 1.0) == SolveCache.key("lp-day", np.array(rows), 1.0)
+
+
+def test_cached_weekly_menu_matches_uncached(food_list):
+    table = FoodTable.from_foods(food_list)
+    args = (table.matrix, np.array(Q_VALUES), table.costs, table.category_codes)
+    cache = SolveCache()
+    expected = plan_weekly_menu(*args, method="lp")
+    for _ in range(2):
+        plan = plan_weekly_menu(*args, method="lp", cache=cache)
+        assert [day_plan["indices"] for day_plan in plan] == [day_plan["indices"] for day_plan in expected]
+        np.testing.assert_array_equal(np.concatenate([day_plan["T"] for day_plan in plan]), np.concatenate([day_plan["T"] for day_plan in expected]))
+    assert cache.hits > 0
+
+
+# Re-planning
+
+@pytest.fixture
+def weekly_inputs(food_list):
+    table = FoodTable.from_foods(food_list)
+    return table.matrix.copy(), np.array(Q_VALUES), table.costs.copy(), table.category_codes
+
+
+@pytest.mark.parametrize("method", ["random", "lp", "greedy"])
+def test_replan_only_touches_days_using_changed_rows(weekly_inputs, method):
+    A, Q, C, category_codes = weekly_inputs
+    previous = plan_weekly_menu(A, Q, C, category_codes, rng=random.Random(1), method=method)
+    unused = sorted(set(range(A.shape[1])) - {idx for day_plan in previous for idx in day_plan["indices"]})
+    assert replan_weekly_menu(A, Q, C, category_codes, previous, [unused[0]], method=method) == previous
+
+    changed = previous[2]["indices"][0]
+    C[changed] *= 3.0
+    plan = replan_weekly_menu(A, Q, C, category_codes, previous, [changed], rng=random.Random(2), method=method)
+    for position, (day_plan, old) in enumerate(zip(plan, previous)):
+        if changed not in old["indices"]:
+            assert day_plan is not old and day_plan == old
+        assert day_plan["day"] == old["day"]
+        assert day_plan["total_cost"] == pytest.approx(float(np.dot(C[day_plan["indices"]], day_plan["T"])))
+    used = [idx for day_plan in plan for idx in day_plan["indices"]]
+    assert len(used) == len(set(used))
+
+
+def test_replan_random_keeps_foods_that_still_fit(weekly_inputs):
+    A, Q, C, category_codes = weekly_inputs
+    previous = plan_weekly_menu(A, Q, C, category_codes, rng=random.Random(3), method="random")
+    changed = previous[0]["indices"][1]
+    C[changed] *= 1.01
+    plan = replan_weekly_menu(A, Q, C, category_codes, previous, [changed], rng=random.Random(4), method="random")
+    assert sorted(plan[0]["indices"]) == sorted(previous[0]["indices"])
+    assert plan[0]["total_cost"] == pytest.approx(float(np.dot(C[plan[0]["indices"]], plan[0]["T"])))
+
+
+@pytest.mark.parametrize("method", ["lp", "week"])
+def test_replan_after_a_needs_change_covers_the_new_needs(weekly_inputs, method):
+    A, Q, C, category_codes = weekly_inputs
+    previous = plan_weekly_menu(A, Q, C, category_codes, method=method)
+    new_Q = Q * 1.1
+    plan = replan_weekly_menu(A, new_Q, C, category_codes, previous, method=method)
+    if method == "week":
+        assert [day_plan["indices"] for day_plan in plan] == [day_plan["indices"] for day_plan in plan_weekly_menu(A, new_Q, C, category_codes, method=method)]
+    for day_plan in plan:
+        assert np.all(A[:, day_plan["indices"]] @ day_plan["T"] >= day_plan["q_scale"] * new_Q * (1 - 1e-6))
+
+
+def test_replan_rejects_unknown_method(weekly_inputs):
+    A, Q, C, category_codes = weekly_inputs
+    with pytest.raises(ValueError):
+        replan_weekly_menu(A, Q, C, category_codes, [], method="simplex")
@@ -0,0 +1,341 @@
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from conftest import FOOD_FILE
+from diet_engine import NUTRIENTS, FoodTable
+from food_store import (
+    FoodJournal, PriceHistory, SqliteFoodStore, iter_json_array, load_cached_table, load_food_table,
+    merge_foods_from, stream_foods_into, write_cache, write_foods
+)
+
+JSON_DOCUMENT = """ [
+  {"name": "Φακές", "value": -12.5e-3, "nested": {"list": [1, 2.0, -3, 4e2], "flag": true}},
+  "string with \\"escapes\\", commas, ] and } inside \\u0391",
+  1234567890123,
+  -0.000001,
+  0,
+  3.14159265358979,
+  null, false, true,
+  [], {}, [[[]]],
+  {"ψ": "ελληνικά", "empty": ""}
+  ]
+"""
+
+
+def food(name, value=1.0, cost=1.0, category="Φρούτα"):
+    return {"name": name, "nutrients": {nutrient: value for nutrient in NUTRIENTS}, "cost": cost, "category": category}
+
+
+def assert_tables_equal(table, expected):
+    assert len(table) == len(expected)
+    assert list(table) == list(expected)
+    np.testing.assert_array_equal(table.matrix, expected.matrix)
+    np.testing.assert_array_equal(table.costs, expected.costs)
+    np.testing.assert_array_equal(table.category_codes, expected.category_codes)
+
+
+@pytest.fixture
+def catalogue(tmp_path, food_list):
+    path = tmp_path / "foods.json"
+    write_foods(str(path), food_list[:20])
+    return str(path)
+
+
+# iter_json_array
+
+def test_streaming_parser_matches_json_at_every_chunk_size():
+    expected = json.loads(JSON_DOCUMENT)
+    for chunk_size in range(1, 1001):
+        assert list(iter_json_array(io.StringIO(JSON_DOCUMENT), chunk_size)) == expected, chunk_size
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_streaming_parser_reads_the_catalogue(chunk_size, food_list):
+    with open(FOOD_FILE, "r", encoding="utf-8") as f:
+        assert list(iter_json_array(f, chunk_size)) == food_list
+
+
+@pytest.mark.parametrize("document", ["[]", " [ ] ", "[\n]"])
+def test_streaming_parser_empty_array(document):
+    assert list(iter_json_array(io.StringIO(document), 1)) == []
+
+
+@pytest.mark.parametrize("document", ['{"a": 1}', "", "[1, 2", "[1 2]", "[1, {\"a\": ]", '["open'])
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+def test_streaming_parser_rejects_malformed_input(document, chunk_size):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(document), chunk_size))
+
+
+def test_stream_foods_into_removes_partial_file(tmp_path, food_list):
+    table = FoodTable.from_foods(food_list[:3])
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps(food_list[3:6])[:-10], encoding="utf-8")
+    with pytest.raises(ValueError):
+        stream_foods_into(table, str(path))
+    assert list(table) == food_list[:3]
+
+
+# Binary cache
+
+def test_cache_round_trip_is_memory_mapped(tmp_path, catalogue, food_list):
+    cache_dir = str(tmp_path / "cache")
+    table = load_food_table([catalogue], cache_dir=cache_dir)
+    cached = load_cached_table(cache_dir, [catalogue])
+    assert cached is not None
+    assert_tables_equal(cached, table)
+    assert isinstance(cached.matrix.base, np.memmap)
+
+
+def test_cache_edits_stay_in_memory(tmp_path, catalogue, food_list):
+    cache_dir = str(tmp_path / "cache")
+    load_food_table([catalogue], cache_dir=cache_dir)
+    cached = load_cached_table(cache_dir, [catalogue])
+    cached[0] = food("Αλλαγμένη", value=99.0)
+    reloaded = load_cached_table(cache_dir, [catalogue])
+    assert reloaded[0] == food_list[0]
+
+
+def test_cache_is_stale_after_source_changes(tmp_path, catalogue, food_list):
+    cache_dir = str(tmp_path / "cache")
+    load_food_table([catalogue], cache_dir=cache_dir)
+    write_foods(catalogue, food_list[:21])
+    assert load_cached_table(cache_dir, [catalogue]) is None
+    assert len(load_food_table([catalogue], cache_dir=cache_dir)) == 21
+    assert len(load_cached_table(cache_dir, [catalogue])) == 21
+
+
+def test_cache_missing_or_corrupt(tmp_path, catalogue):
+    cache_dir = str(tmp_path / "cache")
+    assert load_cached_table(cache_dir, [catalogue]) is None
+    write_cache(cache_dir, load_food_table([catalogue]), [catalogue])
+    (tmp_path / "cache" / "index.json").write_text("{", encoding="utf-8")
+    assert load_cached_table(cache_dir, [catalogue]) is None
+
+
+# Journal
+
+def test_journal_replays_edits(tmp_path, catalogue, food_list):
+    journal = FoodJournal(str(tmp_path / "foods.journal"), catalogue)
+    table = load_food_table([catalogue])
+    edits = [("add", None, food("Νέα")), ("edit", 2, food("Αλλαγμένη", value=5.0)), ("delete", 0, None)]
+    for op, row, new_food in edits:
+        journal.record(op, row, new_food)
+        if op == "add":
+            table.append(new_food)
+        elif op == "edit":
+            table[row] = new_food
+        else:
+            del table[row]
+
+    replayed = load_food_table([catalogue])
+    assert FoodJournal(journal.path, catalogue).replay(replayed) == 3
+    assert_tables_equal(replayed, table)
+
+
+def test_journal_ignores_torn_last_line(tmp_path, catalogue):
+    journal = FoodJournal(str(tmp_path / "foods.journal"), catalogue)
+    journal.record("delete", 0)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"op": "delete", "ro')
+    table = load_food_table([catalogue])
+    assert journal.replay(table) == 1
+    assert len(table) == 19
+
+
+def test_journal_discarded_when_base_replaced(tmp_path, catalogue, food_list):
+    journal = FoodJournal(str(tmp_path / "foods.journal"), catalogue)
+    journal.record("delete", 0)
+    write_foods(catalogue, food_list[:20] + [food("Εξωτερική")])
+    table = load_food_table([catalogue])
+    assert journal.replay(table) == 0
+    assert len(table) == 21
+
+
+def test_journal_discarded_when_any_source_changes(tmp_path, catalogue, food_list):
+    extra = str(tmp_path / "meat_fish.json")
+    journal = FoodJournal(str(tmp_path / "foods.journal"), catalogue, [catalogue, extra])
+    journal.record("delete", 0)
+    assert journal.replay(load_food_table([catalogue])) == 1
+    write_foods(extra, [food("Εξωτερική")])
+    table = load_food_table([catalogue, extra])
+    assert journal.replay(table) == 0
+    assert len(table) == 21
+
+
+def test_journal_compact(tmp_path, catalogue):
+    journal = FoodJournal(str(tmp_path / "foods.journal"), catalogue)
+    table = load_food_table([catalogue])
+    journal.record("add", food=food("Νέα"))
+    table.append(food("Νέα"))
+    journal.compact(table)
+    assert journal.pending == 0
+    reloaded = load_food_table([catalogue])
+    assert journal.replay(reloaded) == 0
+    assert_tables_equal(reloaded, table)
+
+
+def test_journal_rejects_unknown_op(tmp_path, catalogue):
+    with pytest.raises(ValueError):
+        FoodJournal(str(tmp_path / "foods.journal"), catalogue).record("rename", 0)
+
+
+# SQLite store
+
+@pytest.fixture
+def store(tmp_path, food_list):
+    store = SqliteFoodStore(str(tmp_path / "foods.sqlite3"))
+    store.compact(food_list[:20])
+    yield store
+    store.close()
+
+
+def test_sqlite_round_trip(store, food_list):
+    assert len(store) == 20
+    assert_tables_equal(store.load_table(), FoodTable.from_foods(food_list[:20]))
+
+
+def test_sqlite_edits_persist(tmp_path, store, food_list):
+    store.record("add", food=food("Νέα"))
+    store.record("edit", 1, food("Αλλαγμένη", value=5.0))
+    store.record("delete", 0)
+    expected = FoodTable.from_foods(food_list[:20])
+    expected.append(food("Νέα"))
+    expected[1] = food("Αλλαγμένη", value=5.0)
+    del expected[0]
+
+    reopened = SqliteFoodStore(store.path)
+    try:
+        assert_tables_equal(reopened.load_table(), expected)
+        # Οι γραμμές του πίνακα αντιστοιχούν σε ids και μετά από διαγραφή
+        reopened.record("delete", len(expected) - 1)
+        del expected[len(expected) - 1]
+        assert_tables_equal(reopened.load_table(), expected)
+    finally:
+        reopened.close()
+
+
+def test_sqlite_has_no_secondary_indexes(store):
+    store.connection.execute("CREATE INDEX foods_cost ON foods (cost)")
+    store.close()
+    reopened = SqliteFoodStore(store.path)
+    try:
+        assert reopened.connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'foods_%'").fetchall() == []
+    finally:
+        reopened.close()
+
+
+def test_sqlite_rejects_invalid_food_and_op(store):
+    with pytest.raises(ValueError):
+        store.record("add", food=food("Δωρεάν", cost=0.0))
+    with pytest.raises(ValueError):
+        store.record("rename", 0)
+    assert len(store.load_table()) == 20
+
+
+def test_sqlite_store_usable_from_other_threads(store, food_list):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        tables = list(pool.map(lambda _: store.load_table(), range(8)))
+        pool.submit(store.record, "add", None, food("Από νήμα")).result()
+    assert all(len(table) == 20 for table in tables)
+    assert store.load_table().names[-1] == "Από νήμα"
+    assert threading.current_thread() is threading.main_thread()
+
+
+# Merge import
+
+def test_merge_upserts_and_reports(tmp_path, food_list):
+    table = FoodTable.from_foods(food_list[:5])
+    records = [food(food_list[0]["name"], value=9.0), food("Νέα"), food("Νέα", value=2.0), {"name": "Χαλασμένη"}, "όχι αντικείμενο"]
+    path = tmp_path / "import.json"
+    path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    report = merge_foods_from(table, str(path), batch_size=2)
+    assert (report["added"], report["updated"], report["duplicates"]) == (1, 1, 1)
+    assert [rejection["record"] for rejection in report["rejected"]] == [3, 4]
+    assert table[0] == food(food_list[0]["name"], value=9.0)
+    assert table[table.row_by_name["Νέα"]]["nutrients"][NUTRIENTS[0]] == 2.0
+    assert len(table) == 6
+
+
+def test_merge_rolls_back_on_broken_file(tmp_path, food_list):
+    table = FoodTable.from_foods(food_list[:5])
+    expected = FoodTable.from_foods(food_list[:5])
+    records = [food(food_list[0]["name"], value=9.0), food("Νέα"), food("Άλλη"), food("Τρίτη")]
+    path = tmp_path / "import.json"
+    path.write_text(json.dumps(records, ensure_ascii=False)[:-20], encoding="utf-8")
+    with pytest.raises(ValueError):
+        merge_foods_from(table, str(path), batch_size=2)
+    assert_tables_equal(table, expected)
+    assert table.row_by_name == expected.row_by_name
+
+
+def test_write_foods_round_trip(tmp_path, food_list):
+    path = str(tmp_path / "foods.json")
+    write_foods(path, food_list)
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f) == food_list
+    write_foods(path, [])
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f) == []
+    assert not os.path.exists(path + ".tmp")
+
+
+# Price history
+
+def naive_price_as_of(ticks, name, date):
+    # Η τελευταία τιμή που δόθηκε για την πιο πρόσφατη ημέρα έως το date
+    latest = {}
+    for tick_name, tick_date, price in ticks:
+        if tick_name == name and tick_date <= date:
+            latest[tick_date] = price
+    return latest[max(latest)] if latest else None
+
+
+def test_price_history_matches_naive_lookup(tmp_path):
+    rng = np.random.default_rng(0)
+    names = ["Φακές", "Ρύζι", "Μήλα", "Γάλα"]
+    dates = np.datetime64("2024-01-01") + np.arange(60)
+    ticks = [(names[rng.integers(4)], str(dates[rng.integers(60)]), round(float(rng.uniform(0.5, 5)), 2)) for _ in range(400)]
+    history = PriceHistory()
+    for start in range(0, len(ticks), 150):
+        batch = ticks[start:start + 150]
+        assert history.bulk_load(*map(list, zip(*batch))) == len(batch)
+    history.record("Μήλα", "2024-01-10", 9.99)
+    ticks.append(("Μήλα", "2024-01-10", 9.99))
+    path = str(tmp_path / "prices.npz")
+    history.save(path)
+    reloaded = PriceHistory.load(path)
+    assert reloaded.tick_count == history.tick_count == len({(name, date) for name, date, _ in ticks})
+    for date in ["2023-12-31", *map(str, dates[::7]), "2024-12-31"]:
+        for name in names + ["Άγνωστη"]:
+            assert reloaded.price_as_of(name, date) == naive_price_as_of(ticks, name, date)
+        expected = [naive_price_as_of(ticks, name, date) or 1.0 for name in names + ["Άγνωστη"]]
+        np.testing.assert_array_equal(reloaded.costs_as_of(names + ["Άγνωστη"], date, np.ones(5)), expected)
+
+
+def test_price_history_csv_and_invalid_ticks(tmp_path):
+    path = tmp_path / "ticks.csv"
+    path.write_text("name,date,price\nΦακές,2024-02-01,2.5\nΦακές,2024-01-01,2.0\n", encoding="utf-8")
+    history = PriceHistory()
+    assert history.load_csv(str(path)) == 2
+    assert history.price_as_of("Φακές", "2024-01-31") == 2.0
+    assert history.price_as_of("Φακές", "2024-02-01") == 2.5
+    with pytest.raises(ValueError):
+        history.bulk_load(["Φακές"], ["2024-03-01"], [0.0])
+    with pytest.raises(ValueError):
+        history.bulk_load(["Φακές", "Ρύζι"], ["2024-03-01"], [1.0])
+    with pytest.raises(ValueError):
+        history.record("Φακές", "2024-03-01", -1.0)
+    assert history.tick_count == 2
+
+
+def test_empty_price_history_round_trip(tmp_path):
+    path = str(tmp_path / "prices.npz")
+    PriceHistory().save(path)
+    assert len(PriceHistory.load(path)) == 0